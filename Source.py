@@ -1,8 +1,130 @@
 import os
 import sys
+import atexit
+import time
+import re
+import io
+import json
+import math
+import pickle
+import uuid
+import hashlib
+import mmap
+import array
+import logging
+import logging.handlers
+import heapq
+import bisect
+import queue
+import signal
+import sqlite3
+import struct
+import subprocess
+import tempfile
+import threading
 import configparser
+from collections import OrderedDict, deque
+from itertools import accumulate, count
+from operator import add
+from html import escape as html_escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
 from pathlib import Path
 from typing import Optional
+from contextlib import contextmanager
+
+
+class StartupTracer:
+    # wall-clock фаз запуска, от импорта модуля до первого loadFinished
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = []  # (name, start, end) в секундах от t0
+        self._open = {}
+        self.finished = False
+
+    def begin(self, name: str):
+        self._open[name] = time.perf_counter()
+
+    def end(self, name: str):
+        start = self._open.pop(name, None)
+        if start is not None:
+            self.phases.append((name, start - self.t0, time.perf_counter() - self.t0))
+
+    @contextmanager
+    def phase(self, name: str):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def mark(self, name: str):
+        t = time.perf_counter() - self.t0
+        self.phases.append((name, t, t))
+
+    def total_ms(self) -> float:
+        return max((end for _, _, end in self.phases), default=0.0) * 1000
+
+    def report(self) -> str:
+        lines = ["startup:"]
+        for name, start, end in self.phases:
+            lines.append(f"  {name:<22}{(end - start) * 1000:9.1f} ms   @ {end * 1000:8.1f} ms")
+        lines.append(f"  {'total':<22}{self.total_ms():9.1f} ms")
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_ms(), 1),
+            "phases": {name: round((end - start) * 1000, 1) for name, start, end in self.phases},
+        }
+
+
+STARTUP = StartupTracer()
+
+
+def cli_option(name: str, default: Optional[str] = None) -> Optional[str]:
+    # --name=value или --name value
+    argv = sys.argv[1:]
+    for i, a in enumerate(argv):
+        if a.startswith(name + "="):
+            return a.split("=", 1)[1]
+        if a == name and i + 1 < len(argv) and not argv[i + 1].startswith("--"):
+            return argv[i + 1]
+    return default
+
+
+def cli_flag(name: str) -> bool:
+    return name in sys.argv[1:]
+
+
+# опции, которые могут принимать значение через пробел: "--opt value"
+CLI_VALUE_OPTIONS = {
+    "--startup-check", "--startup-baseline",
+    "--batch", "--parallel", "--timeout", "--out", "--screenshots", "--pdf", "--mhtml",
+    "--perf-profile", "--perf-compare", "--rounds",
+}
+
+
+def cli_urls():
+    # позиционные аргументы — адреса/файлы для открытия
+    urls = []
+    argv = sys.argv[1:]
+    for i, a in enumerate(argv):
+        if a.startswith("-"):
+            continue
+        if i > 0 and argv[i - 1] in CLI_VALUE_OPTIONS:
+            continue
+        urls.append(a)
+    return urls
+
+# --ephemeral: ни одного файла на диске — профиль off-the-record, настройки/журналы/хранилища только в памяти
+EPHEMERAL = cli_flag("--ephemeral")
+
+
+def persistent(path: Path) -> Optional[Path]:
+    # путь для записи или None в эфемерном режиме
+    return None if EPHEMERAL else path
+
 
 def get_documents_dir() -> Path:
     home = Path.home()
@@ -20,10 +142,23 @@ CACHE_DIR = APP_DATA_DIR / "cache"
 DOWNLOADS_DIR = APP_DATA_DIR / "downloads"
 LOG_DIR = APP_DATA_DIR / "logs"
 
-START_HTML_PATH = APP_DATA_DIR / "start.html"
+START_HTML_PATH = APP_DATA_DIR / "start.html"  # только для переноса быстрых ссылок со старой стартовой
+QUICK_LINKS_PATH = APP_DATA_DIR / "quick_links.json"
 SETTINGS_INI_PATH = APP_DATA_DIR / "settings.ini"
+SESSION_JOURNAL_PATH = APP_DATA_DIR / "session.journal"
+HISTORY_DB_PATH = USER_DATA_DIR / "history.db"
+DOWNLOADS_STATE_PATH = APP_DATA_DIR / "downloads.json"
+FILTERS_DIR = APP_DATA_DIR / "filters"
+FILTERS_CACHE_PATH = CACHE_DIR / "filters.bin"
+FAVICONS_DB_PATH = CACHE_DIR / "favicons.db"
+PAGE_INDEX_PATH = USER_DATA_DIR / "pages.db"
+BOOKMARKS_DB_PATH = USER_DATA_DIR / "bookmarks.db"
+THUMBS_DIR = CACHE_DIR / "thumbs"
+PERF_STATS_PATH = APP_DATA_DIR / "perf.json"
 CAT_PATH = APP_DATA_DIR / "maxwell.jpg"
-HOME_URL = START_HTML_PATH.resolve().as_uri()
+APP_SCHEME = b"gdbrowse"
+HOME_URL = "gdbrowse://start"
+LEGACY_HOME_URL = START_HTML_PATH.resolve().as_uri()
 
 SEARCH_ENGINES = {
     "Google":      "https://www.google.com/search?q={q}",
@@ -34,8 +169,99 @@ SEARCH_ENGINES = {
     "Brave":       "https://search.brave.com/search?q={q}",
 }
 
+# подсказки в формате OpenSearch: [запрос, [подсказка, ...], ...]
+SEARCH_SUGGEST = {
+    "Google":      "https://suggestqueries.google.com/complete/search?client=firefox&ie=utf-8&oe=utf-8&q={q}",
+    "DuckDuckGo":  "https://duckduckgo.com/ac/?type=list&q={q}",
+    "Bing":        "https://api.bing.com/osjson.aspx?query={q}",
+    "Яндекс":      "https://suggest.yandex.ru/suggest-ff.cgi?part={q}",
+    "Startpage":   "https://www.startpage.com/osuggestions?q={q}",
+    "Brave":       "https://search.brave.com/api/suggest?q={q}",
+}
+
 DEFAULT_ENGINE = "Google"
+DEFAULT_QUICK_LINKS = [
+    {"title": "YouTube", "url": "https://www.youtube.com/"},
+    {"title": "VK", "url": "https://vk.com/"},
+    {"title": "GitHub", "url": "https://github.com/"},
+]
 DEFAULT_LOG_MB = 15
+DEFAULT_LOG_GENERATIONS = 5
+DEFAULT_FREEZE_AFTER_SEC = 300
+DEFAULT_MEMORY_BUDGET_MB = 3072
+CLOSED_TABS_LIMIT = 25
+DEFAULT_HISTORY_DAYS = 90
+DEFAULT_FULLTEXT_KB = 16
+DEFAULT_FULLTEXT_PAGES = 100000
+DEFAULT_MAX_PARALLEL_DOWNLOADS = 4
+DEFAULT_SPECULATION_DELAY_MS = 300
+DEFAULT_WARMUP_SITES = 10
+DEFAULT_SUGGEST_DELAY_MS = 150
+DEFAULT_MAX_CRASHES = 3
+DEFAULT_CRASH_WINDOW_SEC = 120
+DEFAULT_RENDERER_MEMORY_MB = 2048
+DEFAULT_RENDERER_CPU_PERCENT = 95
+DEFAULT_RENDERER_CPU_SEC = 30
+DEFAULT_PERF_PROFILE = "balanced"
+
+# профили Chromium: 0 / "" — оставить решение Chromium
+# process_model: "" — процесс на экземпляр сайта во вкладке (по умолчанию), process-per-site — один процесс
+# на сайт для всех вкладок, site-per-process — строгая изоляция (больше процессов, больше параллелизма)
+PERF_PROFILES = {
+    "low-memory": {"renderer_limit": 2, "process_model": "process-per-site", "js_heap_mb": 512,
+                   "cache_mb": 64, "verbosity": 0},
+    "balanced":   {"renderer_limit": 0, "process_model": "", "js_heap_mb": 0, "cache_mb": 0, "verbosity": 0},
+    "throughput": {"renderer_limit": 0, "process_model": "site-per-process", "js_heap_mb": 4096,
+                   "cache_mb": 1024, "verbosity": 0},
+}
+PROCESS_MODELS = ("", "process-per-site", "site-per-process")
+PROCESS_MODEL_FLAGS = {"--single-process", "--process-per-site", "--process-per-tab", "--site-per-process"}
+
+CFG_DEFAULTS = {
+    "search": {"engine": DEFAULT_ENGINE},
+    "logs": {"enabled": "true", "max_mb": str(DEFAULT_LOG_MB), "generations": str(DEFAULT_LOG_GENERATIONS)},
+    "ui": {"tooltips": "true"},
+    "tabs": {
+        "freeze_after_sec": str(DEFAULT_FREEZE_AFTER_SEC),
+        "memory_budget_mb": str(DEFAULT_MEMORY_BUDGET_MB),
+    },
+    "history": {"enabled": "true", "retention_days": str(DEFAULT_HISTORY_DAYS)},
+    "fulltext": {
+        "enabled": "true",
+        "max_kb": str(DEFAULT_FULLTEXT_KB),
+        "retention_days": str(DEFAULT_HISTORY_DAYS),
+        "max_pages": str(DEFAULT_FULLTEXT_PAGES),
+    },
+    "downloads": {"auto_save": "false", "max_parallel": str(DEFAULT_MAX_PARALLEL_DOWNLOADS)},
+    "blocking": {"enabled": "true"},
+    "speculation": {"mode": "prerender", "delay_ms": str(DEFAULT_SPECULATION_DELAY_MS)},
+    "cache": {
+        "type": "disk",
+        "max_mb": "0",
+        "cookies": "allow",
+        "warmup": "false",
+        "warmup_sites": str(DEFAULT_WARMUP_SITES),
+    },
+    "suggest": {"enabled": "true", "delay_ms": str(DEFAULT_SUGGEST_DELAY_MS), "url": ""},
+    # пустые значения — из профиля
+    "performance": {
+        "profile": DEFAULT_PERF_PROFILE,
+        "renderer_limit": "",
+        "process_model": "",
+        "js_heap_mb": "",
+        "cache_mb": "",
+        "chromium_verbosity": "",
+    },
+    "watchdog": {
+        "auto_reload": "true",
+        "max_crashes": str(DEFAULT_MAX_CRASHES),
+        "crash_window_sec": str(DEFAULT_CRASH_WINDOW_SEC),
+        "memory_mb": str(DEFAULT_RENDERER_MEMORY_MB),
+        "memory_action": "discard",
+        "cpu_percent": str(DEFAULT_RENDERER_CPU_PERCENT),
+        "cpu_sec": str(DEFAULT_RENDERER_CPU_SEC),
+    },
+}
 
 
 START_HTML_TEMPLATE = r"""<!doctype html>
@@ -154,6 +380,58 @@ START_HTML_TEMPLATE = r"""<!doctype html>
       margin-left: 4px;
     }
     .x:hover{ background: rgba(0,0,0,.12); }
+
+    .tiles{
+      margin-top: 22px;
+      display:flex; flex-wrap:wrap; gap:14px;
+      justify-content:center;
+    }
+    .tile{
+      width: 160px;
+      text-decoration:none;
+      color: rgba(0,0,0,.76);
+      font-size: 13px; font-weight: 700;
+    }
+    /* размер задан заранее: снимок подгружается позже и разметку не сдвигает */
+    .shot{
+      width: 160px; height: 100px;
+      border-radius: 12px;
+      overflow:hidden;
+      background: rgba(255,255,255,.38);
+      border: 1px solid rgba(0,0,0,.07);
+      box-shadow: 0 10px 30px rgba(0,0,0,.08);
+    }
+    .shot img{ width:160px; height:100px; object-fit:cover; display:block; }
+    .tile .name{
+      margin-top: 6px;
+      overflow:hidden; text-overflow: ellipsis; white-space: nowrap;
+    }
+    .more{ font-size: 13px; color: var(--muted); font-weight: 700; }
+
+    .bookmarks{ margin: 22px auto 0; max-width: 560px; text-align:left; }
+    .bookmarks select{
+      width: 100%;
+      padding: 8px 10px;
+      border-radius: 10px;
+      border: 1px solid rgba(0,0,0,.07);
+      background: rgba(255,255,255,.38);
+      font-size: 14px; font-weight: 700;
+      color: rgba(0,0,0,.76);
+    }
+    /* своя прокрутка: страницы дописываются снизу, строки вне экрана не раскладываются */
+    .bm-list{ margin-top: 8px; max-height: 50vh; overflow:auto; }
+    .bm-list a{
+      display:block;
+      content-visibility: auto;
+      contain-intrinsic-size: auto 30px;
+      padding: 6px 10px;
+      text-decoration:none;
+      color: rgba(0,0,0,.76);
+      font-size: 14px; font-weight: 600;
+      overflow:hidden; text-overflow: ellipsis; white-space: nowrap;
+    }
+    .bm-list a:hover{ background: rgba(255,255,255,.38); }
+    .bm-end{ height: 1px; }
   </style>
 </head>
 <body>
@@ -172,49 +450,42 @@ START_HTML_TEMPLATE = r"""<!doctype html>
     <div class="hint">Enter — поиск • Ctrl+L — фокус на адресной строке</div>
 
     <div class="links" id="links"></div>
+
+    <div class="tiles" id="tiles"></div>
+
+    <div class="bookmarks" id="bookmarks" hidden>
+      <select id="bmFolder"></select>
+      <div class="bm-list" id="bmList"><div class="bm-end" id="bmEnd"></div></div>
+    </div>
   </main>
 
+  <script>/*__QWEBCHANNEL__*/</script>
   <script>
     const linksEl = document.getElementById("links");
+    const tilesEl = document.getElementById("tiles");
     const form = document.getElementById("form");
     const input = document.getElementById("q");
+    const bmBox = document.getElementById("bookmarks");
+    const bmFolder = document.getElementById("bmFolder");
+    const bmList = document.getElementById("bmList");
+    const bmEnd = document.getElementById("bmEnd");
 
-    const DEFAULT_TEMPLATE = "https://www.google.com/search?q={q}";
-    const DEFAULT_LINKS = [
-      {"title":"YouTube","url":"https://www.youtube.com/"},
-      {"title":"VK","url":"https://vk.com/"},
-      {"title":"GitHub","url":"https://github.com/"}
-    ];
+    // настройки и быстрые ссылки вшиты в страницу при отдаче — первая отрисовка без ожидания моста
+    const state = /*__STATE__*/;
+    let bridge = null;
 
     function tooltipsEnabled(){
-      // "1" / "0"
-      const v = localStorage.getItem("ui_tooltips");
-      if (v === null || v === undefined) return true;
-      return v !== "0";
+      return state.settings.tooltips;
     }
 
     function getTemplate(){
-      return localStorage.getItem("search_template") || DEFAULT_TEMPLATE;
+      return state.settings.search_template;
     }
 
     function looksLikeUrl(s){
       return s.includes(".") && !s.includes(" ") && !s.startsWith("?");
     }
 
-    function loadLinks(){
-      try{
-        const raw = localStorage.getItem("quick_links");
-        if(!raw) return DEFAULT_LINKS.slice();
-        const arr = JSON.parse(raw);
-        if(Array.isArray(arr)) return arr;
-      }catch(e){}
-      return DEFAULT_LINKS.slice();
-    }
-
-    function saveLinks(arr){
-      localStorage.setItem("quick_links", JSON.stringify(arr));
-    }
-
     function shortHost(url){
       try{
         const u = new URL(url);
@@ -226,7 +497,7 @@ START_HTML_TEMPLATE = r"""<!doctype html>
 
     function renderLinks(){
       linksEl.innerHTML = "";
-      const links = loadLinks();
+      const links = state.links.items;
       const tips = tooltipsEnabled();
 
       // кнопка "+"
@@ -236,6 +507,7 @@ START_HTML_TEMPLATE = r"""<!doctype html>
       addBtn.textContent = "+ Добавить ссылку";
       addBtn.title = tips ? "Добавить новую быструю ссылку" : "";
       addBtn.onclick = () => {
+        if(!bridge) return;
         const title = (prompt("Название ссылки (например: YouTube):") || "").trim();
         if(!title) return;
 
@@ -244,10 +516,8 @@ START_HTML_TEMPLATE = r"""<!doctype html>
 
         if(!url.includes("://")) url = "https://" + url;
 
-        const arr = loadLinks();
-        arr.push({title, url});
-        saveLinks(arr);
-        renderLinks();
+        // хранилище на стороне браузера; обновлённый список придёт событием linksChanged
+        bridge.addLink(title, url);
       };
       linksEl.appendChild(addBtn);
 
@@ -256,7 +526,12 @@ START_HTML_TEMPLATE = r"""<!doctype html>
         const a = document.createElement("a");
         a.className = "chip";
         a.href = it.url || "#";
-        a.innerHTML = `<span>${it.title || "Link"}</span><span class="url">${shortHost(it.url || "")}</span>`;
+        const t = document.createElement("span");
+        t.textContent = it.title || "Link";
+        const u = document.createElement("span");
+        u.className = "url";
+        u.textContent = shortHost(it.url || "");
+        a.append(t, u);
         a.title = tips ? (it.url || "") : "";
 
         // кнопка удаления
@@ -268,26 +543,123 @@ START_HTML_TEMPLATE = r"""<!doctype html>
         x.onclick = (ev) => {
           ev.preventDefault();
           ev.stopPropagation();
-          if(!confirm(`Удалить ссылку "${it.title}"?`)) return;
-          const arr = loadLinks();
-          arr.splice(i, 1);
-          saveLinks(arr);
-          renderLinks();
+          if(!bridge || !confirm(`Удалить ссылку "${it.title}"?`)) return;
+          bridge.removeLink(it.id);
         };
 
         a.appendChild(x);
         linksEl.appendChild(a);
       }
+      if(state.links.total > links.length){
+        const more = document.createElement("span");
+        more.className = "more";
+        more.textContent = `и ещё ${state.links.total - links.length} — в списке закладок ниже`;
+        linksEl.appendChild(more);
+      }
 
       // подсказки на кнопке поиска
       const btnSearch = document.getElementById("btnSearch");
       if (btnSearch) btnSearch.title = tips ? "Выполнить поиск" : "";
     }
 
-    // сделаем доступным извне (для обновления из Python)
-    window.renderLinks = renderLinks;
+    function renderTiles(){
+      tilesEl.innerHTML = "";
+      for(const it of state.tiles){
+        const a = document.createElement("a");
+        a.className = "tile";
+        a.href = it.url;
+        a.title = tooltipsEnabled() ? it.url : "";
+        const shot = document.createElement("div");
+        shot.className = "shot";
+        if(it.thumb){
+          const img = document.createElement("img");
+          img.loading = "lazy";
+          img.decoding = "async";
+          img.width = 160;
+          img.height = 100;
+          img.alt = "";
+          img.onerror = () => img.remove();
+          img.src = `gdbrowse://thumb/${encodeURIComponent(it.host)}?v=${it.thumb}`;
+          shot.appendChild(img);
+        }
+        const name = document.createElement("div");
+        name.className = "name";
+        name.textContent = it.title || it.host;
+        a.append(shot, name);
+        tilesEl.appendChild(a);
+      }
+    }
+
+    // закладки папки приходят страницами по ключу (position, id), пока нижняя граница списка видна
+    const bm = { folder: 1, pos: 0, id: -1, more: false, busy: false };
+
+    function loadFolders(){
+      bridge.folders((raw) => {
+        const folders = JSON.parse(raw);
+        const keep = bm.folder;
+        bmFolder.innerHTML = "";
+        for(const f of folders){
+          const o = document.createElement("option");
+          o.value = f.id;
+          o.textContent = "\u00a0\u00a0".repeat(f.depth) + `${f.title} (${f.count})`;
+          bmFolder.appendChild(o);
+        }
+        bmBox.hidden = !folders.some((f) => f.count > 0);
+        bmFolder.value = folders.some((f) => f.id === keep) ? keep : 1;
+        resetBookmarks();
+      });
+    }
+
+    function resetBookmarks(){
+      bm.folder = Number(bmFolder.value) || 1;
+      bm.pos = 0; bm.id = -1; bm.more = true; bm.busy = false;
+      bmList.querySelectorAll("a").forEach((a) => a.remove());
+      bmList.scrollTop = 0;
+      loadPage();
+    }
+
+    function loadPage(){
+      if(!bridge || bm.busy || !bm.more) return;
+      bm.busy = true;
+      const folder = bm.folder;
+      bridge.bookmarkPage(folder, bm.pos, bm.id, (raw) => {
+        if(folder !== bm.folder) return;
+        const page = JSON.parse(raw);
+        const frag = document.createDocumentFragment();
+        for(const it of page.rows){
+          const a = document.createElement("a");
+          a.href = it.url;
+          a.textContent = it.title || it.url;
+          a.title = tooltipsEnabled() ? it.url : "";
+          frag.appendChild(a);
+          bm.pos = it.position; bm.id = it.id;
+        }
+        bmList.insertBefore(frag, bmEnd);
+        bm.more = page.more;
+        bm.busy = false;
+        // страница могла не заполнить список — observer сработает лишь при новом пересечении
+        if(bm.more && !bmBox.hidden &&
+           bmEnd.getBoundingClientRect().top <= bmList.getBoundingClientRect().bottom) loadPage();
+      });
+    }
+
+    new IntersectionObserver((entries) => {
+      if(entries.some((e) => e.isIntersecting)) loadPage();
+    }, { root: bmList, rootMargin: "200px" }).observe(bmEnd);
+    bmFolder.addEventListener("change", resetBookmarks);
 
     renderLinks();
+    renderTiles();
+
+    if (window.qt && window.QWebChannel) {
+      new QWebChannel(qt.webChannelTransport, (channel) => {
+        bridge = channel.objects.start;
+        bridge.settingsChanged.connect((raw) => { state.settings = JSON.parse(raw); renderLinks(); renderTiles(); });
+        bridge.linksChanged.connect((raw) => { state.links = JSON.parse(raw); renderLinks(); loadFolders(); });
+        bridge.tilesChanged.connect((raw) => { state.tiles = JSON.parse(raw); renderTiles(); });
+        loadFolders();
+      });
+    }
 
     form.addEventListener("submit", (e) => {
       e.preventDefault();
@@ -308,17 +680,13 @@ START_HTML_TEMPLATE = r"""<!doctype html>
 
 
 def ensure_app_files():
-    for p in (APP_DATA_DIR, USER_DATA_DIR, CACHE_DIR, DOWNLOADS_DIR, LOG_DIR):
+    for p in (APP_DATA_DIR, USER_DATA_DIR, CACHE_DIR, DOWNLOADS_DIR, LOG_DIR, FILTERS_DIR, THUMBS_DIR):
         p.mkdir(parents=True, exist_ok=True)
 
-    if not START_HTML_PATH.exists():
-        START_HTML_PATH.write_text(START_HTML_TEMPLATE, encoding="utf-8")
-
     if not SETTINGS_INI_PATH.exists():
         cfg = configparser.ConfigParser()
-        cfg["search"] = {"engine": DEFAULT_ENGINE}
-        cfg["logs"] = {"enabled": "true", "max_mb": str(DEFAULT_LOG_MB)}
-        cfg["ui"] = {"tooltips": "true"}
+        for section, values in CFG_DEFAULTS.items():
+            cfg[section] = dict(values)
         with SETTINGS_INI_PATH.open("w", encoding="utf-8") as f:
             cfg.write(f)
 
@@ -335,124 +703,2079 @@ def load_cfg() -> configparser.ConfigParser:
     cfg = configparser.ConfigParser()
     cfg.read(SETTINGS_INI_PATH, encoding="utf-8")
 
-    if "search" not in cfg:
-        cfg["search"] = {"engine": DEFAULT_ENGINE}
-    if "logs" not in cfg:
-        cfg["logs"] = {"enabled": "true", "max_mb": str(DEFAULT_LOG_MB)}
-    if "ui" not in cfg:
-        cfg["ui"] = {"tooltips": "true"}
-
-    if "engine" not in cfg["search"]:
-        cfg["search"]["engine"] = DEFAULT_ENGINE
-    if "enabled" not in cfg["logs"]:
-        cfg["logs"]["enabled"] = "true"
-    if "max_mb" not in cfg["logs"]:
-        cfg["logs"]["max_mb"] = str(DEFAULT_LOG_MB)
-    if "tooltips" not in cfg["ui"]:
-        cfg["ui"]["tooltips"] = "true"
+    for section, values in CFG_DEFAULTS.items():
+        if section not in cfg:
+            cfg[section] = {}
+        for key, value in values.items():
+            if key not in cfg[section]:
+                cfg[section][key] = value
 
     return cfg
 
 
+def resolve_perf_profile(cfg: configparser.ConfigParser):
+    # профиль из --perf-profile или [performance] profile, поверх — явные значения из [performance]
+    name = (cli_option("--perf-profile") or cfg.get("performance", "profile", fallback=DEFAULT_PERF_PROFILE))
+    name = name.strip().lower()
+    problems = []
+    if name not in PERF_PROFILES:
+        problems.append(f"unknown profile {name!r}, using {DEFAULT_PERF_PROFILE}")
+        name = DEFAULT_PERF_PROFILE
+    prof = dict(PERF_PROFILES[name])
+    for key, cfg_key, hi in (("renderer_limit", "renderer_limit", 64), ("js_heap_mb", "js_heap_mb", 65536),
+                             ("cache_mb", "cache_mb", 100000), ("verbosity", "chromium_verbosity", 3)):
+        raw = cfg.get("performance", cfg_key, fallback="").strip()
+        if raw:
+            prof[key] = clamp_int(raw, prof[key], 0, hi)
+    model = cfg.get("performance", "process_model", fallback="").strip().lower()
+    if model:
+        model = "" if model == "default" else model
+        if model in PROCESS_MODELS:
+            prof["process_model"] = model
+        else:
+            problems.append(f"unknown process_model {model!r}")
+    return name, prof, problems
+
+
+def compose_chromium_flags(prof: dict, log_file: Optional[Path], user_flags: str) -> str:
+    # флаги из окружения (QTWEBENGINE_CHROMIUM_FLAGS) важнее профиля: совпадающие ключи профиля отбрасываются
+    ours = []
+    if prof["renderer_limit"]:
+        ours.append(f"--renderer-process-limit={prof['renderer_limit']}")
+    if prof["process_model"]:
+        ours.append("--" + prof["process_model"])
+    if prof["js_heap_mb"]:
+        ours.append(f"--js-flags=--max-old-space-size={prof['js_heap_mb']}")
+    if log_file is not None:
+        ours += ["--enable-logging=stderr", f"--v={prof['verbosity']}", "--log-file=" + str(log_file)]
+    user = user_flags.split()
+    taken = {t.split("=", 1)[0] for t in user if t.startswith("--")}
+    if taken & PROCESS_MODEL_FLAGS:
+        taken |= PROCESS_MODEL_FLAGS
+    return " ".join(user + [f for f in ours if f.split("=", 1)[0] not in taken])
+
+
 def save_cfg(cfg: configparser.ConfigParser):
+    if EPHEMERAL:
+        return  # settings.ini в эфемерном режиме только читается
     with SETTINGS_INI_PATH.open("w", encoding="utf-8") as f:
         cfg.write(f)
 
 
 
-class TruncatingFileLogger:
-    def __init__(self, enabled: bool, max_bytes: int, log_path: Path):
-        self.enabled = enabled
+def rotate_gzip(path: Path, generations: int, copy_truncate: bool = False):
+    # path -> path.1.gz, path.1.gz -> path.2.gz, ...; старше generations удаляются.
+    # copy_truncate: файл держит открытым чужой процесс (chromium), поэтому копируем и обнуляем
+    import gzip
+    import shutil
+
+    if generations <= 0:
+        with path.open("r+b") as f:
+            f.truncate(0)
+        return
+
+    oldest = path.with_name(f"{path.name}.{generations}.gz")
+    if oldest.exists():
+        oldest.unlink()
+    for i in range(generations - 1, 0, -1):
+        src = path.with_name(f"{path.name}.{i}.gz")
+        if src.exists():
+            os.replace(src, path.with_name(f"{path.name}.{i + 1}.gz"))
+
+    dst = path.with_name(f"{path.name}.1.gz")
+    if copy_truncate:
+        with path.open("r+b") as f, gzip.open(dst, "wb") as gz:
+            shutil.copyfileobj(f, gz, 1024 * 1024)
+            f.truncate(0)
+    else:
+        with path.open("rb") as f, gzip.open(dst, "wb") as gz:
+            shutil.copyfileobj(f, gz, 1024 * 1024)
+        path.unlink()
+
+
+class GzipRotatingFileHandler(logging.Handler):
+    # размер файла считаем в памяти: на каждую запись ни одного stat()
+    def __init__(self, path: Path, max_bytes: int, generations: int):
+        super().__init__()
+        self.path = path
         self.max_bytes = max_bytes
+        self.generations = generations
+        self._stream = None
+        self._size = 0
+
+    def _open(self):
+        self._stream = self.path.open("ab")
+        self._size = self._stream.tell()
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + "\n").encode("utf-8")
+            if self._stream is None:
+                self._open()
+            if self._size and self._size + len(data) > self.max_bytes:
+                self._stream.close()
+                self._stream = None
+                rotate_gzip(self.path, self.generations)
+                self._open()
+            self._stream.write(data)
+            self._stream.flush()
+            self._size += len(data)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        super().close()
+
+
+class RotatingQueueLogger:
+    # GUI-нить только кладёт запись в очередь; запись, ротация и gzip — в нити QueueListener
+    CHROMIUM_CHECK_SEC = 30
+
+    def __init__(self, enabled: bool, max_bytes: int, log_path: Path,
+                 generations: int = 5, chromium_log: Optional[Path] = None):
+        self.enabled = enabled
         self.log_path = log_path
+        self.generations = generations
+        self.chromium_log = chromium_log
         self._logger = None
+        self._listener = None
+        self._file = None
+        self._stop = threading.Event()
+        self._max_bytes = max_bytes
 
         if not enabled:
             return
 
-        import logging
+        self._file = GzipRotatingFileHandler(log_path, max_bytes, generations)
+        self._file.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+
+        q = queue.SimpleQueue()
         self._logger = logging.getLogger("gdbrowser")
         self._logger.setLevel(logging.DEBUG)
         self._logger.handlers.clear()
+        self._logger.propagate = False
+        self._logger.addHandler(logging.handlers.QueueHandler(q))
 
-        handler = logging.FileHandler(str(log_path), encoding="utf-8")
-        fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-        handler.setFormatter(fmt)
-        self._logger.addHandler(handler)
+        self._listener = logging.handlers.QueueListener(q, self._file)
+        self._listener.start()
 
-    def _truncate_if_needed(self):
-        if not self.enabled:
-            return
-        try:
-            if self.log_path.exists() and self.log_path.stat().st_size > self.max_bytes:
-                self.log_path.write_text("", encoding="utf-8")
-        except Exception:
-            pass
+        if chromium_log is not None:
+            threading.Thread(target=self._watch_chromium, name="chromium-log-rotate", daemon=True).start()
+
+    def set_max_bytes(self, max_bytes: int):
+        # применяется сразу, без перезапуска
+        self._max_bytes = max_bytes
+        if self._file is not None:
+            self._file.max_bytes = max_bytes
+
+    def _watch_chromium(self):
+        while True:
+            try:
+                if self.chromium_log.exists() and self.chromium_log.stat().st_size > self._max_bytes:
+                    rotate_gzip(self.chromium_log, self.generations, copy_truncate=True)
+            except Exception:
+                pass
+            if self._stop.wait(self.CHROMIUM_CHECK_SEC):
+                return
 
     def info(self, msg: str):
-        if not self.enabled:
-            return
-        self._truncate_if_needed()
-        self._logger.info(msg)
+        if self.enabled:
+            self._logger.info(msg)
 
     def warning(self, msg: str):
-        if not self.enabled:
-            return
-        self._truncate_if_needed()
-        self._logger.warning(msg)
+        if self.enabled:
+            self._logger.warning(msg)
 
     def error(self, msg: str):
-        if not self.enabled:
-            return
-        self._truncate_if_needed()
-        self._logger.error(msg)
+        if self.enabled:
+            self._logger.error(msg)
 
+    def close(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._file is not None:
+            self._file.close()
 
-def truncate_if_big(path: Path, max_bytes: int):
+
+class MemoryRingLogger:
+    # --ephemeral: последние CAPACITY строк в памяти; на диск — только по явному dump()
+    CAPACITY = 20000
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.enabled = True
+        self._lines = deque(maxlen=capacity)
+
+    def _add(self, level: str, msg: str):
+        self._lines.append(f"{time.strftime('%Y-%m-%d %H:%M:%S')} | {level} | {msg}")
+
+    def info(self, msg: str):
+        self._add("INFO", msg)
+
+    def warning(self, msg: str):
+        self._add("WARNING", msg)
+
+    def error(self, msg: str):
+        self._add("ERROR", msg)
+
+    def set_max_bytes(self, max_bytes: int):
+        pass
+
+    def dump(self, out):
+        # out — путь или поток (sys.stderr)
+        text = "\n".join(list(self._lines)) + "\n"
+        if hasattr(out, "write"):
+            out.write(text)
+            out.flush()
+        else:
+            Path(out).write_text(text, encoding="utf-8")
+
+    def close(self):
+        pass
+
+
+class MappedLogFile:
+    # лог через mmap + массив смещений начал строк; индекс строится кусками (index_more) в фоновой нити
+    CHUNK = 16 * 1024 * 1024
+
+    TS_PATTERNS = (
+        re.compile(rb"^\d{4}-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)"),  # gdbrowser.log
+        re.compile(rb"^\[\d+:\d+:(\d\d)(\d\d)/(\d\d)(\d\d)(\d\d)"),  # chromium.log
+    )
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._f = None
+        self._mm = None
+        self.size = 0
+        self.offsets = array.array("Q", [0])
+        self._scan_pos = 0
+        self.remap()
+
+    def remap(self) -> bool:
+        # -> True если файл укоротился (ротация) и индекс сброшен
+        with self._lock:
+            try:
+                size = self.path.stat().st_size
+            except OSError:
+                size = 0
+            reset = size < self.size
+            if size == self.size and self._mm is not None:
+                return False
+            if self._mm is not None:
+                self._mm.close()
+                self._f.close()
+                self._mm = self._f = None
+            if reset:
+                self.offsets = array.array("Q", [0])
+                self._scan_pos = 0
+            self.size = size
+            if size:
+                self._f = self.path.open("rb")
+                self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            return reset
+
+    def index_more(self) -> bool:
+        with self._lock:
+            mm, size, pos = self._mm, self.size, self._scan_pos
+            if mm is None or pos >= size:
+                return False
+            end = min(size, pos + self.CHUNK)
+            chunk = mm[pos:end]
+        nl = chunk.rfind(b"\n")
+        if nl >= 0:
+            parts = chunk[:nl].split(b"\n")
+            # начало следующей строки = pos + сумма длин + число переводов строк
+            self.offsets.extend(map(add, accumulate(map(len, parts)), count(pos + 1)))
+        self._scan_pos = pos + nl + 1 if nl >= 0 else end
+        return True
+
+    def line_count(self) -> int:
+        n = len(self.offsets) - 1
+        return n + 1 if self.size > self.offsets[-1] and self._scan_pos >= self.size else n
+
+    def line_bytes(self, i: int) -> bytes:
+        with self._lock:
+            if self._mm is None:
+                return b""
+            start = self.offsets[i]
+            end = self.offsets[i + 1] - 1 if i + 1 < len(self.offsets) else self.size
+            return self._mm[start:end].rstrip(b"\r")
+
+    def line(self, i: int) -> str:
+        return self.line_bytes(i).decode("utf-8", "replace")
+
+    def line_ts(self, i: int) -> Optional[str]:
+        # "MMDDHHMMSS" или None; год не сравниваем — в chromium.log его нет
+        b = self.line_bytes(i)
+        for rx in self.TS_PATTERNS:
+            m = rx.match(b)
+            if m:
+                return b"".join(m.groups()).decode()
+        return None
+
+    def find_lines(self, rx, line_from: int = 0, line_to: Optional[int] = None, stop=None):
+        # номера строк с совпадением: finditer по кускам, позиция -> строка через bisect
+        found = array.array("Q")
+        total = self.line_count() if line_to is None else line_to
+        last = -1
+        for start_line in range(line_from, total, 200000):
+            if stop is not None and stop.is_set():
+                break
+            end_line = min(total, start_line + 200000)
+            with self._lock:
+                if self._mm is None:
+                    break
+                lo = self.offsets[start_line]
+                hi = self.offsets[end_line] if end_line < len(self.offsets) else self.size
+                chunk = self._mm[lo:hi]
+            for m in rx.finditer(chunk):
+                ln = bisect.bisect_right(self.offsets, lo + m.start(), start_line, end_line) - 1
+                if ln != last:
+                    found.append(ln)
+                    last = ln
+        return found
+
+    def time_bounds(self, t_from: str, t_to: str):
+        # строки идут по времени: бинарный поиск по первой строке с меткой не раньше/не позже
+        n = self.line_count()
+
+        def ts_at(i):
+            for j in range(i, min(n, i + 50)):
+                ts = self.line_ts(j)
+                if ts is not None:
+                    return ts
+            return None
+
+        def first_at_least(t):
+            lo, hi = 0, n
+            while lo < hi:
+                mid = (lo + hi) // 2
+                ts = ts_at(mid)
+                if ts is not None and ts < t:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        lo = first_at_least(t_from) if t_from else 0
+        hi = first_at_least(t_to + "~") if t_to else n
+        return lo, hi
+
+    def close(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.close()
+                self._f.close()
+                self._mm = self._f = None
+
+
+# файлы simple cache Chromium: заголовок <QIIi + ключ (URL, иногда с префиксом "_dk_<сайт> <сайт> ")
+SIMPLE_CACHE_MAGIC = 0xfcfb6d1ba7725c30
+SIMPLE_CACHE_HEADER = struct.Struct("<QIII4x")
+# свои файлы в CACHE_DIR, которые к HTTP-кэшу не относятся
+OWN_CACHE_ENTRIES = {"filters.bin", "favicons.db", "favicons.db-wal", "favicons.db-shm", "thumbs"}
+
+
+def cache_entry_host(path: Path) -> str:
+    try:
+        with path.open("rb") as f:
+            head = f.read(SIMPLE_CACHE_HEADER.size)
+            if len(head) < SIMPLE_CACHE_HEADER.size:
+                return ""
+            magic, _version, key_len, _key_hash = SIMPLE_CACHE_HEADER.unpack(head)
+            if magic != SIMPLE_CACHE_MAGIC or not 0 < key_len < 65536:
+                return ""
+            key = f.read(key_len).decode("utf-8", "replace")
+    except OSError:
+        return ""
+    return url_host(key.rsplit(" ", 1)[-1])
+
+
+def scan_http_cache(root: Path):
+    # host -> [байт, записей, [файлы]]; нераспознанное (индексы, blockfile-кэш) — под ключом ""
+    stats = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        if Path(dirpath) == root:
+            dirnames[:] = [d for d in dirnames if d not in OWN_CACHE_ENTRIES]
+        for name in filenames:
+            if Path(dirpath) == root and name in OWN_CACHE_ENTRIES:
+                continue
+            path = Path(dirpath) / name
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            host = cache_entry_host(path) if name.endswith("_0") else ""
+            rec = stats.setdefault(host, [0, 0, []])
+            rec[0] += size
+            rec[1] += 1
+            if host:
+                rec[2].append(path)
+    return stats
+
+
+def process_rss_bytes(pid: int) -> int:
+    # резидентная память процесса (рендерера) в байтах, 0 если узнать не удалось
+    if not pid or pid <= 0:
+        return 0
+    try:
+        if sys.platform.startswith("win"):
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            kernel32 = ctypes.windll.kernel32
+            h = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not h:
+                return 0
+            try:
+                pmc = PROCESS_MEMORY_COUNTERS()
+                pmc.cb = ctypes.sizeof(pmc)
+                if not kernel32.K32GetProcessMemoryInfo(h, ctypes.byref(pmc), pmc.cb):
+                    return 0
+                return int(pmc.WorkingSetSize)
+            finally:
+                kernel32.CloseHandle(h)
+
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+def process_cpu_seconds(pid: int) -> float:
+    # суммарное время CPU процесса (user + system), -1 если узнать не удалось
+    if not pid or pid <= 0:
+        return -1.0
     try:
-        if path.exists() and path.stat().st_size > max_bytes:
-            path.write_text("", encoding="utf-8")
+        if sys.platform.startswith("win"):
+            import ctypes
+            from ctypes import wintypes
+
+            kernel32 = ctypes.windll.kernel32
+            h = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not h:
+                return -1.0
+            try:
+                created, exited, kern, user = (wintypes.FILETIME() for _ in range(4))
+                if not kernel32.GetProcessTimes(h, ctypes.byref(created), ctypes.byref(exited),
+                                                ctypes.byref(kern), ctypes.byref(user)):
+                    return -1.0
+                ticks = sum((t.dwHighDateTime << 32) | t.dwLowDateTime for t in (kern, user))
+                return ticks / 1e7  # FILETIME — сотни наносекунд
+            finally:
+                kernel32.CloseHandle(h)
+
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # имя процесса в скобках может содержать пробелы — поля считаем после ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return -1.0
+
+
+def kill_process(pid: int) -> bool:
+    if not pid or pid <= 0:
+        return False
+    try:
+        if sys.platform.startswith("win"):
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32
+            h = kernel32.OpenProcess(0x0001, False, pid)  # PROCESS_TERMINATE
+            if not h:
+                return False
+            try:
+                return bool(kernel32.TerminateProcess(h, 1))
+            finally:
+                kernel32.CloseHandle(h)
+        os.kill(pid, signal.SIGKILL)
+        return True
     except Exception:
+        return False
+
+
+class ProcessSampler:
+    # фоновая нить: раз в interval снимает rss и CPU% у заданных pid; на GUI-нить — только готовый словарь
+    def __init__(self, interval: float, on_sample):
+        self.interval = interval
+        self.on_sample = on_sample
+        self.cost_sec = 0.0  # CPU, потраченный самим опросом, за последний цикл
+        self._pids = frozenset()
+        self._prev = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="process-sampler", daemon=True)
+        self._thread.start()
+
+    def set_pids(self, pids):
+        self._pids = frozenset(p for p in pids if p)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            t0 = time.thread_time()
+            now = time.monotonic()
+            out = {}
+            prev = self._prev
+            cur = {}
+            for pid in self._pids:
+                cpu = process_cpu_seconds(pid)
+                pct = 0.0
+                if cpu >= 0:
+                    cur[pid] = (cpu, now)
+                    last = prev.get(pid)
+                    if last is not None and now > last[1]:
+                        pct = max(0.0, (cpu - last[0]) / (now - last[1]) * 100)
+                out[pid] = (process_rss_bytes(pid), pct)
+            self._prev = cur
+            self.cost_sec = time.thread_time() - t0
+            self.on_sample(out)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+
+
+class SessionJournal:
+    # append-only журнал вкладок (JSON-строки); периодически сжимается в снимок
+    COMPACT_AFTER = 500
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._f = None
+        self._records = 0
+
+    def replay(self):
+        # -> (список {"url", "title"} в порядке вкладок, индекс активной)
+        tabs = {}
+        order = []
+        active = None
+        if self.path is None:
+            return [], 0
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        r = json.loads(line)
+                    except Exception:
+                        continue  # недописанная строка после падения
+                    op = r.get("op")
+                    tid = r.get("id")
+                    if op == "open":
+                        tabs[tid] = {"url": r.get("url", ""), "title": r.get("title", "")}
+                        pos = r.get("pos", len(order))
+                        order.insert(max(0, min(pos, len(order))), tid)
+                    elif op == "url" and tid in tabs:
+                        tabs[tid]["url"] = r.get("url", "")
+                    elif op == "title" and tid in tabs:
+                        tabs[tid]["title"] = r.get("title", "")
+                    elif op == "close" and tid in tabs:
+                        del tabs[tid]
+                        order.remove(tid)
+                    elif op == "order":
+                        order = [i for i in r.get("ids", []) if i in tabs]
+                    elif op == "active":
+                        active = tid
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOGGER.warning(f"session replay failed: {e}")
+
+        result = [tabs[i] for i in order if tabs[i].get("url")]
+        active_index = 0
+        live = [i for i in order if tabs[i].get("url")]
+        if active in live:
+            active_index = live.index(active)
+        return result, active_index
+
+    def _append(self, record: dict):
+        if self.path is None:
+            return
+        try:
+            if self._f is None:
+                self._f = self.path.open("a", encoding="utf-8")
+            self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._records += 1
+        except Exception as e:
+            LOGGER.warning(f"session journal write failed: {e}")
+
+    def flush(self):
+        if self._f is not None:
+            try:
+                self._f.flush()
+            except Exception:
+                pass
+
+    def needs_compaction(self) -> bool:
+        return self._records >= self.COMPACT_AFTER
+
+    def compact(self, tabs, active_id):
+        # tabs: [(id, url, title)] в порядке вкладок
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+            with tmp.open("w", encoding="utf-8") as f:
+                for pos, (tid, url, title) in enumerate(tabs):
+                    f.write(json.dumps({"op": "open", "id": tid, "url": url, "title": title, "pos": pos},
+                                       ensure_ascii=False) + "\n")
+                if active_id is not None:
+                    f.write(json.dumps({"op": "active", "id": active_id}) + "\n")
+            os.replace(tmp, self.path)
+            self._records = 0
+        except Exception as e:
+            LOGGER.warning(f"session compaction failed: {e}")
+
+    def record_open(self, tid: int, url: str, title: str, pos: int):
+        self._append({"op": "open", "id": tid, "url": url, "title": title, "pos": pos})
+
+    def record_url(self, tid: int, url: str):
+        self._append({"op": "url", "id": tid, "url": url})
+
+    def record_title(self, tid: int, title: str):
+        self._append({"op": "title", "id": tid, "title": title})
+
+    def record_close(self, tid: int):
+        self._append({"op": "close", "id": tid})
+
+    def record_order(self, ids):
+        self._append({"op": "order", "ids": list(ids)})
+
+    def record_active(self, tid: int):
+        self._append({"op": "active", "id": tid})
+
+    def close(self):
+        if self._f is not None:
+            try:
+                self._f.close()
+            except Exception:
+                pass
+            self._f = None
+
+
+
+class SqliteWorker:
+    # одна фоновая нить на базу: записи копятся в очереди и коммитятся пачками в одной транзакции
+    BATCH_MAX = 1000
+    BATCH_WAIT = 0.25
+    SCHEMA = ""
+
+    def __init__(self, path: Path, name: str):
+        self.path = path
+        self._q = queue.Queue()
+        self._read_conn = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        # fn(conn, *args) выполнится в фоновой нити внутри транзакции
+        self._q.put((fn, args))
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        try:
+            conn = self._connect()
+            conn.executescript(self.SCHEMA)
+        except Exception as e:
+            LOGGER.error(f"{self.path.name}: open failed: {e}")
+            return
+
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.BATCH_WAIT
+            stop = False
+            while len(batch) < self.BATCH_MAX:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    nxt = self._q.get(timeout=left)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            self._apply(conn, batch)
+            self.after_batch(conn)
+            if stop:
+                break
+
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _apply(self, conn, batch):
+        # каждая операция под своим SAVEPOINT: ошибка откатывает только её, а не всю пачку
+        try:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            for fn, args in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    fn(conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    LOGGER.error(f"{self.path.name}: {getattr(fn, '__name__', fn)} failed: {e}")
+                conn.execute("RELEASE op")
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            LOGGER.error(f"{self.path.name}: batch of {len(batch)} failed: {e}")
+
+    def after_batch(self, conn):
         pass
 
+    def read(self, sql: str, params=()):
+        # чтение с GUI-нити через отдельное соединение (WAL не блокирует писателя)
+        try:
+            if self._read_conn is None:
+                self._read_conn = sqlite3.connect(str(self.path), timeout=1, check_same_thread=False)
+            return self._read_conn.execute(sql, params).fetchall()
+        except Exception as e:
+            LOGGER.warning(f"{self.path.name}: read failed: {e}")
+            return []
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join(timeout=5)
+        if self._read_conn is not None:
+            self._read_conn.close()
+            self._read_conn = None
+
+
+def is_web_url(url: str) -> bool:
+    return url.startswith("http://") or url.startswith("https://")
+
+
+def url_host(url: str) -> str:
+    try:
+        host = (urlsplit(url).hostname or "").lower()
+    except Exception:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class HistoryStore(SqliteWorker):
+    # frecency хранится как log2(score) + t/HALF_LIFE: порядок по колонке = порядок по текущему
+    # затухающему счёту, поэтому сортировка идёт по индексу
+    HALF_LIFE = 30 * 86400
+    RETENTION_EVERY = 3600
+    VACUUM_PAGES = 500
+
+    SCHEMA = """
+    PRAGMA auto_vacuum=INCREMENTAL;
+    CREATE TABLE IF NOT EXISTS urls(
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        host TEXT NOT NULL,
+        title TEXT NOT NULL DEFAULT '',
+        visit_count INTEGER NOT NULL DEFAULT 0,
+        last_visit REAL NOT NULL DEFAULT 0,
+        frecency REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS urls_host ON urls(host, last_visit);
+    CREATE INDEX IF NOT EXISTS urls_frecency ON urls(frecency);
+    CREATE TABLE IF NOT EXISTS visits(
+        id INTEGER PRIMARY KEY,
+        url_id INTEGER NOT NULL,
+        ts REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS visits_ts ON visits(ts);
+    CREATE INDEX IF NOT EXISTS visits_url ON visits(url_id);
+    """
+
+    def __init__(self, path: Path, retention_days: int):
+        self.retention_days = retention_days
+        self._last_retention = 0.0
+        super().__init__(path, "history-writer")
+
+    @classmethod
+    def frecency_key(cls, old_key: float, now: float) -> float:
+        score = 2.0 ** (old_key - now / cls.HALF_LIFE) if old_key else 0.0
+        return math.log2(score + 1.0) + now / cls.HALF_LIFE
+
+    def record_visit(self, url: str, title: str = ""):
+        self.submit(HistoryStore._insert_visit, url, url_host(url), title, time.time())
+
+    def set_title(self, url: str, title: str):
+        self.submit(HistoryStore._update_title, url, title)
+
+    @staticmethod
+    def _insert_visit(conn, url, host, title, ts):
+        row = conn.execute("SELECT id, frecency FROM urls WHERE url=?", (url,)).fetchone()
+        if row is None:
+            cur = conn.execute(
+                "INSERT INTO urls(url, host, title, visit_count, last_visit, frecency) VALUES(?,?,?,1,?,?)",
+                (url, host, title, ts, HistoryStore.frecency_key(0.0, ts)),
+            )
+            url_id = cur.lastrowid
+        else:
+            url_id = row[0]
+            conn.execute(
+                "UPDATE urls SET visit_count=visit_count+1, last_visit=?, frecency=?"
+                + (", title=?" if title else "") + " WHERE id=?",
+                (ts, HistoryStore.frecency_key(row[1], ts)) + ((title,) if title else ()) + (url_id,),
+            )
+        conn.execute("INSERT INTO visits(url_id, ts) VALUES(?,?)", (url_id, ts))
+
+    @staticmethod
+    def _update_title(conn, url, title):
+        conn.execute("UPDATE urls SET title=? WHERE url=?", (title, url))
+
+    def after_batch(self, conn):
+        now = time.time()
+        if now - self._last_retention < self.RETENTION_EVERY:
+            return
+        self._last_retention = now
+        if self.retention_days <= 0:
+            return
+        cutoff = now - self.retention_days * 86400
+        try:
+            with conn:
+                conn.execute("DELETE FROM visits WHERE ts < ?", (cutoff,))
+                conn.execute("DELETE FROM urls WHERE last_visit < ?", (cutoff,))
+            conn.execute(f"PRAGMA incremental_vacuum({self.VACUUM_PAGES})")
+        except Exception as e:
+            LOGGER.warning(f"history retention failed: {e}")
+
+    # --- запросы ---
+
+    def by_host(self, host: str, limit: int = 100):
+        return self.read(
+            "SELECT url, title, visit_count, last_visit FROM urls WHERE host=? ORDER BY last_visit DESC LIMIT ?",
+            (host.lower(), limit),
+        )
+
+    def in_range(self, t0: float, t1: float, limit: int = 500):
+        return self.read(
+            "SELECT u.url, u.title, v.ts FROM visits v JOIN urls u ON u.id=v.url_id "
+            "WHERE v.ts BETWEEN ? AND ? ORDER BY v.ts DESC LIMIT ?",
+            (t0, t1, limit),
+        )
+
+    def top_frecency(self, limit: int = 20):
+        return self.read(
+            "SELECT url, title, visit_count, last_visit, frecency FROM urls ORDER BY frecency DESC LIMIT ?",
+            (limit,),
+        )
+
+
+def fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+class PageTextIndex(SqliteWorker):
+    # полнотекстовый индекс посещённых страниц (FTS5): текст хранится один раз на хэш содержимого,
+    # страницы (url) ссылаются на него; нормализация и запись — в фоновой нити
+    EXTRACT_DELAY_MS = 1500
+    REINDEX_AFTER_SEC = 600
+    RECENT_MAX = 1000
+    CANDIDATES = 500
+    RETENTION_EVERY = 3600
+    VACUUM_PAGES = 2000
+
+    SCHEMA = """
+    PRAGMA auto_vacuum=INCREMENTAL;
+    CREATE TABLE IF NOT EXISTS texts(
+        id INTEGER PRIMARY KEY,
+        hash BLOB NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS pages(
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        title TEXT NOT NULL DEFAULT '',
+        text_id INTEGER NOT NULL,
+        ts REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS pages_text ON pages(text_id);
+    CREATE INDEX IF NOT EXISTS pages_ts ON pages(ts);
+    CREATE VIRTUAL TABLE IF NOT EXISTS texts_fts USING fts5(
+        title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+    """
+
+    def __init__(self, path: Path, max_chars: int, retention_days: int, max_pages: int):
+        self.max_chars = max_chars
+        self.retention_days = retention_days
+        self.max_pages = max_pages
+        self._last_retention = 0.0
+        self._recent = OrderedDict()  # url -> monotonic последнего снятия текста (GUI-нить)
+        self.indexed = 0
+        self.deduped = 0
+        self.search_ms = deque(maxlen=200)
+        super().__init__(path, "fulltext-writer")
+
+    def due(self, url: str) -> bool:
+        # одну и ту же страницу не перечитываем чаще REINDEX_AFTER_SEC (перезагрузки, возвраты назад)
+        now = time.monotonic()
+        last = self._recent.get(url)
+        if last is not None and now - last < self.REINDEX_AFTER_SEC:
+            return False
+        self._recent[url] = now
+        self._recent.move_to_end(url)
+        while len(self._recent) > self.RECENT_MAX:
+            self._recent.popitem(last=False)
+        return True
+
+    def add(self, url: str, title: str, text: str):
+        self.submit(self._add, url, title, text, time.time())
+
+    def _add(self, conn, url, title, text, ts):
+        # обрезка до split: страница в мегабайты не должна держать нить (и GIL) надолго
+        body = " ".join(text[:self.max_chars * 4].split())[:self.max_chars]
+        if not body:
+            return
+        digest = hashlib.blake2b(body.encode("utf-8"), digest_size=16).digest()
+        row = conn.execute("SELECT id FROM texts WHERE hash=?", (digest,)).fetchone()
+        if row is None:
+            text_id = conn.execute("INSERT INTO texts(hash) VALUES(?)", (digest,)).lastrowid
+            conn.execute("INSERT INTO texts_fts(rowid, title, body) VALUES(?,?,?)", (text_id, title, body))
+            self.indexed += 1
+        else:
+            text_id = row[0]
+            self.deduped += 1
+        old = conn.execute("SELECT text_id FROM pages WHERE url=?", (url,)).fetchone()
+        conn.execute(
+            "INSERT INTO pages(url, title, text_id, ts) VALUES(?,?,?,?) "
+            "ON CONFLICT(url) DO UPDATE SET title=excluded.title, text_id=excluded.text_id, ts=excluded.ts",
+            (url, title, text_id, ts),
+        )
+        if old is not None and old[0] != text_id \
+                and conn.execute("SELECT 1 FROM pages WHERE text_id=? LIMIT 1", (old[0],)).fetchone() is None:
+            conn.execute("DELETE FROM texts WHERE id=?", (old[0],))
+            conn.execute("DELETE FROM texts_fts WHERE rowid=?", (old[0],))
+
+    def after_batch(self, conn):
+        now = time.time()
+        if now - self._last_retention < self.RETENTION_EVERY:
+            return
+        self._last_retention = now
+        try:
+            with conn:
+                if self.retention_days > 0:
+                    conn.execute("DELETE FROM pages WHERE ts < ?", (now - self.retention_days * 86400,))
+                if self.max_pages > 0:
+                    conn.execute("DELETE FROM pages WHERE id IN "
+                                 "(SELECT id FROM pages ORDER BY ts DESC LIMIT -1 OFFSET ?)", (self.max_pages,))
+                conn.execute("DELETE FROM texts_fts WHERE rowid IN "
+                             "(SELECT id FROM texts WHERE id NOT IN (SELECT text_id FROM pages))")
+                conn.execute("DELETE FROM texts WHERE id NOT IN (SELECT text_id FROM pages)")
+            conn.execute(f"PRAGMA incremental_vacuum({self.VACUUM_PAGES})")
+        except Exception as e:
+            LOGGER.warning(f"fulltext retention failed: {e}")
+
+    @staticmethod
+    def match_expr(text: str) -> str:
+        # слова в кавычках (операторы FTS5 из ввода не проходят), последнее недописанное — префиксом
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return ""
+        parts = [f'"{w}"' for w in words]
+        if not text[-1].isspace() and len(words[-1]) >= 2:
+            parts[-1] += "*"
+        return " ".join(parts)
+
+    def search(self, text: str, limit: int = 20):
+        # -> [(url, title, snippet, ts)]; bm25 считается только по CANDIDATES самым свежим совпавшим текстам:
+        # частое слово есть на каждой странице, и ранжирование всех 100k заняло бы сотни миллисекунд
+        expr = self.match_expr(text)
+        if not expr:
+            return []
+        t0 = time.perf_counter()
+        low, high, n = self.read(
+            "SELECT min(rowid), max(rowid), count(*) FROM "
+            "(SELECT rowid FROM texts_fts WHERE texts_fts MATCH ? ORDER BY rowid DESC LIMIT ?)",
+            (expr, self.CANDIDATES),
+        )[0]
+        out = []
+        if low is not None:
+            # совпала больше чем половина свежих текстов: у FTS5 idf такого слова почти ноль, bm25 не различает
+            # страницы, а считает его долго (обходит весь список документов) — тогда просто новые сверху
+            order = "rowid DESC" if n / (high - low + 1) > 0.5 else "bm25(texts_fts, 10.0, 1.0)"
+            hits = self.read(
+                "SELECT rowid, snippet(texts_fts, 1, '«', '»', '…', 12) FROM texts_fts "
+                f"WHERE texts_fts MATCH ? AND rowid >= ? ORDER BY {order} LIMIT ?",
+                (expr, low, limit),
+            )
+            for text_id, snippet in hits:
+                page = self.read("SELECT url, title, ts FROM pages WHERE text_id=? ORDER BY ts DESC LIMIT 1",
+                                 (text_id,))
+                if page:
+                    out.append((page[0][0], page[0][1], snippet, page[0][2]))
+        self.search_ms.append((time.perf_counter() - t0) * 1000)
+        return out
+
+    def stats_text(self) -> str:
+        ms = sorted(self.search_ms)
+        tail = f", search p50={ms[len(ms) // 2]:.1f} ms max={ms[-1]:.1f} ms" if ms else ""
+        return f"fulltext: {self.indexed} texts indexed, {self.deduped} duplicates skipped{tail}"
+
+    def close(self):
+        super().close()
+        LOGGER.info(self.stats_text())
+
 
+# папки, которые есть всегда: быстрые ссылки стартовой страницы и общая папка (Ctrl+D)
+QUICK_FOLDER = 1
+OTHER_FOLDER = 2
 
-ensure_app_files()
-CFG = load_cfg()
 
+class BookmarkSink:
+    # приёмник импорта: папки и закладки сразу пишутся в базу, в памяти — только счётчики позиций по папкам
+    SKIP_SCHEMES = ("place:", "javascript:", "data:")
+
+    def __init__(self, conn, root: int, ts: float):
+        self.conn = conn
+        self.root = root
+        self.ts = ts
+        self.count = 0
+        self._pos = {}
+
+    def _position(self, key) -> int:
+        self._pos[key] = self._pos.get(key, 0) + 1
+        return self._pos[key]
+
+    def folder(self, parent: int, title: str) -> int:
+        return self.conn.execute("INSERT INTO folders(parent, title, position) VALUES(?,?,?)",
+                                 (parent, title, self._position(("f", parent)))).lastrowid
+
+    def rename(self, folder: int, title: str):
+        self.conn.execute("UPDATE folders SET title=? WHERE id=?", (title, folder))
+
+    def bookmark(self, folder: int, title: str, url: str, tags=(), added: Optional[float] = None):
+        if not url or url.startswith(self.SKIP_SCHEMES):
+            return
+        bm_id = self.conn.execute(
+            "INSERT INTO bookmarks(folder, position, title, url, added) VALUES(?,?,?,?,?)",
+            (folder, self._position(("b", folder)), title, url, added or self.ts),
+        ).lastrowid
+        if tags:
+            self.conn.executemany("INSERT OR IGNORE INTO tags(tag, bookmark) VALUES(?,?)",
+                                  [(t, bm_id) for t in tags])
+        self.count += 1
+
+
+class NetscapeBookmarkParser(HTMLParser):
+    # общий формат экспорта браузеров: <DT><H3>папка</H3><DL>…</DL> и <DT><A HREF=… TAGS=…>название</A>;
+    # <DT>/<p> обычно не закрыты — смотрим только на DL, H3 и A
+    def __init__(self, sink: BookmarkSink):
+        super().__init__(convert_charrefs=True)
+        self.sink = sink
+        self.stack = [sink.root]
+        self._pending = None  # папка из последнего <H3>, её <DL> ещё не открыт
+        self._tag = None
+        self._attrs = {}
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "dl":
+            self.stack.append(self._pending if self._pending is not None else self.stack[-1])
+            self._pending = None
+        elif tag in ("h3", "a"):
+            self._tag = tag
+            self._attrs = dict(attrs)
+            self._text = []
+
+    def handle_data(self, data):
+        if self._tag is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "dl":
+            if len(self.stack) > 1:
+                self.stack.pop()
+        elif tag == self._tag:
+            title = "".join(self._text).strip()
+            if tag == "h3":
+                self._pending = self.sink.folder(self.stack[-1], title)
+            else:
+                tags = [t.strip() for t in (self._attrs.get("tags") or "").split(",") if t.strip()]
+                try:
+                    added = float(self._attrs.get("add_date") or 0) or None
+                except ValueError:
+                    added = None
+                self.sink.bookmark(self.stack[-1], title, self._attrs.get("href") or "", tags, added)
+            self._tag = None
+
+
+def json_events(obj):
+    # тот же поток (событие, значение), что у ijson.basic_parse, из уже разобранного JSON
+    if isinstance(obj, dict):
+        yield "start_map", None
+        for k, v in obj.items():
+            yield "map_key", k
+            yield from json_events(v)
+        yield "end_map", None
+    elif isinstance(obj, list):
+        yield "start_array", None
+        for v in obj:
+            yield from json_events(v)
+        yield "end_array", None
+    else:
+        yield "scalar", obj
+
+
+def import_json_bookmarks(events, sink: BookmarkSink):
+    # Chrome (roots/children, type=url) и Firefox (children, type=text/x-moz-place, uri, tags):
+    # объект с "children" — папка; у Chrome "children" идёт раньше "name", поэтому папка создаётся
+    # при входе в children, а название дописывается на выходе
+    fields_wanted = {"name", "title", "url", "uri", "tags", "date_added", "dateAdded"}
+    stack = []  # кадры объектов [поля, папка для детей, текущий ключ]; None — массив
+
+    def enclosing():
+        return next((fr[1] for fr in reversed(stack) if fr is not None and fr[1] is not None), sink.root)
+
+    for event, value in events:
+        if event == "start_map":
+            stack.append([{}, None, None])
+        elif event == "map_key":
+            frame = stack[-1]
+            frame[2] = value
+            if value == "children" and frame[1] is None:
+                parent = enclosing()
+                frame[1] = sink.folder(parent, str(frame[0].get("name") or frame[0].get("title") or ""))
+        elif event == "start_array":
+            stack.append(None)
+        elif event == "end_array":
+            stack.pop()
+        elif event == "end_map":
+            fields, folder, _ = stack.pop()
+            title = str(fields.get("name") or fields.get("title") or "")
+            if folder is not None:
+                if title:
+                    sink.rename(folder, title)
+                continue
+            url = fields.get("url") or fields.get("uri")
+            if not isinstance(url, str):
+                continue
+            added = None
+            try:
+                if "dateAdded" in fields:
+                    added = float(fields["dateAdded"]) / 1e6  # Firefox: мкс от 1970
+                elif "date_added" in fields:
+                    added = float(fields["date_added"]) / 1e6 - 11644473600  # Chrome: мкс от 1601
+            except (TypeError, ValueError):
+                pass
+            tags = [t.strip() for t in str(fields.get("tags") or "").split(",") if t.strip()]
+            sink.bookmark(enclosing(), title, url, tags, added)
+        elif stack and stack[-1] is not None and stack[-1][2] in fields_wanted:
+            stack[-1][0][stack[-1][2]] = value
+
+
+class BookmarkDb(SqliteWorker):
+    # закладки: папки, теги и порядок (position) в SQLite; запись и импорт — в фоновой нити,
+    # после пачки с изменениями вызывается on_change (тоже из фоновой нити)
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS folders(
+        id INTEGER PRIMARY KEY,
+        parent INTEGER,
+        title TEXT NOT NULL DEFAULT '',
+        position REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS folders_parent ON folders(parent, position);
+    CREATE TABLE IF NOT EXISTS bookmarks(
+        id INTEGER PRIMARY KEY,
+        folder INTEGER NOT NULL,
+        position REAL NOT NULL,
+        title TEXT NOT NULL DEFAULT '',
+        url TEXT NOT NULL,
+        added REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS bookmarks_folder ON bookmarks(folder, position, id);
+    CREATE INDEX IF NOT EXISTS bookmarks_url ON bookmarks(url);
+    CREATE TABLE IF NOT EXISTS tags(
+        tag TEXT NOT NULL,
+        bookmark INTEGER NOT NULL,
+        PRIMARY KEY(tag, bookmark)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS tags_bookmark ON tags(bookmark);
+    -- QUICK_FOLDER и OTHER_FOLDER
+    INSERT OR IGNORE INTO folders(id, parent, title, position) VALUES(1, NULL, 'Быстрые ссылки', 0);
+    INSERT OR IGNORE INTO folders(id, parent, title, position) VALUES(2, NULL, 'Закладки', 1);
+    """
+
+    def __init__(self, path: Path, on_change):
+        self.on_change = on_change
+        self._dirty = False
+        super().__init__(path, "bookmarks-writer")
+
+    def after_batch(self, conn):
+        if self._dirty:
+            self._dirty = False
+            self.on_change()
+
+    # --- запись (в фоновой нити, через submit) ---
+
+    @staticmethod
+    def _next_position(conn, folder: int) -> float:
+        return conn.execute("SELECT coalesce(max(position), 0) + 1 FROM bookmarks WHERE folder=?",
+                            (folder,)).fetchone()[0]
+
+    def _add(self, conn, folder, title, url, tags, ts):
+        bm_id = conn.execute(
+            "INSERT INTO bookmarks(folder, position, title, url, added) VALUES(?,?,?,?,?)",
+            (folder, self._next_position(conn, folder), title, url, ts),
+        ).lastrowid
+        conn.executemany("INSERT OR IGNORE INTO tags(tag, bookmark) VALUES(?,?)", [(t, bm_id) for t in tags])
+        self._dirty = True
+
+    def _remove(self, conn, bm_id):
+        conn.execute("DELETE FROM bookmarks WHERE id=?", (bm_id,))
+        conn.execute("DELETE FROM tags WHERE bookmark=?", (bm_id,))
+        self._dirty = True
+
+    def _set_tags(self, conn, bm_id, tags):
+        conn.execute("DELETE FROM tags WHERE bookmark=?", (bm_id,))
+        conn.executemany("INSERT OR IGNORE INTO tags(tag, bookmark) VALUES(?,?)", [(t, bm_id) for t in tags])
+        self._dirty = True
+
+    def _move(self, conn, bm_id, step):
+        # обмен позициями с соседом выше (step < 0) или ниже
+        row = conn.execute("SELECT folder, position FROM bookmarks WHERE id=?", (bm_id,)).fetchone()
+        if row is None:
+            return
+        folder, pos = row
+        if step < 0:
+            sql = ("SELECT id, position FROM bookmarks WHERE folder=? AND (position, id) < (?, ?) "
+                   "ORDER BY position DESC, id DESC LIMIT 1")
+        else:
+            sql = "SELECT id, position FROM bookmarks WHERE folder=? AND (position, id) > (?, ?) ORDER BY position, id LIMIT 1"
+        nb = conn.execute(sql, (folder, pos, bm_id)).fetchone()
+        if nb is None or nb[1] == pos:
+            return
+        conn.execute("UPDATE bookmarks SET position=? WHERE id=?", (nb[1], bm_id))
+        conn.execute("UPDATE bookmarks SET position=? WHERE id=?", (pos, nb[0]))
+        self._dirty = True
+
+    def _replace_folder(self, conn, folder, links, ts):
+        conn.execute("DELETE FROM tags WHERE bookmark IN (SELECT id FROM bookmarks WHERE folder=?)", (folder,))
+        conn.execute("DELETE FROM bookmarks WHERE folder=?", (folder,))
+        conn.executemany(
+            "INSERT INTO bookmarks(folder, position, title, url, added) VALUES(?,?,?,?,?)",
+            [(folder, i + 1, str(it.get("title", "")), str(it["url"]), ts) for i, it in enumerate(links)],
+        )
+        self._dirty = True
+
+    def _import(self, conn, path: Path, done):
+        # потоковый разбор: закладки пишутся по мере чтения файла; ошибка откатывает весь импорт
+        t0 = time.monotonic()
+        root_pos = conn.execute("SELECT coalesce(max(position), 0) + 1 FROM folders WHERE parent IS NULL").fetchone()[0]
+        root = conn.execute("INSERT INTO folders(parent, title, position) VALUES(NULL, ?, ?)",
+                            (f"Импорт: {path.name}", root_pos)).lastrowid
+        sink = BookmarkSink(conn, root, time.time())
+        try:
+            with path.open("rb") as fh:
+                head = fh.read(64).lstrip(b"\xef\xbb\xbf \t\r\n")
+                fh.seek(0)
+                if head[:1] in (b"{", b"["):
+                    try:
+                        import ijson
+                        events = ijson.basic_parse(fh)
+                    except ImportError:
+                        LOGGER.warning("bookmarks: ijson is not installed, JSON import reads the whole file")
+                        events = json_events(json.load(fh))
+                    import_json_bookmarks(events, sink)
+                else:
+                    parser = NetscapeBookmarkParser(sink)
+                    text = io.TextIOWrapper(fh, encoding="utf-8", errors="replace")
+                    while True:
+                        chunk = text.read(65536)
+                        if not chunk:
+                            break
+                        parser.feed(chunk)
+                    parser.close()
+        except Exception as e:
+            done(0, str(e))
+            raise
+        self._dirty = True
+        LOGGER.info(f"bookmarks: imported {sink.count} from {path} in {time.monotonic() - t0:.1f} s")
+        done(sink.count, "")
+
+    # --- чтение (GUI-нить) ---
+
+    def children(self, folder: int, after=None, limit: int = 200):
+        # страница закладок папки по ключу (position, id) — без OFFSET, одинаково быстро в начале и в конце
+        if after is None:
+            return self.read("SELECT id, title, url, position FROM bookmarks WHERE folder=? "
+                             "ORDER BY position, id LIMIT ?", (folder, limit))
+        return self.read("SELECT id, title, url, position FROM bookmarks WHERE folder=? AND (position, id) > (?, ?) "
+                         "ORDER BY position, id LIMIT ?", (folder, after[0], after[1], limit))
+
+    def count(self, folder: int) -> int:
+        rows = self.read("SELECT count(*) FROM bookmarks WHERE folder=?", (folder,))
+        return rows[0][0] if rows else 0
+
+    def folder_tree(self):
+        # -> [(id, глубина, название, закладок)] в порядке обхода дерева
+        folders = self.read("SELECT id, parent, title FROM folders ORDER BY position, id")
+        counts = dict(self.read("SELECT folder, count(*) FROM bookmarks GROUP BY folder"))
+        kids = {}
+        for fid, parent, title in folders:
+            kids.setdefault(parent, []).append((fid, title))
+        out = []
+        todo = [(fid, title, 0) for fid, title in reversed(kids.get(None, []))]
+        while todo:
+            fid, title, depth = todo.pop()
+            out.append((fid, depth, title, counts.get(fid, 0)))
+            todo += [(k, t, depth + 1) for k, t in reversed(kids.get(fid, []))]
+        return out
+
+    def search(self, text: str, limit: int = 500):
+        text = text.strip()
+        if text.startswith("#"):
+            return self.read("SELECT b.id, b.title, b.url, b.position FROM tags t JOIN bookmarks b ON b.id=t.bookmark "
+                             "WHERE t.tag=? ORDER BY b.title LIMIT ?", (text[1:].strip(), limit))
+        like = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self.read("SELECT id, title, url, position FROM bookmarks WHERE title LIKE ? ESCAPE '\\' "
+                         "OR url LIKE ? ESCAPE '\\' ORDER BY title LIMIT ?", (like, like, limit))
+
+    def tags_of(self, bm_id: int):
+        return [r[0] for r in self.read("SELECT tag FROM tags WHERE bookmark=? ORDER BY tag", (bm_id,))]
+
+
+class FaviconStore(SqliteWorker):
+    # иконки сайтов по host, PNG; чистка по возрасту и по общему размеру — раз в PRUNE_EVERY
+    MAX_AGE_DAYS = 60
+    MAX_BYTES = 4 * 1024 * 1024
+    PRUNE_EVERY = 3600
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS icons(
+        host TEXT PRIMARY KEY,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        updated REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS icons_updated ON icons(updated);
+    """
+
+    def __init__(self, path: Path):
+        self._last_prune = 0.0
+        super().__init__(path, "favicons-writer")
+
+    def put(self, host: str, data: bytes):
+        self.submit(FaviconStore._put, host, data, time.time())
+
+    @staticmethod
+    def _put(conn, host, data, ts):
+        conn.execute("INSERT OR REPLACE INTO icons(host, data, size, updated) VALUES(?,?,?,?)",
+                     (host, data, len(data), ts))
+
+    def get(self, host: str) -> Optional[bytes]:
+        rows = self.read("SELECT data FROM icons WHERE host=?", (host,))
+        return rows[0][0] if rows else None
+
+    def after_batch(self, conn):
+        now = time.time()
+        if now - self._last_prune < self.PRUNE_EVERY:
+            return
+        self._last_prune = now
+        try:
+            with conn:
+                conn.execute("DELETE FROM icons WHERE updated < ?", (now - self.MAX_AGE_DAYS * 86400,))
+                # самые старые сверх лимита размера: накопительная сумма от свежих к старым
+                row = conn.execute(
+                    "SELECT updated FROM (SELECT updated, SUM(size) OVER (ORDER BY updated DESC) AS total "
+                    "FROM icons) WHERE total > ? ORDER BY updated DESC LIMIT 1",
+                    (self.MAX_BYTES,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM icons WHERE updated <= ?", (row[0],))
+        except Exception as e:
+            LOGGER.warning(f"favicons prune failed: {e}")
+
+
+class FilterEngine:
+    # EasyList-подобные списки, скомпилированные в: множество доменов (||host^) + индекс правил по токену.
+    # Для запроса проверяются только правила, чей токен встречается в URL, — микросекунды на запрос.
+    VERSION = 1
+    ALL_TYPES = frozenset((
+        "script", "image", "stylesheet", "xmlhttprequest", "subdocument", "font",
+        "media", "object", "ping", "websocket", "other",
+    ))
+    TYPE_ALIASES = {"xhr": "xmlhttprequest", "frame": "subdocument", "object-subrequest": "object"}
+    IGNORED_OPTIONS = {"match-case", "important", "all", "document", "popunder", "~document"}
+    TOKEN_RX = re.compile(r"[a-z0-9%]{3,}")
+    URL_TOKEN_RX = re.compile(r"[a-z0-9%]+")
+    SEPARATOR = r"(?:[^\w.%-]|$)"
+
+    def __init__(self):
+        self.block_hosts = set()
+        self.allow_hosts = set()
+        self.block = {}       # токен -> [rule]; "" — правила без токена
+        self.allow = {}
+        self.rule_count = 0
+        self._rx_cache = {}
+
+    # --- компиляция ---
+
+    @classmethod
+    def load(cls, filter_dir: Path, cache_path: Optional[Path]):
+        files = sorted(filter_dir.glob("*.txt"))
+        key = [cls.VERSION] + [(f.name, f.stat().st_size, f.stat().st_mtime_ns) for f in files]
+        if cache_path is not None:
+            try:
+                with cache_path.open("rb") as fh:
+                    cached_key, state = pickle.load(fh)
+                if cached_key == key:
+                    eng = cls()
+                    eng.__dict__.update(state)
+                    eng._rx_cache = {}
+                    return eng, True
+            except Exception:
+                pass
+
+        eng = cls()
+        rules = []
+        for f in files:
+            with f.open("r", encoding="utf-8", errors="replace") as fh:
+                for line in fh:
+                    r = eng._parse(line.strip())
+                    if r is not None:
+                        rules.append(r)
+        eng._compile(rules)
+        if cache_path is None:
+            return eng, False
+        try:
+            state = {k: v for k, v in eng.__dict__.items() if k != "_rx_cache"}
+            with cache_path.open("wb") as fh:
+                pickle.dump((key, state), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            LOGGER.warning(f"filters: cache write failed: {e}")
+        return eng, False
+
+    def _parse(self, line: str):
+        if not line or line[0] in "![" or "##" in line or "#@#" in line or "#?#" in line or "#$#" in line:
+            return None
+        allow = line.startswith("@@")
+        if allow:
+            line = line[2:]
+        opts = None
+        if "$" in line and not (line.startswith("/") and line.endswith("/")):
+            line, _, raw_opts = line.rpartition("$")
+            opts = self._parse_options(raw_opts)
+            if opts is False:
+                return None
+        if not line or (line.startswith("/") and line.endswith("/") and len(line) > 1):
+            return None  # regex-правила редки и дороги — пропускаем
+        return allow, line.lower(), opts
+
+    def _parse_options(self, raw: str):
+        types, neg_types = set(), set()
+        third = None
+        inc, exc = set(), set()
+        for o in raw.lower().split(","):
+            o = o.strip()
+            if not o or o in self.IGNORED_OPTIONS:
+                continue
+            if o == "third-party":
+                third = True
+            elif o in ("~third-party", "first-party"):
+                third = False
+            elif o.startswith("domain="):
+                for d in o[7:].split("|"):
+                    (exc if d.startswith("~") else inc).add(d.lstrip("~"))
+            else:
+                neg = o.startswith("~")
+                t = self.TYPE_ALIASES.get(o.lstrip("~"), o.lstrip("~"))
+                if t not in self.ALL_TYPES:
+                    return False  # csp/redirect/removeparam и прочее не поддерживаем
+                (neg_types if neg else types).add(t)
+        if neg_types and not types:
+            types = set(self.ALL_TYPES) - neg_types
+        if not types and third is None and not inc and not exc:
+            return None
+        return (frozenset(types) or None, third, frozenset(inc) or None, frozenset(exc) or None)
+
+    def _compile(self, rules):
+        freq = {}
+        prepared = []
+        for allow, pat, opts in rules:
+            if pat.startswith("||") and opts is None:
+                host = pat[2:]
+                if host.endswith("^"):
+                    host = host[:-1]
+                if host and all(c not in host for c in "/*^|"):
+                    (self.allow_hosts if allow else self.block_hosts).add(host)
+                    self.rule_count += 1
+                    continue
+            tokens = self._tokens(pat)
+            for t in tokens:
+                freq[t] = freq.get(t, 0) + 1
+            prepared.append((allow, pat, opts, tokens))
+
+        for allow, pat, opts, tokens in prepared:
+            token = min(tokens, key=lambda t: freq[t]) if tokens else ""
+            (self.allow if allow else self.block).setdefault(token, []).append((pat, opts))
+            self.rule_count += 1
+
+    def _tokens(self, pat: str):
+        # токен годится, только если он целиком лежит в URL: не упирается в '*' и в неякорный край
+        out = []
+        for m in self.TOKEN_RX.finditer(pat):
+            a, b = m.start(), m.end()
+            before = pat[a - 1] if a > 0 else ""
+            after = pat[b] if b < len(pat) else ""
+            if before == "*" or after == "*":
+                continue
+            if a == 0 or (before == "|" and pat[:a] not in ("||", "|")):
+                continue
+            if b == len(pat):
+                continue
+            out.append(m.group())
+        return out
+
+    def _regex(self, pat: str):
+        rx = self._rx_cache.get(pat)
+        if rx is None:
+            body = pat
+            prefix = ""
+            if body.startswith("||"):
+                body = body[2:]
+                prefix = r"^[a-z][a-z0-9+.-]*:(?://)?(?:[^/?#]*\.)?"
+            elif body.startswith("|"):
+                body = body[1:]
+                prefix = "^"
+            suffix = ""
+            if body.endswith("|"):
+                body = body[:-1]
+                suffix = "$"
+            body = re.escape(body).replace(r"\*", ".*").replace(r"\^", self.SEPARATOR)
+            rx = re.compile(prefix + body + suffix)
+            self._rx_cache[pat] = rx
+        return rx
+
+    # --- сопоставление ---
+
+    @staticmethod
+    def _host_in(host: str, hosts) -> bool:
+        while True:
+            if host in hosts:
+                return True
+            dot = host.find(".")
+            if dot < 0:
+                return False
+            host = host[dot + 1:]
+
+    @staticmethod
+    def _site(host: str) -> str:
+        parts = host.split(".")
+        return ".".join(parts[-2:])
+
+    def _match_rules(self, index, url, tokens, rtype, third, src_host) -> bool:
+        for t in tokens:
+            rules = index.get(t)
+            if rules and self._any(rules, url, rtype, third, src_host):
+                return True
+        rules = index.get("")
+        return bool(rules) and self._any(rules, url, rtype, third, src_host)
+
+    def _any(self, rules, url, rtype, third, src_host) -> bool:
+        for pat, opts in rules:
+            if opts is not None:
+                types, tp, inc, exc = opts
+                if types is not None and rtype not in types:
+                    continue
+                if tp is not None and tp != third:
+                    continue
+                if inc is not None and not self._host_in(src_host, inc):
+                    continue
+                if exc is not None and self._host_in(src_host, exc):
+                    continue
+            if "*" not in pat and "^" not in pat and "|" not in pat:
+                if pat in url:
+                    return True
+            elif self._regex(pat).search(url):
+                return True
+        return False
+
+    def should_block(self, url: str, host: str, src_host: str, rtype: str) -> bool:
+        url = url.lower()
+        host = host.lower()
+        third = bool(src_host) and self._site(host) != self._site(src_host)
+        blocked = self._host_in(host, self.block_hosts) if self.block_hosts else False
+        tokens = None
+        if not blocked:
+            tokens = set(self.URL_TOKEN_RX.findall(url))
+            blocked = self._match_rules(self.block, url, tokens, rtype, third, src_host)
+        if not blocked:
+            return False
+        if self.allow_hosts and self._host_in(host, self.allow_hosts):
+            return False
+        if self.allow:
+            if tokens is None:
+                tokens = set(self.URL_TOKEN_RX.findall(url))
+            if self._match_rules(self.allow, url, tokens, rtype, third, src_host):
+                return False
+        return True
+
+
+class LatencyHistogram:
+    # логарифмически-линейные корзины как в HDR Histogram: 2^e..2^(e+1) мс делится на SUB частей (~6% точности);
+    # хранятся только непустые корзины, поэтому память ограничена числом корзин, а не числом замеров
+    SUB = 16
+    MAX_MS = 1 << 20
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, counts=None):
+        self.counts = {int(k): int(v) for k, v in (counts or {}).items()}
+        self.total = sum(self.counts.values())
+
+    @classmethod
+    def bucket(cls, ms: float) -> int:
+        ms = min(max(ms, 0.0), cls.MAX_MS - 1)
+        if ms < 1:
+            return 0
+        e = int(math.log2(ms))
+        return 1 + e * cls.SUB + int((ms / (1 << e) - 1.0) * cls.SUB)
+
+    @classmethod
+    def value(cls, b: int) -> float:
+        # середина корзины
+        if b == 0:
+            return 0.5
+        e, sub = divmod(b - 1, cls.SUB)
+        return (1 << e) * (1.0 + (sub + 0.5) / cls.SUB)
+
+    def add(self, ms: float):
+        b = self.bucket(ms)
+        self.counts[b] = self.counts.get(b, 0) + 1
+        self.total += 1
+
+    def percentile(self, q: float) -> float:
+        if not self.total:
+            return 0.0
+        need = q / 100.0 * self.total
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= need:
+                return self.value(b)
+        return self.value(max(self.counts))
+
+
+class PerfStats:
+    # гистограммы по host и метрике; сверх MAX_HOSTS выбрасываются давно не обновлявшиеся хосты
+    METRICS = ("ttfb", "fcp", "lcp", "dcl", "load", "long_tasks_ms")
+    COUNTERS = ("samples", "resources", "long_tasks", "transfer_bytes")
+    MAX_HOSTS = 500
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.hosts = OrderedDict()  # host -> {"hist": {metric: LatencyHistogram}, counters...}
+        self.dirty = False
+        if path is None:
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            for host, rec in data.items():
+                self.hosts[host] = self._entry(rec)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            LOGGER.warning(f"perf: stats load failed: {e}")
+
+    def _entry(self, rec=None):
+        rec = rec or {}
+        entry = {"hist": {m: LatencyHistogram((rec.get("hist") or {}).get(m)) for m in self.METRICS}}
+        for c in self.COUNTERS:
+            entry[c] = int(rec.get(c, 0))
+        return entry
+
+    def add(self, host: str, sample: dict):
+        entry = self.hosts.get(host)
+        if entry is None:
+            entry = self.hosts[host] = self._entry()
+            while len(self.hosts) > self.MAX_HOSTS:
+                self.hosts.popitem(last=False)
+        else:
+            self.hosts.move_to_end(host)
+        for m in self.METRICS:
+            v = sample.get(m)
+            if isinstance(v, (int, float)) and v >= 0:
+                entry["hist"][m].add(float(v))
+        entry["samples"] += 1
+        for c in ("resources", "long_tasks", "transfer_bytes"):
+            v = sample.get(c)
+            if isinstance(v, (int, float)) and v >= 0:
+                entry[c] += int(v)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty or self.path is None:
+            return
+        data = {
+            host: dict({c: e[c] for c in self.COUNTERS},
+                       hist={m: h.counts for m, h in e["hist"].items() if h.total})
+            for host, e in self.hosts.items()
+        }
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except Exception as e:
+            LOGGER.warning(f"perf: stats save failed: {e}")
+
+    def summary(self):
+        # [(host, samples, {metric: (p50, p95, p99)}, counters)] по убыванию числа замеров
+        rows = []
+        for host, e in self.hosts.items():
+            pct = {m: tuple(h.percentile(q) for q in (50, 95, 99)) for m, h in e["hist"].items()}
+            rows.append((host, e["samples"], pct, {c: e[c] for c in self.COUNTERS}))
+        rows.sort(key=lambda r: -r[1])
+        return rows
+
+    def export_csv(self) -> str:
+        cols = ["host", "samples"] + [f"{m}_p{q}" for m in self.METRICS for q in (50, 95, 99)] + \
+               ["resources", "long_tasks", "transfer_bytes"]
+        lines = [",".join(cols)]
+        for host, samples, pct, cnt in self.summary():
+            vals = [host, str(samples)] + [f"{v:.1f}" for m in self.METRICS for v in pct[m]] + \
+                   [str(cnt["resources"]), str(cnt["long_tasks"]), str(cnt["transfer_bytes"])]
+            lines.append(",".join(vals))
+        return "\n".join(lines) + "\n"
+
+    def export_json(self) -> str:
+        return json.dumps([
+            {"host": host, "samples": samples,
+             "percentiles": {m: dict(zip(("p50", "p95", "p99"), pct[m])) for m in self.METRICS}, **cnt}
+            for host, samples, pct, cnt in self.summary()
+        ], ensure_ascii=False, indent=1)
+
+
+def strip_url_for_match(url: str) -> str:
+    u = url.lower()
+    for p in ("https://", "http://"):
+        if u.startswith(p):
+            u = u[len(p):]
+            break
+    if u.startswith("www."):
+        u = u[4:]
+    return u.rstrip("/")
+
+
+class PrefixIndex:
+    # отсортированный список ключей (url без схемы, слова заголовка) + кеш top-K для коротких префиксов;
+    # короткий префикс покрывает огромный диапазон, длинный — обычно единицы ключей, их просматриваем
+    # bisect'ом (а если диапазон всё же широкий — тоже кешируем)
+    KIND_URL = 0
+    KIND_TITLE = 1
+    CACHE_DEPTH = 3
+    SCAN_CACHE_MIN = 256
+    TOP_K = 10
+    LINK_BONUS = 8.0
+
+    def __init__(self):
+        self.entries = {}   # url -> [title, score, keys]
+        self._keys = []     # (key, kind, url), отсортировано
+        self._top = {}      # префикс -> [url, ...] по убыванию score
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _make_keys(url: str, title: str):
+        keys = {(strip_url_for_match(url), PrefixIndex.KIND_URL)}
+        t = title.lower().strip()
+        if t:
+            keys.add((t, PrefixIndex.KIND_TITLE))
+            for w in t.split():
+                if len(w) > 1:
+                    keys.add((w, PrefixIndex.KIND_TITLE))
+        return keys
+
+    def add(self, url: str, title: str = "", score: float = 0.0):
+        e = self.entries.get(url)
+        if e is not None:
+            changed = False
+            if title and title != e[0]:
+                # заголовок обычно приходит после визита: новые слова должны попасть и в готовые top-K
+                old = e[2]
+                self._unindex(url, old)
+                e[0] = title
+                e[2] = self._make_keys(url, title)
+                self._index(url, e[2])
+                self._drop_stale(url, old - e[2], e[2])
+                changed = True
+            if score > e[1]:
+                e[1] = score
+                changed = True
+            if changed:
+                self._bump(url, e[2])
+            return
+        keys = self._make_keys(url, title)
+        self.entries[url] = [title, score, keys]
+        self._index(url, keys)
+        self._bump(url, keys)
+
+    def bulk_load(self, rows):
+        # rows: (url, title, score); один sort вместо сотен тысяч insort
+        for url, title, score in rows:
+            keys = self._make_keys(url, title or "")
+            self.entries[url] = [title or "", float(score or 0.0), keys]
+            for key, kind in keys:
+                self._keys.append((key, kind, url))
+        self._keys.sort()
+        self._build_top()
+
+    def _build_top(self):
+        # top-K по группам key[:CACHE_DEPTH] (они идут подряд), затем более короткие префиксы —
+        # из top-K дочерних групп: лучшие K объединения всегда лежат в лучших K какой-то из частей
+        self._top = {}
+        score = lambda u: self.entries[u][1]
+        i = 0
+        n = len(self._keys)
+        while i < n:
+            g = self._keys[i][0][:self.CACHE_DEPTH]
+            # короткий ключ ("ab") — группа только из точных совпадений, "abc…" идут следующими группами
+            end = g + ("\uffff" if len(g) == self.CACHE_DEPTH else "\x00")
+            j = bisect.bisect_left(self._keys, (end,), i)
+            group = {u for _, _, u in self._keys[i:j]}
+            self._top[g] = heapq.nlargest(self.TOP_K, group, key=score)
+            i = j
+        cand = {}
+        for g, top in self._top.items():
+            for m in range(1, len(g)):
+                cand.setdefault(g[:m], set()).update(top)
+        for p, urls in cand.items():
+            urls.update(self._top.get(p, ()))
+            self._top[p] = heapq.nlargest(self.TOP_K, urls, key=score)
+
+    def remove(self, url: str):
+        e = self.entries.pop(url, None)
+        if e is None:
+            return
+        self._unindex(url, e[2])
+        for key, _ in e[2]:
+            for n in range(1, len(key) + 1):
+                self._top.pop(key[:n], None)
+
+    def _drop_stale(self, url, gone, keys):
+        # префиксы старого заголовка: url мог остаться в их top-K, хотя больше им не соответствует
+        for key, _ in gone:
+            for n in range(1, len(key) + 1):
+                p = key[:n]
+                top = self._top.get(p)
+                if top is not None and url in top and not any(k.startswith(p) for k, _ in keys):
+                    del self._top[p]
+
+    def _index(self, url, keys):
+        for key, kind in keys:
+            bisect.insort(self._keys, (key, kind, url))
+
+    def _unindex(self, url, keys):
+        for key, kind in keys:
+            i = bisect.bisect_left(self._keys, (key, kind, url))
+            if i < len(self._keys) and self._keys[i] == (key, kind, url):
+                del self._keys[i]
+
+    def _bump(self, url, keys):
+        score = self.entries[url][1]
+        for key, _ in keys:
+            for n in range(1, len(key) + 1):
+                top = self._top.get(key[:n])
+                if top is None:
+                    continue  # посчитается лениво при первом запросе
+                if url in top:
+                    top.remove(url)
+                elif len(top) >= self.TOP_K and self.entries[top[-1]][1] >= score:
+                    continue
+                i = 0
+                while i < len(top) and self.entries[top[i]][1] >= score:
+                    i += 1
+                top.insert(i, url)
+                del top[self.TOP_K:]
+
+    def _scan(self, prefix: str, k: int):
+        lo = bisect.bisect_left(self._keys, (prefix,))
+        hi = bisect.bisect_left(self._keys, (prefix + "\uffff",))
+        urls = {u for _, _, u in self._keys[lo:hi]}
+        return heapq.nlargest(k, urls, key=lambda u: self.entries[u][1]), hi - lo
+
+    def query(self, text: str, k: int = TOP_K):
+        # -> [(url, title, url_match)]
+        prefix = strip_url_for_match(text.strip()) if text.strip() else ""
+        if not prefix:
+            return []
+        top = self._top.get(prefix) if k <= self.TOP_K else None
+        if top is not None:
+            urls = top[:k]
+        else:
+            urls, width = self._scan(prefix, max(k, self.TOP_K))
+            if k <= self.TOP_K and (len(prefix) <= self.CACHE_DEPTH or width >= self.SCAN_CACHE_MIN):
+                self._top[prefix] = urls
+            urls = urls[:k]
+        return [(u, self.entries[u][0], strip_url_for_match(u).startswith(prefix)) for u in urls]
+
+    def inline_url(self, text: str) -> Optional[str]:
+        # лучший url, чей адрес (а не заголовок) начинается с введённого
+        prefix = strip_url_for_match(text.strip())
+        if not prefix or " " in prefix:
+            return None
+        for url, _, url_match in self.query(prefix, 3):
+            if url_match:
+                return url
+        return None
+
+
+
+def instance_server_name() -> str:
+    return "GdBrowser-" + hashlib.sha1(str(APP_DATA_DIR).encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_cli_urls(args):
+    from PyQt6.QtCore import QUrl
+    cwd = os.getcwd()
+    return [
+        QUrl.fromUserInput(a, cwd, QUrl.UserInputResolutionOption.AssumeLocalFile).toString()
+        for a in args
+    ]
+
+
+def forward_to_running_instance(urls) -> bool:
+    # второй запуск: отдать адреса уже работающему браузеру и выйти, не поднимая QtWebEngine
+    from PyQt6.QtNetwork import QLocalSocket
+    sock = QLocalSocket()
+    sock.connectToServer(instance_server_name())
+    if not sock.waitForConnected(300):
+        return False
+    sock.write((json.dumps({"urls": urls}) + "\n").encode("utf-8"))
+    # waitForBytesWritten возвращается после первой порции: длинный список дописываем до конца,
+    # иначе сокет закроется с недописанным хвостом и сервер не получит ни строки
+    deadline = time.monotonic() + 5
+    while sock.bytesToWrite() > 0 and time.monotonic() < deadline:
+        if not sock.waitForBytesWritten(1000):
+            break
+    ok = sock.bytesToWrite() == 0
+    sock.disconnectFromServer()
+    if sock.state() != QLocalSocket.LocalSocketState.UnconnectedState:
+        sock.waitForDisconnected(1000)
+    return ok
+
+
+if __name__ == "__main__" and not cli_flag("--new-instance") and not EPHEMERAL and cli_option("--batch") is None \
+        and cli_option("--perf-compare") is None:
+    with STARTUP.phase("single_instance"):
+        if forward_to_running_instance(normalize_cli_urls(cli_urls())):
+            sys.exit(0)
+
+
+with STARTUP.phase("files"):
+    if not EPHEMERAL:
+        ensure_app_files()
+with STARTUP.phase("config"):
+    CFG = load_cfg()
+
+STARTUP.begin("logger")
 LOG_ENABLED = (CFG.get("logs", "enabled", fallback="true").strip().lower() == "true")
 LOG_MAX_MB = clamp_int(CFG.get("logs", "max_mb", fallback=str(DEFAULT_LOG_MB)), DEFAULT_LOG_MB, 1, 500)
 LOG_MAX_BYTES = LOG_MAX_MB * 1024 * 1024
+LOG_GENERATIONS = clamp_int(CFG.get("logs", "generations", fallback=str(DEFAULT_LOG_GENERATIONS)),
+                            DEFAULT_LOG_GENERATIONS, 0, 50)
 
 LOG_FILE = LOG_DIR / "gdbrowser.log"
 CHROMIUM_LOG = LOG_DIR / "chromium.log"
 
-truncate_if_big(LOG_FILE, LOG_MAX_BYTES)
-truncate_if_big(CHROMIUM_LOG, LOG_MAX_BYTES)
-
-LOGGER = TruncatingFileLogger(LOG_ENABLED, LOG_MAX_BYTES, LOG_FILE)
+if EPHEMERAL:
+    LOGGER = MemoryRingLogger()
+    if hasattr(signal, "SIGUSR1"):
+        # киоск без клавиатуры: kill -USR1 <pid> выводит журнал в stderr
+        signal.signal(signal.SIGUSR1, lambda *_: LOGGER.dump(sys.stderr))
+else:
+    LOGGER = RotatingQueueLogger(LOG_ENABLED, LOG_MAX_BYTES, LOG_FILE, LOG_GENERATIONS,
+                                 CHROMIUM_LOG if LOG_ENABLED else None)
+atexit.register(LOGGER.close)
 LOGGER.info("=== start ===")
-LOGGER.info(f"Data dir: {APP_DATA_DIR}")
-LOGGER.info(f"Logs enabled: {LOG_ENABLED}, max_mb: {LOG_MAX_MB}")
-
-if LOG_ENABLED:
-    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = " ".join([
-        "--enable-logging=stderr",
-        "--v=1",
-        "--log-file=" + str(CHROMIUM_LOG),
-    ])
-
-
-from PyQt6.QtCore import QUrl, QSize, Qt
-from PyQt6.QtGui import QKeySequence, QAction
+LOGGER.info(f"Data dir: {APP_DATA_DIR}{' (ephemeral, read-only)' if EPHEMERAL else ''}")
+LOGGER.info(f"Logs enabled: {LOG_ENABLED}, max_mb: {LOG_MAX_MB}, generations: {LOG_GENERATIONS}")
+
+# флаги Chromium читаются один раз при старте QtWebEngine — собираем до импорта Qt
+USER_CHROMIUM_FLAGS = os.environ.get("QTWEBENGINE_CHROMIUM_FLAGS", "")
+PERF_PROFILE_NAME, PERF_PROFILE, _problems = resolve_perf_profile(CFG)
+for _p in _problems:
+    LOGGER.warning(f"performance: {_p}")
+_flags = compose_chromium_flags(PERF_PROFILE, CHROMIUM_LOG if LOG_ENABLED and not EPHEMERAL else None,
+                                USER_CHROMIUM_FLAGS)
+if _flags:
+    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = _flags
+LOGGER.info(f"Performance profile: {PERF_PROFILE_NAME}, chromium flags: {_flags or '-'}")
+STARTUP.end("logger")
+
+
+STARTUP.begin("qt_import")
+from PyQt6.QtCore import (
+    QUrl, QUrlQuery, QSize, Qt, QObject, QTimer, QPointF, QByteArray, QDataStream, QIODevice, QBuffer, QFile,
+    QAbstractListModel, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QStandardPaths,
+    pyqtSignal, pyqtSlot, pyqtProperty
+)
+from PyQt6.QtGui import QKeySequence, QAction, QColor, QFont, QIcon, QPixmap
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QToolBar, QLineEdit, QTabWidget,
     QWidget, QVBoxLayout, QMessageBox, QFileDialog,
     QDialog, QFormLayout, QComboBox, QDialogButtonBox,
-    QCheckBox, QSpinBox, QLabel, QPushButton, QHBoxLayout
+    QCheckBox, QSpinBox, QLabel, QPushButton, QHBoxLayout, QMenu, QCompleter,
+    QListView, QDockWidget, QTableView, QHeaderView, QAbstractItemView, QTableWidget, QTableWidgetItem,
+    QInputDialog
+)
+from PyQt6.QtNetwork import (
+    QLocalServer, QLocalSocket, QHostInfo, QNetworkAccessManager, QNetworkRequest, QNetworkReply
 )
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineSettings
+from PyQt6.QtWebEngineCore import (
+    QWebEngineProfile, QWebEnginePage, QWebEngineSettings, QWebEngineDownloadRequest,
+    QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo,
+    QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob, QWebEngineScript
+)
+from PyQt6.QtWebChannel import QWebChannel
+
+# схему нужно зарегистрировать до создания QApplication
+_scheme = QWebEngineUrlScheme(APP_SCHEME)
+_scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+_scheme.setFlags(QWebEngineUrlScheme.Flag.SecureScheme | QWebEngineUrlScheme.Flag.LocalScheme)
+QWebEngineUrlScheme.registerScheme(_scheme)
+STARTUP.end("qt_import")
 
 
 DARK_QSS = """
@@ -488,31 +2811,398 @@ def encode_query(text: str) -> str:
     return QUrl.toPercentEncoding(text).data().decode("utf-8")
 
 
-class SettingsDialog(QDialog):
-    def __init__(self, cfg: configparser.ConfigParser, parent=None):
+class LogLineModel(QAbstractListModel):
+    # виртуальная модель: строки читаются из mmap только для видимых рядов
+    def __init__(self, log: MappedLogFile, parent=None):
         super().__init__(parent)
-        self.cfg = cfg
-        self.setWindowTitle("Настройки")
-        self.setMinimumWidth(560)
+        self.log = log
+        self.rows = None  # None — все строки; иначе range/array номеров строк
+        self._count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._count:
+            return None
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ForegroundRole):
+            return None
+        ln = index.row() if self.rows is None else self.rows[index.row()]
+        text = self.log.line(ln)
+        if role == Qt.ItemDataRole.DisplayRole:
+            return text
+        head = text[:120]
+        if "ERROR" in head or "FATAL" in head or "CRITICAL" in head:
+            return QColor("#ff6b6b")
+        if "WARNING" in head:
+            return QColor("#f2c94c")
+        return None
+
+    def total(self) -> int:
+        return self.log.line_count() if self.rows is None else len(self.rows)
+
+    def grow(self):
+        n = self.total()
+        if n > self._count:
+            self.beginInsertRows(QModelIndex(), self._count, n - 1)
+            self._count = n
+            self.endInsertRows()
+        elif n < self._count:
+            self.reset_rows(self.rows)
+
+    def reset_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self._count = self.total()
+        self.endResetModel()
+
+
+class LogViewerDialog(QDialog):
+    LEVELS = {
+        "Все уровни": None,
+        "INFO и выше": rb"\| (?:INFO|WARNING|ERROR|CRITICAL) \||:(?:INFO|WARNING|ERROR|FATAL):",
+        "WARNING и выше": rb"\| (?:WARNING|ERROR|CRITICAL) \||:(?:WARNING|ERROR|FATAL):",
+        "ERROR": rb"\| (?:ERROR|CRITICAL) \||:(?:ERROR|FATAL):",
+    }
+
+    indexed = pyqtSignal(object, bool)
+    filtered = pyqtSignal(int, object, int, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Просмотр логов")
+        self.resize(1100, 700)
+
+        self.log = None
+        self.model = None
+        self._stop = threading.Event()
+        self._indexing_log = None
+        self._filter_gen = 0
+        self._filter_spec = None
+        self._filter_upto = 0
 
         layout = QVBoxLayout(self)
-        form = QFormLayout()
 
-        self.combo_engine = QComboBox()
-        for n in SEARCH_ENGINES.keys():
-            self.combo_engine.addItem(n)
-        self.combo_engine.setCurrentText(self.cfg.get("search", "engine", fallback=DEFAULT_ENGINE))
-        form.addRow("Поисковик:", self.combo_engine)
+        row = QHBoxLayout()
+        self.combo_file = QComboBox()
+        self.combo_file.addItem("gdbrowser.log", str(LOG_FILE))
+        self.combo_file.addItem("chromium.log", str(CHROMIUM_LOG))
+        self.combo_file.currentIndexChanged.connect(lambda _: self.open_file(Path(self.combo_file.currentData())))
+        row.addWidget(self.combo_file)
+
+        self.edit_rx = QLineEdit()
+        self.edit_rx.setPlaceholderText("Регулярное выражение…")
+        row.addWidget(self.edit_rx, 1)
+
+        self.combo_level = QComboBox()
+        for name in self.LEVELS:
+            self.combo_level.addItem(name)
+        row.addWidget(self.combo_level)
+
+        self.edit_from = QLineEdit()
+        self.edit_from.setPlaceholderText("с ММ-ДД чч:мм")
+        self.edit_from.setMaximumWidth(120)
+        self.edit_to = QLineEdit()
+        self.edit_to.setPlaceholderText("по ММ-ДД чч:мм")
+        self.edit_to.setMaximumWidth(120)
+        row.addWidget(self.edit_from)
+        row.addWidget(self.edit_to)
+
+        self.chk_follow = QCheckBox("Следить")
+        row.addWidget(self.chk_follow)
+        layout.addLayout(row)
 
-        self.chk_tooltips = QCheckBox("Показывать подсказки при наведении")
-        self.chk_tooltips.setChecked(self.cfg.get("ui", "tooltips", fallback="true").strip().lower() == "true")
-        form.addRow("Подсказки:", self.chk_tooltips)
+        self.view = QListView()
+        self.view.setUniformItemSizes(True)
+        self.view.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.view, 1)
+
+        self.status = QLabel("")
+        layout.addWidget(self.status)
+
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(300)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        for w in (self.edit_rx, self.edit_from, self.edit_to):
+            w.textChanged.connect(lambda _: self.filter_timer.start())
+        self.combo_level.currentIndexChanged.connect(lambda _: self.filter_timer.start())
+
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(1000)
+        self.follow_timer.timeout.connect(self.on_follow_tick)
+        self.follow_timer.start()
+
+        self.indexed.connect(self.on_indexed)
+        self.filtered.connect(self.on_filtered)
+
+        self.open_file(LOG_FILE)
+
+    def open_file(self, path: Path):
+        self._stop.set()
+        self._stop = threading.Event()
+        if self.log is not None:
+            self.log.close()
+        self.log = MappedLogFile(path)
+        self.model = LogLineModel(self.log, self)
+        self.view.setModel(self.model)
+        self._filter_spec = None
+        self._filter_upto = 0
+        self.start_indexing()
+        self.apply_filter()
+
+    def start_indexing(self):
+        if self._indexing_log is self.log:
+            return
+        self._indexing_log = log = self.log
+        stop = self._stop
 
-        self.chk_logs = QCheckBox("Включить логи")
-        self.chk_logs.setChecked(self.cfg.get("logs", "enabled", fallback="true").strip().lower() == "true")
-        form.addRow("Логи:", self.chk_logs)
+        def run():
+            while not stop.is_set() and log.index_more():
+                self.indexed.emit(log, False)
+            self.indexed.emit(log, True)
 
-        self.spin_mb = QSpinBox()
+        threading.Thread(target=run, name="log-index", daemon=True).start()
+
+    def on_indexed(self, log, finished: bool):
+        if log is not self.log:
+            return
+        if finished:
+            self._indexing_log = None
+            if self._filter_spec is not None:
+                self.run_filter(incremental=True)
+        if self.model.rows is None:
+            self.model.grow()
+        self.update_status()
+        if self.chk_follow.isChecked():
+            self.view.scrollToBottom()
+
+    def on_follow_tick(self):
+        if not self.chk_follow.isChecked() or self._indexing_log is not None or self.log is None:
+            return
+        old_size = self.log.size
+        if self.log.remap():
+            # файл ротирован — начинаем заново
+            self.model.reset_rows(None)
+            self._filter_upto = 0
+        elif self.log.size == old_size:
+            return
+        self.start_indexing()
+
+    @staticmethod
+    def _ts_arg(text: str) -> str:
+        digits = "".join(ch for ch in text if ch.isdigit())[:10]
+        return digits.ljust(10, "0") if digits else ""
+
+    def apply_filter(self):
+        rx_text = self.edit_rx.text().strip()
+        level = self.LEVELS.get(self.combo_level.currentText())
+        try:
+            rx_user = re.compile(rx_text.encode("utf-8"), re.MULTILINE) if rx_text else None
+        except re.error as e:
+            self.status.setText(f"Ошибка в выражении: {e}")
+            return
+        rx_level = re.compile(level) if level else None
+        t_from = self._ts_arg(self.edit_from.text())
+        t_to = self._ts_arg(self.edit_to.text())
+
+        self._filter_gen += 1
+        self._filter_upto = 0
+        if not (rx_user or rx_level or t_from or t_to):
+            self._filter_spec = None
+            self.model.reset_rows(None)
+            self.update_status()
+            return
+        self._filter_spec = (rx_user, rx_level, t_from, t_to)
+        self.status.setText("Фильтрация…")
+        self.run_filter(incremental=False)
+
+    def run_filter(self, incremental: bool):
+        log, spec, gen, stop = self.log, self._filter_spec, self._filter_gen, self._stop
+        start = self._filter_upto if incremental else 0
+
+        def run():
+            rx_user, rx_level, t_from, t_to = spec
+            total = log.line_count()
+            lo, hi = log.time_bounds(t_from, t_to) if (t_from or t_to) else (0, total)
+            lo = max(lo, start)
+            rows = None
+            for rx in (rx_user, rx_level):
+                if rx is None:
+                    continue
+                found = log.find_lines(rx, lo, hi, stop)
+                rows = found if rows is None else array.array("Q", sorted(set(rows).intersection(found)))
+            if rows is None:
+                rows = range(lo, max(lo, hi))
+            self.filtered.emit(gen, rows, total, incremental)
+
+        threading.Thread(target=run, name="log-filter", daemon=True).start()
+
+    def on_filtered(self, gen: int, rows, upto: int, incremental: bool):
+        if gen != self._filter_gen:
+            return
+        self._filter_upto = upto
+        if incremental and self.model.rows is not None:
+            merged = array.array("Q", self.model.rows)
+            merged.extend(rows)
+            self.model.rows = merged
+            self.model.grow()
+        else:
+            self.model.reset_rows(rows)
+        self.update_status()
+
+    def update_status(self):
+        total = self.log.line_count()
+        mb = self.log.size / (1024 * 1024)
+        state = " (индексация…)" if self._indexing_log is not None else ""
+        if self.model.rows is None:
+            self.status.setText(f"{self.log.path.name}: {total} строк, {mb:.1f} MB{state}")
+        else:
+            self.status.setText(f"{self.log.path.name}: показано {len(self.model.rows)} из {total}, {mb:.1f} MB{state}")
+
+    def done(self, r):
+        self._stop.set()
+        self.follow_timer.stop()
+        if self.log is not None:
+            self.log.close()
+        super().done(r)
+
+
+class CacheStatsDialog(QDialog):
+    scanned = pyqtSignal(object)
+
+    def __init__(self, profile: QWebEngineProfile, parent=None):
+        super().__init__(parent)
+        self.profile = profile
+        self.setWindowTitle("HTTP-кэш")
+        self.resize(560, 460)
+        self.stats = {}
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Сайт", "Размер", "Записей"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+
+        self.lab_total = QLabel("Подсчёт…")
+        btn_host = QPushButton("Очистить сайт")
+        btn_all = QPushButton("Очистить весь кэш")
+        btn_host.clicked.connect(self.clear_selected)
+        btn_all.clicked.connect(self.clear_all)
+
+        row = QHBoxLayout()
+        row.addWidget(self.lab_total, 1)
+        row.addWidget(btn_host)
+        row.addWidget(btn_all)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(row)
+
+        self.scanned.connect(self.on_scanned)
+        self.rescan()
+
+    def rescan(self):
+        self.lab_total.setText("Подсчёт…")
+        threading.Thread(target=lambda: self.scanned.emit(scan_http_cache(CACHE_DIR)),
+                         name="cache-scan", daemon=True).start()
+
+    def on_scanned(self, stats):
+        self.stats = stats
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+        for host, (size, entries, _files) in stats.items():
+            r = self.table.rowCount()
+            self.table.insertRow(r)
+            self.table.setItem(r, 0, QTableWidgetItem(host or "(служебные файлы)"))
+            it_size = QTableWidgetItem(format_bytes(size))
+            it_size.setData(Qt.ItemDataRole.UserRole, size)
+            self.table.setItem(r, 1, it_size)
+            it_n = QTableWidgetItem()
+            it_n.setData(Qt.ItemDataRole.DisplayRole, entries)
+            self.table.setItem(r, 2, it_n)
+        self.table.setSortingEnabled(True)
+        self.table.sortItems(2, Qt.SortOrder.DescendingOrder)
+        total = sum(v[0] for v in stats.values())
+        self.lab_total.setText(f"Всего: {format_bytes(total)}, сайтов: {sum(1 for h in stats if h)}")
+
+    def clear_selected(self):
+        # у QtWebEngine нет очистки по сайту: удаляем файлы записей; Chromium сочтёт их промахом кэша
+        rows = {i.row() for i in self.table.selectedIndexes()}
+        removed = 0
+        for r in rows:
+            host = self.table.item(r, 0).text()
+            for path in self.stats.get(host, (0, 0, []))[2]:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass  # файл открыт рендерером — останется до следующей очистки
+        LOGGER.info(f"cache: {removed} entries removed for {len(rows)} hosts")
+        self.rescan()
+
+    def clear_all(self):
+        self.profile.clearHttpCache()
+        LOGGER.info("cache: cleared")
+        QTimer.singleShot(1000, self.rescan)
+
+
+class SettingsDialog(QDialog):
+    def __init__(self, cfg: configparser.ConfigParser, parent=None):
+        super().__init__(parent)
+        self.cfg = cfg
+        self.setWindowTitle("Настройки")
+        self.setMinimumWidth(560)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        self.combo_engine = QComboBox()
+        for n in SEARCH_ENGINES.keys():
+            self.combo_engine.addItem(n)
+        self.combo_engine.setCurrentText(self.cfg.get("search", "engine", fallback=DEFAULT_ENGINE))
+        form.addRow("Поисковик:", self.combo_engine)
+
+        self.chk_tooltips = QCheckBox("Показывать подсказки при наведении")
+        self.chk_tooltips.setChecked(self.cfg.get("ui", "tooltips", fallback="true").strip().lower() == "true")
+        form.addRow("Подсказки:", self.chk_tooltips)
+
+        self.chk_blocking = QCheckBox(f"Блокировать рекламу и трекеры (списки в {FILTERS_DIR.name}/*.txt)")
+        self.chk_blocking.setChecked(self.cfg.get("blocking", "enabled", fallback="true").strip().lower() == "true")
+        form.addRow("Блокировка:", self.chk_blocking)
+
+        self.combo_cache = QComboBox()
+        for key, label in (("disk", "На диске"), ("memory", "Только в памяти"), ("none", "Без кэша")):
+            self.combo_cache.addItem(label, key)
+        self.combo_cache.setCurrentIndex(
+            max(0, self.combo_cache.findData(self.cfg.get("cache", "type", fallback="disk").strip().lower())))
+        form.addRow("HTTP-кэш:", self.combo_cache)
+
+        self.spin_cache_mb = QSpinBox()
+        self.spin_cache_mb.setRange(0, 100000)
+        self.spin_cache_mb.setSpecialValueText("авто")
+        self.spin_cache_mb.setSuffix(" MB")
+        self.spin_cache_mb.setValue(clamp_int(self.cfg.get("cache", "max_mb", fallback="0"), 0, 0, 100000))
+        form.addRow("Макс размер кэша:", self.spin_cache_mb)
+
+        self.combo_cookies = QComboBox()
+        for key, label in (("allow", "Сохранять"), ("session", "Только на сеанс"), ("force", "Сохранять все")):
+            self.combo_cookies.addItem(label, key)
+        self.combo_cookies.setCurrentIndex(
+            max(0, self.combo_cookies.findData(self.cfg.get("cache", "cookies", fallback="allow").strip().lower())))
+        form.addRow("Cookies:", self.combo_cookies)
+
+        self.chk_warmup = QCheckBox("Прогревать кэш частых сайтов в простое")
+        self.chk_warmup.setChecked(self.cfg.get("cache", "warmup", fallback="false").strip().lower() == "true")
+        form.addRow("", self.chk_warmup)
+
+        self.chk_logs = QCheckBox("Включить логи")
+        self.chk_logs.setChecked(self.cfg.get("logs", "enabled", fallback="true").strip().lower() == "true")
+        form.addRow("Логи:", self.chk_logs)
+
+        self.spin_mb = QSpinBox()
         self.spin_mb.setRange(1, 500)
         self.spin_mb.setValue(clamp_int(self.cfg.get("logs", "max_mb", fallback=str(DEFAULT_LOG_MB)),
                                         DEFAULT_LOG_MB, 1, 500))
@@ -537,9 +3227,21 @@ class SettingsDialog(QDialog):
         btn_logs = QPushButton("Открыть")
         btn_logs.clicked.connect(lambda: os.startfile(str(LOG_DIR)))
         row2.addWidget(btn_logs)
+        btn_view = QPushButton("Просмотр")
+        btn_view.clicked.connect(lambda: LogViewerDialog(self).exec())
+        row2.addWidget(btn_view)
         layout.addLayout(row2)
 
-        note = QLabel("⚠ Для включения/выключения chromium.log нужен перезапуск.")
+        row3 = QHBoxLayout()
+        lab3 = QLabel(f"Папка кэша:\n{CACHE_DIR}")
+        lab3.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        row3.addWidget(lab3, 1)
+        btn_cache = QPushButton("Статистика")
+        btn_cache.clicked.connect(lambda: CacheStatsDialog(self.parent().profile, self).exec())
+        row3.addWidget(btn_cache)
+        layout.addLayout(row3)
+
+        note = QLabel("⚠ Для включения/выключения логов нужен перезапуск. Размер применяется сразу.")
         note.setStyleSheet("color: rgba(255,255,255,.7);")
         layout.addWidget(note)
 
@@ -554,6 +3256,17 @@ class SettingsDialog(QDialog):
     def get_tooltips_enabled(self) -> bool:
         return self.chk_tooltips.isChecked()
 
+    def get_blocking_enabled(self) -> bool:
+        return self.chk_blocking.isChecked()
+
+    def get_cache_policy(self) -> dict:
+        return {
+            "type": self.combo_cache.currentData(),
+            "max_mb": str(self.spin_cache_mb.value()),
+            "cookies": self.combo_cookies.currentData(),
+            "warmup": "true" if self.chk_warmup.isChecked() else "false",
+        }
+
     def get_logs_enabled(self) -> bool:
         return self.chk_logs.isChecked()
 
@@ -561,10 +3274,669 @@ class SettingsDialog(QDialog):
         return int(self.spin_mb.value())
 
 
+class BookmarkStore(QObject):
+    # GUI-сторона закладок: запись и импорт — через очередь BookmarkDb, чтение — страницами по индексу
+    QUICK_LIMIT = 60
+
+    changed = pyqtSignal()
+    imported = pyqtSignal(int, str)
+
+    def __init__(self, path: Optional[Path], legacy_links: Path, parent=None):
+        super().__init__(parent)
+        self.db: Optional[BookmarkDb] = None  # None — эфемерный режим: ссылки по умолчанию, без записи
+        self.needs_legacy = False
+        if path is None:
+            return
+        fresh = not path.exists()
+        self.db = BookmarkDb(path, self.changed.emit)
+        if fresh:
+            self._migrate(legacy_links)
+
+    def _migrate(self, legacy: Path):
+        # быстрые ссылки из quick_links.json (а если его нет — позже из localStorage старой start.html)
+        links = None
+        if legacy.exists():
+            try:
+                data = json.loads(legacy.read_text(encoding="utf-8"))
+                links = [it for it in data if isinstance(it, dict) and it.get("url")]
+            except Exception as e:
+                LOGGER.warning(f"bookmarks: {legacy.name} migration failed: {e}")
+        self.needs_legacy = links is None
+        self.replace_quick(links if links is not None else DEFAULT_QUICK_LINKS)
+        if links is not None:
+            try:
+                legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+            except OSError:
+                pass
+            LOGGER.info(f"bookmarks: {len(links)} quick links migrated from {legacy.name}")
+
+    def replace_quick(self, links):
+        if self.db is not None:
+            links = [it for it in links if isinstance(it, dict) and it.get("url")]
+            self.db.submit(self.db._replace_folder, QUICK_FOLDER, links, time.time())
+
+    def add(self, title: str, url: str, folder: int = QUICK_FOLDER, tags=()):
+        if self.db is not None:
+            self.db.submit(self.db._add, folder, title, url, list(tags), time.time())
+
+    def remove(self, bm_id: int):
+        if self.db is not None:
+            self.db.submit(self.db._remove, bm_id)
+
+    def move(self, bm_id: int, step: int):
+        if self.db is not None:
+            self.db.submit(self.db._move, bm_id, step)
+
+    def set_tags(self, bm_id: int, tags):
+        if self.db is not None:
+            self.db.submit(self.db._set_tags, bm_id, list(tags))
+
+    def import_file(self, path: str):
+        if self.db is not None:
+            self.db.submit(self.db._import, Path(path), self.imported.emit)
+
+    def quick(self):
+        # -> [(id, title, url)] первых QUICK_LIMIT быстрых ссылок
+        if self.db is None:
+            return [(-i - 1, it["title"], it["url"]) for i, it in enumerate(DEFAULT_QUICK_LINKS)]
+        return [r[:3] for r in self.db.children(QUICK_FOLDER, None, self.QUICK_LIMIT)]
+
+    def count(self, folder: int) -> int:
+        return self.db.count(folder) if self.db is not None else 0
+
+    def page(self, folder: int, after=None, limit: int = 200):
+        return self.db.children(folder, after, limit) if self.db is not None else []
+
+    def folder_tree(self):
+        return self.db.folder_tree() if self.db is not None else []
+
+    def search(self, text: str, limit: int = 500):
+        return self.db.search(text, limit) if self.db is not None else []
+
+    def tags_of(self, bm_id: int):
+        return self.db.tags_of(bm_id) if self.db is not None else []
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+
+
+class StartPageBridge(QObject):
+    # объект "start" в QWebChannel: данные стартовой страницы, изменения — событиями
+    settingsChanged = pyqtSignal(str)
+    linksChanged = pyqtSignal(str)
+    tilesChanged = pyqtSignal(str)
+
+    PAGE = 100
+
+    def __init__(self, store: BookmarkStore, settings: dict, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._settings = dict(settings)
+        self._tiles = []
+        store.changed.connect(lambda: self.linksChanged.emit(self.links))
+
+    @pyqtProperty(str, notify=settingsChanged)
+    def settings(self) -> str:
+        return json.dumps(self._settings, ensure_ascii=False)
+
+    def _links_state(self) -> dict:
+        # на странице только первые QUICK_LIMIT ссылок, остальное — в постраничном списке закладок
+        items = [{"id": i, "title": t, "url": u} for i, t, u in self.store.quick()]
+        return {"items": items, "total": max(len(items), self.store.count(QUICK_FOLDER))}
+
+    @pyqtProperty(str, notify=linksChanged)
+    def links(self) -> str:
+        return json.dumps(self._links_state(), ensure_ascii=False)
+
+    @pyqtProperty(str, notify=tilesChanged)
+    def tiles(self) -> str:
+        return json.dumps(self._tiles, ensure_ascii=False)
+
+    @pyqtSlot(str, str)
+    def addLink(self, title: str, url: str):
+        if title.strip() and url.strip():
+            self.store.add(title.strip(), url.strip())
+
+    @pyqtSlot(int)
+    def removeLink(self, bm_id: int):
+        self.store.remove(bm_id)
+
+    @pyqtSlot(result=str)
+    def folders(self) -> str:
+        return json.dumps([{"id": fid, "depth": depth, "title": title, "count": n}
+                           for fid, depth, title, n in self.store.folder_tree()], ensure_ascii=False)
+
+    @pyqtSlot(int, float, int, result=str)
+    def bookmarkPage(self, folder: int, after_pos: float, after_id: int) -> str:
+        # следующая страница папки после (position, id); after_id < 0 — с начала
+        rows = self.store.page(folder, (after_pos, after_id) if after_id >= 0 else None, self.PAGE + 1)
+        return json.dumps({
+            "rows": [{"id": i, "title": t, "url": u, "position": p} for i, t, u, p in rows[:self.PAGE]],
+            "more": len(rows) > self.PAGE,
+        }, ensure_ascii=False)
+
+    def set_settings(self, settings: dict):
+        if settings != self._settings:
+            self._settings = dict(settings)
+            self.settingsChanged.emit(self.settings)
+
+    def set_tiles(self, tiles):
+        if tiles != self._tiles:
+            self._tiles = list(tiles)
+            self.tilesChanged.emit(self.tiles)
+
+    def state_json(self) -> str:
+        raw = json.dumps({"settings": self._settings, "links": self._links_state(), "tiles": self._tiles},
+                         ensure_ascii=False)
+        return raw.replace("</", "<\\/")
+
+
+class AppSchemeHandler(QWebEngineUrlSchemeHandler):
+    # gdbrowse://<host>/...: маршрут по host -> fn(QUrl) -> (mime, bytes) или None
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.routes = {}
+
+    def add_route(self, host: str, fn):
+        self.routes[host] = fn
+
+    def requestStarted(self, job):
+        url = job.requestUrl()
+        fn = self.routes.get(url.host())
+        try:
+            res = fn(url) if fn is not None and job.requestMethod() == b"GET" else None
+        except Exception as e:
+            LOGGER.error(f"{APP_SCHEME.decode()}: {url.toString()} failed: {e}")
+            res = None
+        if res is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        mime, body = res
+        buf = QBuffer(job)
+        buf.setData(body)
+        buf.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(mime, buf)
+
+
+class StartPage(QObject):
+    # gdbrowse://start из памяти: HTML закодирован заранее и пересобирается только при смене данных
+    def __init__(self, profile: QWebEngineProfile, bookmarks: BookmarkStore, settings: dict, parent=None):
+        super().__init__(parent)
+        self.bridge = StartPageBridge(bookmarks, settings, self)
+        self.channel = QWebChannel(self)
+        self.channel.registerObject("start", self.bridge)
+
+        self.handler = AppSchemeHandler(self)
+        self.handler.add_route("start", self._serve)
+        profile.installUrlSchemeHandler(APP_SCHEME, self.handler)
+
+        html = START_HTML_TEMPLATE.replace("/*__QWEBCHANNEL__*/", self._qwebchannel_js())
+        head, _, tail = html.partition("/*__STATE__*/")
+        self._head = head.encode("utf-8")
+        self._tail = tail.encode("utf-8")
+        self._body: Optional[bytes] = None
+        self.bridge.settingsChanged.connect(self._invalidate)
+        self.bridge.linksChanged.connect(self._invalidate)
+        self.bridge.tilesChanged.connect(self._invalidate)
+
+    @staticmethod
+    def _qwebchannel_js() -> str:
+        f = QFile(":/qtwebchannel/qwebchannel.js")
+        if f.open(QIODevice.OpenModeFlag.ReadOnly):
+            try:
+                return bytes(f.readAll()).decode("utf-8").replace("</script", "<\\/script")
+            finally:
+                f.close()
+        LOGGER.warning("start page: qwebchannel.js resource not found")
+        return ""
+
+    def _invalidate(self, *_):
+        self._body = None
+
+    def _serve(self, url: QUrl):
+        if self._body is None:
+            self._body = self._head + self.bridge.state_json().encode("utf-8") + self._tail
+        return b"text/html", self._body
+
+
+class FaviconCache(QObject):
+    # два уровня: LRU декодированных QIcon в памяти -> FaviconStore на диске; вкладки одного сайта иконку не перекодируют
+    MEMORY_ITEMS = 256
+    ICON_PX = 32
+
+    def __init__(self, path: Optional[Path], parent=None):
+        super().__init__(parent)
+        self.store = FaviconStore(path) if path is not None else None  # None — только память
+        self._lru = OrderedDict()
+        self._saved = set()  # хосты, уже записанные в этой сессии
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, host: str, icon: QIcon):
+        self._lru[host] = icon
+        self._lru.move_to_end(host)
+        while len(self._lru) > self.MEMORY_ITEMS:
+            self._lru.popitem(last=False)
+
+    def icon_for(self, url: str) -> Optional[QIcon]:
+        host = url_host(url) if is_web_url(url) else ""
+        if not host:
+            return None
+        icon = self._lru.get(host)
+        if icon is not None:
+            self._lru.move_to_end(host)
+            self.memory_hits += 1
+            return icon
+        data = self.store.get(host) if self.store is not None else None
+        if data:
+            pm = QPixmap()
+            if pm.loadFromData(data):
+                icon = QIcon(pm)
+                self._remember(host, icon)
+                self.disk_hits += 1
+                return icon
+        self.misses += 1
+        return None
+
+    def put(self, url: str, icon: QIcon):
+        host = url_host(url) if is_web_url(url) else ""
+        if not host or icon.isNull():
+            return
+        self._remember(host, icon)
+        if host in self._saved or self.store is None:
+            return
+        self._saved.add(host)
+        buf = QBuffer()
+        buf.open(QIODevice.OpenModeFlag.WriteOnly)
+        if icon.pixmap(self.ICON_PX, self.ICON_PX).save(buf, "PNG"):
+            self.store.put(host, bytes(buf.data()))
+
+    def stats_text(self) -> str:
+        total = self.memory_hits + self.disk_hits + self.misses
+        rate = (self.memory_hits + self.disk_hits) / total * 100 if total else 0.0
+        return (f"favicons: hit rate {rate:.0f}% (memory={self.memory_hits}, disk={self.disk_hits}, "
+                f"miss={self.misses}), {len(self._lru)} in memory")
+
+    def close(self):
+        LOGGER.info(self.stats_text())
+        if self.store is not None:
+            self.store.close()
+
+
+class ThumbnailStore(QObject):
+    # снимки страниц для плиток стартовой. На GUI-нити только grab(); масштаб, JPEG и запись — в фоновой нити.
+    # Файлы названы по sha1 содержимого (одинаковые снимки хранятся один раз), index.json: host -> [sha1, снят, показан]
+    WIDTH = 320
+    HEIGHT = 200
+    QUALITY = 80
+    MAX_BYTES = 32 * 1024 * 1024
+    REFRESH_SEC = 6 * 3600
+    CAPTURE_DELAY_MS = 1500
+
+    saved = pyqtSignal(str)
+
+    def __init__(self, root: Optional[Path], parent=None):
+        super().__init__(parent)
+        self.root = root  # None — снимки не делаются (эфемерный режим)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.gui_ms = deque(maxlen=100)
+        self.index = {}
+        if root is not None:
+            self.index_path = root / "index.json"
+            try:
+                self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                LOGGER.warning(f"thumbnails: index load failed: {e}")
+        self._q = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="thumbnails", daemon=True)
+        self._thread.start()
+
+    def due(self, host: str) -> bool:
+        if self.root is None:
+            return False
+        with self._lock:
+            entry = self.index.get(host)
+        if host in self._pending:
+            return False
+        return entry is None or time.time() - entry[1] >= self.REFRESH_SEC
+
+    def capture(self, host: str, view: QWebEngineView):
+        t0 = time.perf_counter()
+        img = view.grab().toImage()
+        if img.isNull():
+            return
+        self._pending.add(host)
+        self._q.put((host, img))
+        self.gui_ms.append((time.perf_counter() - t0) * 1000)
+
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            host, img = item
+            try:
+                self._store(host, img)
+            except Exception as e:
+                LOGGER.warning(f"thumbnails: {host} failed: {e}")
+            finally:
+                self._pending.discard(host)
+
+    def _store(self, host: str, img):
+        small = img.scaled(
+            QSize(self.WIDTH, self.HEIGHT),
+            Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+            Qt.TransformationMode.SmoothTransformation,
+        ).copy(0, 0, self.WIDTH, self.HEIGHT)
+        buf = QBuffer()
+        buf.open(QIODevice.OpenModeFlag.WriteOnly)
+        if not small.save(buf, "JPEG", self.QUALITY):
+            return
+        data = bytes(buf.data())
+        digest = hashlib.sha1(data).hexdigest()
+        path = self.root / f"{digest}.jpg"
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            self.index[host] = [digest, now, now]
+            self._evict()
+            snapshot = json.dumps(self.index)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(snapshot, encoding="utf-8")
+        os.replace(tmp, self.index_path)
+        self.saved.emit(host)
+
+    def _evict(self):
+        # LRU по времени показа; файл удаляется, только когда на него не ссылается ни один host
+        sizes = {}
+        for digest, *_ in self.index.values():
+            if digest not in sizes:
+                try:
+                    sizes[digest] = (self.root / f"{digest}.jpg").stat().st_size
+                except OSError:
+                    sizes[digest] = 0
+        total = sum(sizes.values())
+        for host in sorted(self.index, key=lambda h: self.index[h][2]):
+            if total <= self.MAX_BYTES:
+                break
+            digest = self.index.pop(host)[0]
+            if all(e[0] != digest for e in self.index.values()):
+                total -= sizes.get(digest, 0)
+                try:
+                    (self.root / f"{digest}.jpg").unlink()
+                except OSError:
+                    pass
+
+    def digest(self, host: str) -> str:
+        with self._lock:
+            entry = self.index.get(host)
+        return entry[0] if entry else ""
+
+    def serve(self, url: QUrl):
+        # gdbrowse://thumb/<host>
+        host = url.path().lstrip("/")
+        with self._lock:
+            entry = self.index.get(host)
+            if entry is None:
+                return None
+            entry[2] = time.time()
+        try:
+            return b"image/jpeg", (self.root / f"{entry[0]}.jpg").read_bytes()
+        except OSError:
+            return None
+
+    def stats_text(self) -> str:
+        if not self.gui_ms:
+            return "thumbnails: no captures"
+        ms = sorted(self.gui_ms)
+        return (f"thumbnails: {len(self.index)} hosts, GUI-thread capture p50={ms[len(ms) // 2]:.1f} ms, "
+                f"max={ms[-1]:.1f} ms")
+
+    def close(self):
+        LOGGER.info(self.stats_text())
+        self._q.put(None)
+        self._thread.join(timeout=5)
+
+
+# собирается в изолированном мире (сайт его не видит) и уходит в Python одним console.debug с токеном запуска
+PERF_JS = r"""
+(function(){
+  if (window.top !== window || !/^https?:$/.test(location.protocol)) return;
+  const PREFIX = "%PREFIX%";
+  const m = {long_tasks: 0, long_tasks_ms: 0};
+  let sent = false;
+  function observe(type, fn){
+    try { new PerformanceObserver((list) => fn(list.getEntries())).observe({type: type, buffered: true}); }
+    catch (e) {}
+  }
+  observe("paint", (es) => { for (const e of es) if (e.name === "first-contentful-paint") m.fcp = e.startTime; });
+  observe("largest-contentful-paint", (es) => { if (es.length) m.lcp = es[es.length - 1].startTime; });
+  observe("longtask", (es) => { for (const e of es) { m.long_tasks++; m.long_tasks_ms += e.duration; } });
+  function send(){
+    if (sent) return;
+    sent = true;
+    const nav = performance.getEntriesByType("navigation")[0];
+    if (nav) {
+      if (nav.responseStart > 0) m.ttfb = nav.responseStart;
+      if (nav.domContentLoadedEventEnd > 0) m.dcl = nav.domContentLoadedEventEnd;
+      if (nav.loadEventEnd > 0) m.load = nav.loadEventEnd;
+    }
+    const res = performance.getEntriesByType("resource");
+    m.resources = res.length;
+    m.transfer_bytes = res.reduce((a, r) => a + (r.transferSize || 0), nav ? (nav.transferSize || 0) : 0);
+    console.debug(PREFIX + JSON.stringify(m));
+  }
+  addEventListener("load", () => setTimeout(send, 5000));
+  addEventListener("pagehide", send);
+  document.addEventListener("visibilitychange", () => { if (document.visibilityState === "hidden") send(); });
+})();
+"""
+
+PERF_PAGE_CSS = """
+body{ font-family: system-ui, Segoe UI, Roboto, Arial, sans-serif; background:#0f111a; color:#e7eaf0; margin:24px; }
+h1{ font-size:22px; margin:0 0 6px 0; }
+a{ color:#7aa2ff; }
+table{ border-collapse:collapse; margin-top:16px; font-size:13px; }
+th,td{ padding:6px 10px; border-bottom:1px solid #232a3a; text-align:right; white-space:nowrap; }
+th:first-child,td:first-child{ text-align:left; }
+th{ color:#9aa3b5; font-weight:600; }
+.muted{ color:#9aa3b5; font-size:13px; }
+"""
+
+
+class PerfTelemetry(QObject):
+    # метрики загрузки страниц: скрипт в профиле -> console.debug -> PerfStats; gdbrowse://perf — отчёт и экспорт
+    SAVE_EVERY_MS = 30000
+    PAGE_METRICS = ("ttfb", "fcp", "lcp", "load")
+
+    def __init__(self, profile: QWebEngineProfile, parent=None):
+        super().__init__(parent)
+        self.prefix = f"__gdperf:{uuid.uuid4().hex}:"
+        self.stats = PerfStats(persistent(PERF_STATS_PATH))
+
+        script = QWebEngineScript()
+        script.setName("gd-perf")
+        script.setSourceCode(PERF_JS.replace("%PREFIX%", self.prefix))
+        script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+        script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+        script.setRunsOnSubFrames(False)
+        profile.scripts().insert(script)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.SAVE_EVERY_MS)
+        self.timer.timeout.connect(self.stats.save)
+        self.timer.start()
+
+    def report(self, page_url: str, payload: str):
+        host = url_host(page_url) if is_web_url(page_url) else ""
+        if not host:
+            return
+        try:
+            sample = json.loads(payload)
+        except Exception:
+            return
+        if isinstance(sample, dict):
+            self.stats.add(host, sample)
+
+    def serve(self, url: QUrl):
+        path = url.path()
+        if path == "/export.csv":
+            return b"text/csv", self.stats.export_csv().encode("utf-8")
+        if path == "/export.json":
+            return b"application/json", self.stats.export_json().encode("utf-8")
+        if path not in ("", "/"):
+            return None
+        return b"text/html", self.render().encode("utf-8")
+
+    def render(self) -> str:
+        head = "".join(f"<th colspan=3>{m}</th>" for m in self.PAGE_METRICS)
+        sub = "".join("<th>p50</th><th>p95</th><th>p99</th>" for _ in self.PAGE_METRICS)
+        body = []
+        for host, samples, pct, cnt in self.stats.summary():
+            cells = "".join(f"<td>{v:.0f}</td>" for m in self.PAGE_METRICS for v in pct[m])
+            body.append(f"<tr><td>{html_escape(host)}</td><td>{samples}</td>{cells}"
+                        f"<td>{cnt['resources'] // max(samples, 1)}</td>"
+                        f"<td>{cnt['long_tasks'] / max(samples, 1):.1f}</td></tr>")
+        return (
+            "<!doctype html><html lang=ru><head><meta charset=utf-8><title>Производительность</title>"
+            f"<style>{PERF_PAGE_CSS}</style></head><body>"
+            "<h1>Скорость загрузки страниц</h1>"
+            "<div class=muted>Время в мс от начала навигации. "
+            "<a href='gdbrowse://perf/export.csv'>CSV</a> · <a href='gdbrowse://perf/export.json'>JSON</a></div>"
+            f"<table><tr><th rowspan=2>Сайт</th><th rowspan=2>Загрузок</th>{head}"
+            "<th rowspan=2>Ресурсов</th><th rowspan=2>Long tasks</th></tr>"
+            f"<tr>{sub}</tr>{''.join(body)}</table></body></html>"
+        )
+
+    def close(self):
+        self.stats.save()
+
+
+_RT = QWebEngineUrlRequestInfo.ResourceType
+RESOURCE_KINDS = {
+    _RT.ResourceTypeScript: "script",
+    _RT.ResourceTypeImage: "image",
+    _RT.ResourceTypeFavicon: "image",
+    _RT.ResourceTypeStylesheet: "stylesheet",
+    _RT.ResourceTypeXhr: "xmlhttprequest",
+    _RT.ResourceTypeSubFrame: "subdocument",
+    _RT.ResourceTypeFontResource: "font",
+    _RT.ResourceTypeMedia: "media",
+    _RT.ResourceTypeObject: "object",
+    _RT.ResourceTypePluginResource: "object",
+    _RT.ResourceTypePing: "ping",
+    _RT.ResourceTypeCspReport: "ping",
+}
+# размер заблокированного ответа неизвестен (запрос не уходит в сеть) — оценка по медианам типов ресурсов
+BLOCKED_SIZE_ESTIMATE = {
+    "script": 22 * 1024, "image": 12 * 1024, "stylesheet": 10 * 1024, "xmlhttprequest": 2 * 1024,
+    "subdocument": 30 * 1024, "font": 25 * 1024, "media": 100 * 1024, "object": 20 * 1024,
+    "ping": 0, "other": 2 * 1024,
+}
+
+
+class ContentBlocker(QObject):
+    # общий для профиля движок фильтров; компилируется в фоне, до готовности запросы не трогаем
+    def __init__(self, enabled: bool, parent=None):
+        super().__init__(parent)
+        self.enabled = enabled
+        self.engine: Optional[FilterEngine] = None
+        self.blocked_total = 0
+        self.blocked_bytes_total = 0
+        self._loading = False
+        if enabled:
+            self.load()
+
+    def load(self):
+        if self._loading or self.engine is not None:
+            return
+        self._loading = True
+        threading.Thread(target=self._load, name="filters", daemon=True).start()
+
+    def _load(self):
+        t0 = time.perf_counter()
+        try:
+            engine, cached = FilterEngine.load(FILTERS_DIR, persistent(FILTERS_CACHE_PATH))
+        except Exception as e:
+            LOGGER.error(f"filters: load failed: {e}")
+            return
+        finally:
+            self._loading = False
+        self.engine = engine
+        LOGGER.info(f"filters: {engine.rule_count} rules ({'cache' if cached else 'compiled'}) "
+                    f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        if enabled:
+            self.load()
+
+
+class PageRequestInterceptor(QWebEngineUrlRequestInterceptor):
+    # по перехватчику на страницу: у запроса нет ссылки на вкладку, а счётчики нужны по вкладкам
+    def __init__(self, blocker: ContentBlocker, parent=None):
+        super().__init__(parent)
+        self.blocker = blocker
+        self.blocked = 0
+        self.blocked_bytes = 0
+        self.requests = 0
+
+    def interceptRequest(self, info):
+        self.requests += 1
+        engine = self.blocker.engine
+        if engine is None or not self.blocker.enabled:
+            return
+        rtype = info.resourceType()
+        if rtype == _RT.ResourceTypeMainFrame:
+            # новая страница во вкладке — счётчики с нуля; сами документы не блокируем
+            self.blocked = 0
+            self.blocked_bytes = 0
+            return
+        url = info.requestUrl()
+        kind = RESOURCE_KINDS.get(rtype, "other")
+        if engine.should_block(url.toString(), url.host(), info.firstPartyUrl().host(), kind):
+            info.block(True)
+            size = BLOCKED_SIZE_ESTIMATE.get(kind, 0)
+            self.blocked += 1
+            self.blocked_bytes += size
+            self.blocker.blocked_total += 1
+            self.blocker.blocked_bytes_total += size
+
+
 class BrowserPage(QWebEnginePage):
-    def __init__(self, profile: QWebEngineProfile, new_tab_page_callback):
+    def __init__(self, profile: QWebEngineProfile, new_tab_page_callback,
+                 blocker: Optional[ContentBlocker] = None, channel: Optional[QWebChannel] = None,
+                 perf: Optional[PerfTelemetry] = None):
         super().__init__(profile)
         self._new_tab_page_callback = new_tab_page_callback
+        self._channel = channel
+        self._perf = perf
+        self.interceptor: Optional[PageRequestInterceptor] = None
+        if blocker is not None:
+            self.interceptor = PageRequestInterceptor(blocker, self)
+            self.setUrlRequestInterceptor(self.interceptor)
+
+    def acceptNavigationRequest(self, url, nav_type, is_main_frame):
+        if is_main_frame and self._channel is not None:
+            # мост только для своих страниц: сайтам объект настроек не виден
+            want = self._channel if url.scheme() == APP_SCHEME.decode() else None
+            if self.webChannel() is not want:
+                self.setWebChannel(want)
+        return super().acceptNavigationRequest(url, nav_type, is_main_frame)
+
+    def javaScriptConsoleMessage(self, level, message, line, source):
+        if self._perf is not None and message.startswith(self._perf.prefix):
+            self._perf.report(self.url().toString(), message[len(self._perf.prefix):])
+            return
+        super().javaScriptConsoleMessage(level, message, line, source)
 
     def createWindow(self, window_type):
         # middle-click / target=_blank / window.open -> вкладка в фоне
@@ -572,10 +3944,50 @@ class BrowserPage(QWebEnginePage):
 
 
 class BrowserTab(QWidget):
-    def __init__(self, profile: QWebEngineProfile, new_tab_page_callback, url: str):
+    _next_uid = 1
+
+    def __init__(self, profile: QWebEngineProfile, new_tab_page_callback, url: str,
+                 title: str = "", lazy: bool = False, history: Optional[QByteArray] = None,
+                 blocker: Optional[ContentBlocker] = None, channel: Optional[QWebChannel] = None,
+                 perf: Optional[PerfTelemetry] = None):
         super().__init__()
+        self.uid = BrowserTab._next_uid
+        BrowserTab._next_uid += 1
+
+        self._profile = profile
+        self._new_tab_page_callback = new_tab_page_callback
+        self._blocker = blocker
+        self._channel = channel
+        self._perf = perf
+        self.url = url
+        self.title = title
+        self.view: Optional[QWebEngineView] = None
+        self.page: Optional[BrowserPage] = None
+        self.history_blob = history
+        self.connections = []
+
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+        self.pinned = False
+        self.form_dirty = False
+        self.last_active = time.monotonic()
+        self.pending_scroll: Optional[QPointF] = None
+        self.loading = False
+        self.crashed = False  # рендерер упал, ждём перезагрузки
+        self.hog = False      # рендерер долго держит CPU на пределе
+
+        if not lazy:
+            self.materialize()
+
+    def materialize(self) -> bool:
+        # ленивая вкладка (восстановленная из сессии) получает view/page только при первом выборе
+        if self.view is not None:
+            return False
+
         self.view = QWebEngineView()
-        self.page = BrowserPage(profile, new_tab_page_callback)
+        self.page = BrowserPage(self._profile, self._new_tab_page_callback, self._blocker, self._channel,
+                                self._perf)
         self.view.setPage(self.page)
 
         self.view.settings().setAttribute(QWebEngineSettings.WebAttribute.FullScreenSupportEnabled, False)
@@ -584,11 +3996,1816 @@ class BrowserTab(QWidget):
         except Exception:
             pass
 
+        self._layout.addWidget(self.view)
+        if self.history_blob is not None:
+            # переоткрытая вкладка: история назад/вперёд вместе с текущей страницей
+            stream = QDataStream(self.history_blob, QIODevice.OpenModeFlag.ReadOnly)
+            stream >> self.page.history()
+            self.history_blob = None
+        else:
+            self.view.setUrl(QUrl(self.url))
+        return True
+
+    def adopt_page(self, page: BrowserPage):
+        # готовая (предзагруженная) страница вместо текущей; сигналы view переключаются сами
+        old = self.page
+        page._new_tab_page_callback = self._new_tab_page_callback
+        page.setAudioMuted(False)
+        self.page = page
+        self.view.setPage(page)
+        if old is not None:
+            old.deleteLater()
+
+    def serialize_history(self) -> Optional[QByteArray]:
+        if self.page is None:
+            return None
+        blob = QByteArray()
+        stream = QDataStream(blob, QIODevice.OpenModeFlag.WriteOnly)
+        try:
+            stream << self.page.history()
+        except Exception:
+            return None
+        return blob
+
+    def teardown(self):
+        for c in self.connections:
+            try:
+                QObject.disconnect(c)
+            except Exception:
+                pass
+        self.connections.clear()
+
+        # страница удаляется раньше view и профиля, иначе рендерер живёт до выхода
+        if self.page is not None:
+            self.page.deleteLater()
+        if self.view is not None:
+            self.view.deleteLater()
+        self.page = None
+        self.view = None
+        self.deleteLater()
+
+
+# JS: есть ли на странице несохранённый ввод в формах
+FORM_DIRTY_JS = r"""
+(function(){
+  var els = document.querySelectorAll('input,textarea,select');
+  for (var i = 0; i < els.length; i++) {
+    var e = els[i];
+    if (e.type === 'hidden' || e.type === 'submit' || e.type === 'button') continue;
+    if (e.type === 'checkbox' || e.type === 'radio') {
+      if (e.checked !== e.defaultChecked) return true;
+    } else if (e.tagName === 'SELECT') {
+      for (var j = 0; j < e.options.length; j++)
+        if (e.options[j].selected !== e.options[j].defaultSelected) return true;
+    } else if (e.value !== e.defaultValue) {
+      return true;
+    }
+  }
+  var a = document.activeElement;
+  return !!(a && a.isContentEditable);
+})();
+"""
+
+
+class TabLifecycleManager(QObject):
+    # фоновые вкладки: Active -> Frozen после простоя, -> Discarded при превышении бюджета памяти (LRU)
+    def __init__(self, browser, freeze_after_sec: int, memory_budget_mb: int, interval_ms: int = 10000):
+        super().__init__(browser)
+        self.browser = browser
+        self.freeze_after_sec = freeze_after_sec
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+
+        self.frozen_count = 0
+        self.discarded_count = 0
+        self.reclaimed_bytes = 0
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start()
+
+    def _all_tabs(self):
+        tabs = self.browser.tabs
+        return [w for w in (tabs.widget(i) for i in range(tabs.count())) if w is not None and w.view is not None]
+
+    def _state(self, tab):
+        return tab.page.lifecycleState()
+
+    def _evictable(self, tab) -> bool:
+        # всё, кроме форм: их состояние проверяется JS только перед самой заморозкой/выгрузкой
+        if tab is self.browser.current_tab() or tab.pinned:
+            return False
+        try:
+            if tab.page.recentlyAudible():
+                return False
+        except Exception:
+            pass
+        return True
+
+    def _can_evict(self, tab) -> bool:
+        return self._evictable(tab) and not tab.form_dirty
+
+    def tick(self):
+        now = time.monotonic()
+        current = self.browser.current_tab()
+        for tab in self._all_tabs():
+            if not tab or tab is current or self._state(tab) != QWebEnginePage.LifecycleState.Active:
+                continue
+            # JS запускаем только у вкладок, которые сейчас будут заморожены — остальные рендереры не будим
+            if now - tab.last_active >= self.freeze_after_sec and self._evictable(tab):
+                self.check_forms(tab, self.freeze)
+        self.enforce_budget()
+
+    def check_forms(self, tab, then):
+        def done(dirty, tab=tab):
+            if tab.view is None:
+                return
+            tab.form_dirty = bool(dirty)
+            then(tab)
+
+        tab.page.runJavaScript(FORM_DIRTY_JS, done)
+
+    def freeze(self, tab):
+        # замороженная страница JS уже не выполнит, form_dirty должен быть свежим
+        if not self._can_evict(tab) or self._state(tab) != QWebEnginePage.LifecycleState.Active:
+            return
+        tab.pending_scroll = tab.page.scrollPosition()
+        try:
+            tab.page.setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+        except Exception as e:
+            LOGGER.warning(f"freeze failed: {e}")
+            return
+        self.frozen_count += 1
+        LOGGER.info(f"tab frozen: {tab.view.url().toString()} | {self.stats_text()}")
+
+    def renderer_usage(self):
+        # rss по pid; несколько вкладок могут делить один рендерер
+        by_pid = {}
+        for tab in self._all_tabs():
+            if not tab or self._state(tab) == QWebEnginePage.LifecycleState.Discarded:
+                continue
+            pid = tab.page.renderProcessPid()
+            if pid and pid not in by_pid:
+                by_pid[pid] = process_rss_bytes(pid)
+        return by_pid
+
+    def enforce_budget(self):
+        if self.memory_budget_bytes <= 0:
+            return
+        by_pid = self.renderer_usage()
+        total = sum(by_pid.values())
+        if total <= self.memory_budget_bytes:
+            return
+
+        # у замороженных form_dirty снят перед заморозкой; активные проверяются перед выгрузкой
+        candidates = [
+            t for t in self._all_tabs()
+            if t and self._state(t) != QWebEnginePage.LifecycleState.Discarded and self._evictable(t)
+            and not (t.form_dirty and self._state(t) == QWebEnginePage.LifecycleState.Frozen)
+        ]
+        candidates.sort(key=lambda t: t.last_active)
+
+        for tab in candidates:
+            if total <= self.memory_budget_bytes:
+                break
+            pid = tab.page.renderProcessPid()
+            sharing = [
+                t for t in self._all_tabs()
+                if t and t is not tab and self._state(t) != QWebEnginePage.LifecycleState.Discarded
+                and t.page.renderProcessPid() == pid
+            ]
+            freed = 0 if sharing else by_pid.pop(pid, 0)
+            if self._state(tab) == QWebEnginePage.LifecycleState.Active:
+                # если форма окажется заполненной, вкладку пропускаем — недостачу доберёт следующий tick
+                self.check_forms(tab, lambda t, freed=freed: self._discard_checked(t, freed))
+            else:
+                self.discard(tab, freed)
+            total -= freed
+
+    def _discard_checked(self, tab, freed_bytes: int):
+        if self._can_evict(tab) and self._state(tab) != QWebEnginePage.LifecycleState.Discarded:
+            self.discard(tab, freed_bytes)
+
+    def discard(self, tab, freed_bytes: int = 0):
+        if self._state(tab) == QWebEnginePage.LifecycleState.Active:
+            tab.pending_scroll = tab.page.scrollPosition()
+        try:
+            # в Discarded переводим через Frozen
+            if self._state(tab) == QWebEnginePage.LifecycleState.Active:
+                tab.page.setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+            tab.page.setLifecycleState(QWebEnginePage.LifecycleState.Discarded)
+        except Exception as e:
+            LOGGER.warning(f"discard failed: {e}")
+            return
+        self.discarded_count += 1
+        self.reclaimed_bytes += freed_bytes
+        LOGGER.info(f"tab discarded: {tab.view.url().toString()} | {self.stats_text()}")
+
+    def activate(self, tab):
+        tab.last_active = time.monotonic()
+        state = self._state(tab)
+        if state == QWebEnginePage.LifecycleState.Active:
+            return
+        try:
+            # Discarded -> Active перезагружает страницу с сохранённой историей
+            tab.page.setLifecycleState(QWebEnginePage.LifecycleState.Active)
+        except Exception as e:
+            LOGGER.warning(f"activate failed: {e}")
+        if state == QWebEnginePage.LifecycleState.Frozen:
+            tab.pending_scroll = None
+
+    def deactivate(self, tab):
+        # вкладку только что покинули: отсюда отсчитывается freeze_after_sec и порядок LRU
+        tab.last_active = time.monotonic()
+
+    def frozen_now(self) -> int:
+        return sum(1 for t in self._all_tabs() if t and self._state(t) == QWebEnginePage.LifecycleState.Frozen)
+
+    def discarded_now(self) -> int:
+        return sum(1 for t in self._all_tabs() if t and self._state(t) == QWebEnginePage.LifecycleState.Discarded)
+
+    def stats_text(self) -> str:
+        return (
+            f"frozen now={self.frozen_now()} total={self.frozen_count}, "
+            f"discarded now={self.discarded_now()} total={self.discarded_count}, "
+            f"reclaimed={self.reclaimed_bytes // (1024 * 1024)} MB"
+        )
+
+
+CRASH_PAGE_HTML = """<!doctype html>
+<html lang="ru"><head><meta charset="utf-8"><title>{title}</title>
+<style>
+  body{{margin:0;height:100vh;display:flex;align-items:center;justify-content:center;
+       font-family:system-ui,-apple-system,Segoe UI,Roboto,Arial,sans-serif;background:#f7d9b5;color:#2b2b2b}}
+  .c{{max-width:560px;padding:24px}} a{{color:#c46f0c}} .u{{color:rgba(0,0,0,.55);font-size:13px;word-break:break-all}}
+</style></head>
+<body><div class="c"><h2>{title}</h2><p>{text}</p><p class="u">{url}</p><p><a href="{href}">Попробовать снова</a></p></div></body>
+</html>
+"""
+
+
+class RendererWatchdog(QObject):
+    # упавший рендерер: перезагрузка с нарастающей паузой, серия падений — лёгкая страница ошибки;
+    # плюс опрос памяти/CPU рендереров и реакция на пороги из [watchdog]
+    SAMPLE_SEC = 5.0
+    BACKOFF_BASE_MS = 1000
+    BACKOFF_MAX_MS = 30000
+    ACTION_COOLDOWN_SEC = 60
+    MEMORY_ACTIONS = ("discard", "reload", "log")
+    REASONS = {
+        "loop": ("Страница постоянно падает",
+                 "Процесс страницы завершался несколько раз подряд, автоматическая перезагрузка остановлена."),
+        "killed": ("Процесс страницы завершён", "Процесс вкладки был завершён вручную."),
+        "crashed": ("Процесс страницы завершился", "Автоматическая перезагрузка отключена в настройках."),
+    }
+
+    sampled = pyqtSignal(object)
+
+    def __init__(self, browser, cfg: configparser.ConfigParser):
+        super().__init__(browser)
+        self.browser = browser
+
+        def num(key, d, lo, hi):
+            return clamp_int(cfg.get("watchdog", key, fallback=str(d)), d, lo, hi)
+
+        self.auto_reload = cfg.get("watchdog", "auto_reload", fallback="true").strip().lower() == "true"
+        self.max_crashes = num("max_crashes", DEFAULT_MAX_CRASHES, 1, 100)
+        self.crash_window_sec = num("crash_window_sec", DEFAULT_CRASH_WINDOW_SEC, 10, 86400)
+        self.memory_bytes = num("memory_mb", DEFAULT_RENDERER_MEMORY_MB, 0, 1024 * 1024) * 1024 * 1024
+        self.memory_action = cfg.get("watchdog", "memory_action", fallback="discard").strip().lower()
+        if self.memory_action not in self.MEMORY_ACTIONS:
+            self.memory_action = "discard"
+        # CPU% процесса может быть больше 100 (несколько потоков); 0 — не следить
+        self.cpu_percent = num("cpu_percent", DEFAULT_RENDERER_CPU_PERCENT, 0, 10000)
+        self.cpu_sec = num("cpu_sec", DEFAULT_RENDERER_CPU_SEC, 5, 86400)
+
+        self.crashes = {}          # uid вкладки -> deque(monotonic) падений в окне
+        self.user_killed = set()   # uid вкладок, чей рендерер завершили из диспетчера задач
+        self._hot = {}             # pid -> monotonic начала непрерывной загрузки CPU
+        self._acted = {}           # pid -> monotonic последнего действия по памяти
+
+        self.reloads = 0
+        self.loops = 0
+        self.memory_actions = 0
+        self.cpu_flags = 0
+
+        self.sampler: Optional[ProcessSampler] = None
+        if self.memory_bytes > 0 or self.cpu_percent > 0:
+            # первый опрос пустой, дальше список pid обновляется после каждого
+            self.sampled.connect(self.on_sampled)
+            self.sampler = ProcessSampler(self.SAMPLE_SEC, self.sampled.emit)
+
+    def _tabs(self):
+        tabs = self.browser.tabs
+        return [w for w in (tabs.widget(i) for i in range(tabs.count())) if w is not None and w.page is not None]
+
+    @staticmethod
+    def _describe(tab) -> str:
+        return f"tab#{tab.uid} {tab.url} ({tab.title[:60]!r})"
+
+    def wire(self, tab):
+        return tab.page.renderProcessTerminated.connect(
+            lambda status, code, tab=tab: self.on_terminated(tab, status, code))
+
+    def note_user_kill(self, pid: int):
+        for tab in self._tabs():
+            if tab.page.renderProcessPid() == pid:
+                self.user_killed.add(tab.uid)
+
+    def on_terminated(self, tab, status, code: int):
+        st = QWebEnginePage.RenderProcessTerminationStatus
+        if status == st.NormalTerminationStatus or tab.view is None \
+                or tab.page.lifecycleState() == QWebEnginePage.LifecycleState.Discarded:
+            return
+        name = {
+            st.AbnormalTerminationStatus: "abnormal",
+            st.CrashedTerminationStatus: "crashed",
+            st.KilledTerminationStatus: "killed",
+        }.get(status, str(status))
+        tab.loading = False
+        if tab.uid in self.user_killed:
+            self.user_killed.discard(tab.uid)
+            LOGGER.warning(f"watchdog: renderer killed by user (exit {code}) — {self._describe(tab)}")
+            self.show_error(tab, "killed")
+            return
+        if not self.auto_reload:
+            LOGGER.warning(f"watchdog: renderer {name} (exit {code}) — {self._describe(tab)}, auto reload off")
+            self.show_error(tab, "crashed")
+            return
+
+        now = time.monotonic()
+        hist = self.crashes.setdefault(tab.uid, deque())
+        hist.append(now)
+        while now - hist[0] > self.crash_window_sec:
+            hist.popleft()
+        n = len(hist)
+        if n >= self.max_crashes:
+            # серия оборвана: «Попробовать снова» на странице ошибки снова даёт max_crashes попыток
+            hist.clear()
+            self.loops += 1
+            LOGGER.error(f"watchdog: crash loop — renderer {name} (exit {code}) {n} times in "
+                         f"{self.crash_window_sec} s, showing error page — {self._describe(tab)}")
+            self.show_error(tab, "loop")
+            return
+        delay = min(self.BACKOFF_MAX_MS, self.BACKOFF_BASE_MS * 2 ** (n - 1))
+        LOGGER.warning(f"watchdog: renderer {name} (exit {code}), crash {n}/{self.max_crashes}, "
+                       f"reload in {delay} ms — {self._describe(tab)}")
+        tab.crashed = True
+        url = tab.url
+        QTimer.singleShot(delay, lambda: self._recover(tab, url))
+
+    def _recover(self, tab, url: str):
+        if not tab.crashed or tab.view is None or tab.url != url:
+            return
+        # фоновая вкладка перезагрузится при выборе — упавшие рендереры не поднимаются все разом
+        if tab is self.browser.current_tab():
+            self._reload(tab)
+
+    def on_activated(self, tab):
+        if tab.crashed and tab.view is not None:
+            self._reload(tab)
+
+    def _reload(self, tab):
+        tab.crashed = False
+        self.reloads += 1
+        LOGGER.info(f"watchdog: reloading {self._describe(tab)}")
+        tab.view.reload()
+
+    def show_error(self, tab, reason: str):
+        tab.crashed = False
+        q = QUrlQuery()
+        q.addQueryItem("reason", reason)
+        q.addQueryItem("url", encode_query(tab.url))
+        url = QUrl(f"{APP_SCHEME.decode()}://crash/")
+        url.setQuery(q)
+        tab.view.setUrl(url)
+
+    def serve(self, url: QUrl):
+        # gdbrowse://crash/?reason=...&url=...
+        q = QUrlQuery(url)
+        target = QUrl.fromPercentEncoding(
+            q.queryItemValue("url", QUrl.ComponentFormattingOption.FullyEncoded).encode("utf-8"))
+        title, text = self.REASONS.get(q.queryItemValue("reason"), self.REASONS["loop"])
+        html = CRASH_PAGE_HTML.format(
+            title=html_escape(title), text=html_escape(text), url=html_escape(target),
+            href=html_escape(target if is_web_url(target) else HOME_URL),
+        )
+        return b"text/html", html.encode("utf-8")
+
+    def on_sampled(self, usage):
+        now = time.monotonic()
+        by_pid = {}
+        for tab in self._tabs():
+            if tab.page.lifecycleState() == QWebEnginePage.LifecycleState.Discarded:
+                continue
+            pid = tab.page.renderProcessPid()
+            if pid:
+                by_pid.setdefault(pid, []).append(tab)
+        for pid, (rss, cpu) in usage.items():
+            tabs = by_pid.get(pid)
+            if not tabs:
+                continue
+            if self.memory_bytes and rss > self.memory_bytes:
+                self._over_memory(pid, rss, tabs, now)
+            if self.cpu_percent:
+                self._check_cpu(pid, cpu, tabs, now)
+        for gone in (self._hot, self._acted):
+            for pid in [p for p in gone if p not in by_pid]:
+                del gone[pid]
+        self.sampler.set_pids(by_pid)
+
+    def _over_memory(self, pid: int, rss: int, tabs, now: float):
+        if now - self._acted.get(pid, -math.inf) < self.ACTION_COOLDOWN_SEC:
+            return
+        self._acted[pid] = now
+        self.memory_actions += 1
+        current = self.browser.current_tab()
+        action = self.memory_action
+        if action != "log" and current in tabs and rss < 2 * self.memory_bytes:
+            # видимую вкладку трогаем только при двукратном превышении, до этого — предупреждение
+            action = "log"
+            self.browser.statusBar().showMessage(f"Вкладка занимает {format_bytes(rss)} памяти", 15000)
+        LOGGER.warning(f"watchdog: renderer {pid} rss={format_bytes(rss)} over {format_bytes(self.memory_bytes)}, "
+                       f"action={action} — " + "; ".join(self._describe(t) for t in tabs))
+        for tab in tabs:
+            if action == "log":
+                continue
+            if action == "discard" and tab is not current:
+                self._discard(tab, rss if len(tabs) == 1 else 0)
+            else:
+                tab.view.reload()
+
+    def _discard(self, tab, freed_bytes: int):
+        # те же правила, что у бюджета памяти: закреплённые, звучащие и вкладки с заполненной формой не выгружаем
+        lc = self.browser.lifecycle
+        state = lc._state(tab)
+        if state == QWebEnginePage.LifecycleState.Discarded:
+            return
+        if not lc._evictable(tab):
+            LOGGER.info(f"watchdog: discard skipped (current, pinned or audible) — {self._describe(tab)}")
+            return
+
+        def checked(t):
+            if t.form_dirty:
+                LOGGER.info(f"watchdog: discard skipped (unsaved form input) — {self._describe(t)}")
+            lc._discard_checked(t, freed_bytes)
+
+        if state == QWebEnginePage.LifecycleState.Frozen:
+            checked(tab)  # замороженная страница JS не выполнит; form_dirty снят перед заморозкой
+        else:
+            lc.check_forms(tab, checked)
+
+    def _check_cpu(self, pid: int, cpu: float, tabs, now: float):
+        if cpu < self.cpu_percent:
+            if self._hot.pop(pid, None) is not None:
+                for tab in tabs:
+                    if tab.hog:
+                        tab.hog = False
+                        self.browser.set_tab_title(tab, tab.title, record=False)
+                        LOGGER.info(f"watchdog: renderer {pid} CPU back to {cpu:.0f}% — {self._describe(tab)}")
+            return
+        start = self._hot.setdefault(pid, now)
+        if now - start < self.cpu_sec or all(t.hog for t in tabs):
+            return
+        self.cpu_flags += 1
+        LOGGER.warning(f"watchdog: renderer {pid} at {cpu:.0f}% CPU for {now - start:.0f} s — "
+                       + "; ".join(self._describe(t) for t in tabs))
+        for tab in tabs:
+            tab.hog = True
+            self.browser.set_tab_title(tab, tab.title, record=False)
+        self.browser.statusBar().showMessage("Вкладка загружает процессор (⚠ на вкладке)", 15000)
+
+    def stats_text(self) -> str:
+        return (f"watchdog: {self.reloads} crash reloads, {self.loops} crash loops, "
+                f"{self.memory_actions} memory actions, {self.cpu_flags} CPU flags")
+
+    def close(self):
+        if self.sampler is not None:
+            self.sampler.close()
+        LOGGER.info(self.stats_text())
+
+
+class SuggestionModel(QAbstractListModel):
+    # держит только текущие top-K подсказок, индекс живёт в PrefixIndex
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        url, title = self.rows[index.row()][:2]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{title} — {url}" if title else url
+        if role == Qt.ItemDataRole.EditRole:
+            return url
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return url
+        return None
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+
+class SearchSuggester(QObject):
+    # подсказки поисковика: запрос уходит после паузы в наборе; в полёте не больше одного запроса,
+    # устаревший ответ не показывается, а следующим уходит только самый новый префикс.
+    # Ответы лежат в TTL+LRU кеше по (эндпоинт, префикс) — стирание и повторный набор сеть не трогают
+    TTL_SEC = 600
+    CACHE_SIZE = 512
+    MAX_ITEMS = 8
+    TIMEOUT_MS = 3000
+
+    ready = pyqtSignal(str, list)
+
+    def __init__(self, engine_fn, delay_ms: int, url_template: str = "", parent=None):
+        super().__init__(parent)
+        self.engine_fn = engine_fn
+        self.url_template = url_template  # непустой — вместо эндпоинта поисковика (например, локальная заглушка)
+        # один менеджер на всё: соединения к хосту подсказок переиспользуются (keep-alive / HTTP/2)
+        self.nam = QNetworkAccessManager(self)
+        self.cache = OrderedDict()  # (шаблон, префикс) -> (monotonic, [подсказки])
+        self.reply: Optional[QNetworkReply] = None
+        self.reply_key = None  # (шаблон, префикс) ответа в полёте; None — он уже никому не нужен
+        self.queued = False  # пауза в наборе кончилась, пока ответ ещё в полёте
+        self.text = ""
+        self._warmed = set()
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.cancelled = 0
+        self.errors = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self._fetch)
+
+    def template(self) -> str:
+        return self.url_template or SEARCH_SUGGEST.get(self.engine_fn(), "")
+
+    def request(self, text: str):
+        # пустой текст — только отмена
+        self.timer.stop()
+        self.queued = False
+        self.text = text
+        tpl = self.template()
+        q = text.strip().lower()
+        if self.reply_key is not None and self.reply_key != (tpl, q):
+            self._cancel()
+        if not tpl or not q:
+            return
+        items = self._cached((tpl, q))
+        if items is not None:
+            self.cache_hits += 1
+            self.ready.emit(text, items)
+            return
+        self._warm(tpl)
+        self.timer.start()
+
+    def _cached(self, key):
+        e = self.cache.get(key)
+        if e is None:
+            return None
+        if time.monotonic() - e[0] > self.TTL_SEC:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return e[1]
+
+    def _put(self, key, items: list):
+        self.cache[key] = (time.monotonic(), items)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+    def _warm(self, tpl: str):
+        # TCP/TLS к хосту подсказок открываем уже на первой букве, пока идёт пауза
+        url = QUrl(tpl.replace("{q}", ""))
+        origin = (url.scheme(), url.host(), url.port())
+        if not url.host() or origin in self._warmed:
+            return
+        self._warmed.add(origin)
+        if url.scheme() == "https":
+            self.nam.connectToHostEncrypted(url.host(), url.port(443))
+        else:
+            self.nam.connectToHost(url.host(), url.port(80))
+
+    def _fetch(self):
+        tpl = self.template()
+        q = self.text.strip()
+        if not tpl or not q:
+            return
+        key = (tpl, q.lower())
+        items = self._cached(key)
+        if items is not None:  # пока ждали, ответ уже пришёл
+            self.cache_hits += 1
+            self.ready.emit(self.text, items)
+            return
+        if self.reply is not None:
+            # одно соединение на поисковик: новый запрос уйдёт, когда закончится текущий
+            self.queued = self.reply_key != key
+            return
+        self.queued = False
+        req = QNetworkRequest(QUrl(tpl.replace("{q}", encode_query(q))))
+        req.setAttribute(QNetworkRequest.Attribute.Http2AllowedAttribute, True)
+        req.setTransferTimeout(self.TIMEOUT_MS)
+        reply = self.nam.get(req)
+        reply.finished.connect(lambda: self._on_finished(reply, key))
+        self.reply = reply
+        self.reply_key = key
+        self.requests += 1
+
+    def _cancel(self):
+        # ответ в полёте устарел: abort закрыл бы keep-alive соединение (в HTTP/1.1 — вместе
+        # с ним), поэтому его дочитываем в кеш, но в список он уже не попадёт
+        if self.reply is None or self.reply_key is None:
+            return
+        self.reply_key = None
+        self.cancelled += 1
+
+    def _on_finished(self, reply: QNetworkReply, key):
+        reply.deleteLater()
+        if reply is not self.reply:
+            return
+        wanted = self.reply_key is not None
+        self.reply, self.reply_key = None, None
+        if reply.error() != QNetworkReply.NetworkError.NoError:
+            if reply.error() != QNetworkReply.NetworkError.OperationCanceledError:
+                self.errors += 1
+        else:
+            items = self.parse(bytes(reply.readAll()))
+            self._put(key, items)
+            if wanted:
+                self.ready.emit(self.text, items)
+        if self.queued:
+            self._fetch()
+
+    @classmethod
+    def parse(cls, data: bytes) -> list:
+        try:
+            doc = json.loads(data.decode("utf-8", "replace"))
+        except ValueError:
+            return []
+        if isinstance(doc, list) and len(doc) > 1 and isinstance(doc[1], list):
+            return [s for s in doc[1] if isinstance(s, str)][:cls.MAX_ITEMS]
+        return []
+
+    def stats_text(self) -> str:
+        return (f"suggest: {self.requests} requests, {self.cache_hits} cache hits, "
+                f"{self.cancelled} cancelled, {self.errors} errors, {len(self.cache)} cached prefixes")
+
+    def close(self):
+        self.timer.stop()
+        self.queued = False
+        reply, self.reply, self.reply_key = self.reply, None, None
+        if reply is not None and not reply.isFinished():
+            reply.abort()
+        LOGGER.info(self.stats_text())
+
+
+class UrlAutocomplete(QObject):
+    MAX_ENTRIES = 200000
+
+    loaded = pyqtSignal(object)
+
+    def __init__(self, urlbar: QLineEdit, history_path: Optional[Path],
+                 suggester: Optional[SearchSuggester] = None, parent=None):
+        super().__init__(parent)
+        self.urlbar = urlbar
+        self.index = PrefixIndex()
+        self._pending = None
+        self._history_rows = []
+        self.fulltext: Optional[PageTextIndex] = None  # для «@h слова» — поиск по тексту страниц
+        self.suggester = suggester
+        if suggester is not None:
+            suggester.ready.connect(self.on_suggestions)
+
+        self.model = SuggestionModel(self)
+        self.completer = QCompleter(self.model, self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.setMaxVisibleItems(PrefixIndex.TOP_K)
+        urlbar.setCompleter(self.completer)
+        urlbar.textEdited.connect(self.on_text_edited)
+
+        self.loaded.connect(self._on_loaded)
+        if history_path is not None:
+            # изменения, пришедшие пока история грузится, доиграем поверх загруженного индекса
+            self._pending = []
+            threading.Thread(target=self._load, args=(history_path,), name="autocomplete-load", daemon=True).start()
+
+    def _load(self, path: Path):
+        rows = []
+        try:
+            if path.exists():
+                conn = sqlite3.connect(path.as_uri() + "?mode=ro", uri=True)
+                try:
+                    rows = conn.execute(
+                        "SELECT url, title, frecency FROM urls ORDER BY frecency DESC LIMIT ?",
+                        (self.MAX_ENTRIES,),
+                    ).fetchall()
+                finally:
+                    conn.close()
+        except Exception as e:
+            LOGGER.warning(f"autocomplete: history load failed: {e}")
+        idx = PrefixIndex()
+        idx.bulk_load(rows)
+        self.loaded.emit(idx)
+
+    def _on_loaded(self, idx: PrefixIndex):
+        pending, self._pending = self._pending or [], None
+        self.index = idx
+        for op in pending:
+            op[0](*op[1:])
+        LOGGER.info(f"autocomplete: {len(idx)} entries indexed")
+
+    def _apply(self, fn, *args):
+        fn(*args)
+        if self._pending is not None:
+            self._pending.append((fn,) + args)
+
+    def _visit(self, url: str, ts: float):
+        e = self.index.entries.get(url)
+        self.index.add(url, "", HistoryStore.frecency_key(e[1] if e else 0.0, ts))
+
+    def _link(self, url: str, title: str, ts: float):
+        e = self.index.entries.get(url)
+        base = HistoryStore.frecency_key(0.0, ts) + PrefixIndex.LINK_BONUS
+        self.index.add(url, title, max(base, e[1] if e else 0.0))
+
+    def note_visit(self, url: str):
+        self._apply(self._visit, url, time.time())
+
+    def _title(self, url: str, title: str):
+        self.index.add(url, title)
+
+    def note_title(self, url: str, title: str):
+        self._apply(self._title, url, title)
+
+    def note_quick_link(self, url: str, title: str):
+        self._apply(self._link, url, title, time.time())
+
+    def inline_url(self, text: str) -> Optional[str]:
+        return self.index.inline_url(text)
+
+    def on_text_edited(self, text: str):
+        q = text.strip()
+        if self.fulltext is not None and text.startswith("@h "):
+            self._history_rows = [(url, title) for url, title, *_ in self.fulltext.search(text[3:], PrefixIndex.TOP_K)]
+            self._show(self._history_rows)
+            if self.suggester is not None:
+                self.suggester.request("")
+            return
+        self._history_rows = self.index.query(text) if q else []
+        self._show(self._history_rows)
+        if self.suggester is not None:
+            # адреса и !-команды поисковику не отправляем
+            searchable = q and "://" not in q and not looks_like_url(q) and not q.startswith("!")
+            self.suggester.request(text if searchable else "")
+
+    def on_suggestions(self, text: str, items: list):
+        if text != self.urlbar.text():
+            return
+        seen = {r[0] for r in self._history_rows}
+        # подсказка — строка без заголовка: в поле адреса подставится сам запрос
+        self._show(self._history_rows + [(s, "") for s in items if s not in seen])
+
+    def _show(self, rows):
+        self.model.set_rows(rows)
+        if rows:
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+
+class Speculator(QObject):
+    # пока пользователь печатает: угадываем адрес и прогреваем его (DNS или скрытая предзагрузка страницы)
+    MODES = ("prerender", "dns", "off")
+
+    def __init__(self, browser, mode: str, delay_ms: int):
+        super().__init__(browser)
+        self.browser = browser
+        self.mode = mode if mode in self.MODES else "prerender"
+
+        self.page: Optional[BrowserPage] = None
+        self.url = ""
+        self.started = 0.0
+        self.loaded_at = 0.0
+        self.load_ok = False
+        self._resolved = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.speculate)
+        browser.urlbar.textEdited.connect(self.on_text_edited)
+
+    def on_text_edited(self, _):
+        if self.mode != "off":
+            self.timer.start()
+
+    def predict(self, text: str):
+        # (url, уверенность): адрес или совпадение в истории — можно предзагружать, поиск — только DNS
+        text = text.strip()
+        if not text or text.startswith("!"):
+            return None, False
+        if "://" in text or looks_like_url(text) or self.browser.autocomplete.inline_url(text):
+            url = self.browser.build_url(text).toString()
+            return url, is_web_url(url)
+        return self.browser.build_url(text).toString(), False
+
+    def speculate(self):
+        url, confident = self.predict(self.browser.urlbar.text())
+        if url is None:
+            self.cancel()
+            return
+        if url == self.url and self.page is not None:
+            return
+        self.cancel()
+        self.preresolve(url)
+        if confident and self.mode == "prerender" and self._can_prerender():
+            self.prerender(url)
+
+    def preresolve(self, url: str):
+        host = QUrl(url).host()
+        if host and host not in self._resolved:
+            self._resolved.add(host)
+            QHostInfo.lookupHost(host, lambda _info: None)
+
+    def _can_prerender(self) -> bool:
+        # предзагрузка имеет смысл только в пустой вкладке (иначе потеряется история назад)
+        # и не за счёт бюджета памяти вкладок
+        tab = self.browser.current_tab()
+        if tab is None or tab.view is None or not tab.view.url().toString().startswith(HOME_URL):
+            return False
+        budget = self.browser.lifecycle.memory_budget_bytes
+        return budget <= 0 or sum(self.browser.lifecycle.renderer_usage().values()) < budget * 0.9
+
+    def prerender(self, url: str):
+        self.page = BrowserPage(self.browser.profile, lambda switch_to_new_tab: None,
+                                self.browser.blocker, self.browser.start_page.channel, self.browser.perf)
+        self.page.setAudioMuted(True)
+        self.page.loadFinished.connect(self._on_loaded)
+        self.url = url
+        self.started = time.monotonic()
+        self.loaded_at = 0.0
+        self.page.setUrl(QUrl(url))
+
+    def _on_loaded(self, ok: bool):
+        if not self.loaded_at:
+            self.loaded_at = time.monotonic()
+            self.load_ok = ok
+
+    def cancel(self):
+        self.timer.stop()
+        if self.page is not None:
+            self.page.deleteLater()
+        self.page = None
+        self.url = ""
+
+    def take(self, url: str):
+        # Enter: совпавшая предзагрузка уходит во вкладку -> (page, ok загрузки или None, если ещё грузится)
+        self.timer.stop()
+        if self.page is None:
+            return None, None
+        if url != self.url:
+            self.misses += 1
+            LOGGER.info(f"speculation miss: predicted {self.url}, got {url} | {self.stats_text()}")
+            self.cancel()
+            return None, None
+        page, self.page, self.url = self.page, None, ""
+        page.loadFinished.disconnect(self._on_loaded)
+        finished = self.load_ok if self.loaded_at else None
+        saved = ((self.loaded_at or time.monotonic()) - self.started) * 1000
+        self.hits += 1
+        self.saved_ms += saved
+        LOGGER.info(f"speculation hit: {url} (~{saved:.0f} ms saved) | {self.stats_text()}")
+        return page, finished
+
+    def stats_text(self) -> str:
+        return f"hits={self.hits}, misses={self.misses}, saved={self.saved_ms / 1000:.1f}s"
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+class DownloadItem:
+    # запись очереди; req — живой QWebEngineDownloadRequest (None для записей из прошлого запуска)
+    def __init__(self, rec: dict, req=None):
+        self.rec = rec
+        self.req = req
+        self.speed = 0.0
+        self._last = (time.monotonic(), rec.get("received", 0))
+
+    @property
+    def state(self) -> str:
+        return self.rec["state"]
+
+    def sample(self):
+        now = time.monotonic()
+        t0, r0 = self._last
+        received = self.rec.get("received", 0)
+        if now > t0:
+            inst = max(0.0, (received - r0) / (now - t0))
+            self.speed = inst if not self.speed else 0.3 * inst + 0.7 * self.speed
+        self._last = (now, received)
+
+    def eta_text(self) -> str:
+        total, received = self.rec.get("total", 0), self.rec.get("received", 0)
+        if self.state != "active" or self.speed < 1 or total <= 0:
+            return ""
+        sec = int((total - received) / self.speed)
+        return f"{sec // 60}:{sec % 60:02d}" if sec < 3600 else f"{sec // 3600} ч {sec % 3600 // 60} мин"
+
+
+class DownloadManager(QObject):
+    # очередь загрузок: не больше max_parallel активных, остальные стоят на паузе;
+    # состояние переживает перезапуск (downloads.json), прерванные перезапрашиваются
+    STATES = {
+        "queued": "В очереди",
+        "active": "Загрузка",
+        "paused": "Пауза",
+        "done": "Готово",
+        "cancelled": "Отменено",
+        "interrupted": "Прервано",
+    }
+    KEEP_FINISHED = 200
+
+    changed = pyqtSignal()
+
+    def __init__(self, profile: QWebEngineProfile, max_parallel: int, parent=None):
+        super().__init__(parent)
+        self.profile = profile
+        self.max_parallel = max_parallel
+        self.items = []
+        self._expected = {}  # url -> item, ждущие повторного downloadRequested
+        self._dirty = False
+        self._helper_page = None
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start()
+
+        self.load()
+
+    # --- персистентность ---
+
+    def load(self):
+        try:
+            recs = json.loads(DOWNLOADS_STATE_PATH.read_text(encoding="utf-8")) if not EPHEMERAL else []
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            LOGGER.warning(f"downloads: state load failed: {e}")
+            return
+        for rec in recs:
+            if rec.get("state") in ("queued", "active", "paused"):
+                rec["state"] = "interrupted"
+                rec["resume"] = True
+            self.items.append(DownloadItem(rec))
+        LOGGER.info(f"downloads: {len(self.items)} records loaded")
+
+    def save(self):
+        if EPHEMERAL:
+            return
+        recs = [it.rec for it in self.items]
+        tmp = DOWNLOADS_STATE_PATH.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(recs, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, DOWNLOADS_STATE_PATH)
+            self._dirty = False
+        except Exception as e:
+            LOGGER.warning(f"downloads: state save failed: {e}")
+
+    def resume_interrupted(self):
+        # после перезапуска Chromium не умеет докачивать старый запрос — запрашиваем заново
+        for it in self.items:
+            if it.rec.pop("resume", False):
+                self.retry(it)
+
+    # --- приём загрузок ---
+
+    def take_expected(self, url: str):
+        return self._expected.pop(url, None)
+
+    def add(self, req, item=None):
+        rec = {
+            "id": uuid.uuid4().hex,
+            "url": req.url().toString(),
+            "dir": req.downloadDirectory(),
+            "filename": req.downloadFileName(),
+            "state": "queued",
+            "received": 0,
+            "total": max(0, req.totalBytes()),
+            "started": time.time(),
+        }
+        if item is None:
+            item = DownloadItem(rec, req)
+            self.items.append(item)
+        else:
+            item.rec.update(rec, id=item.rec["id"])
+            item.req = req
+        req.stateChanged.connect(lambda _state, item=item: self.on_state(item))
+        req.accept()
+        self._mark()
+        self.schedule()
+        return item
+
+    def _sync(self, item):
+        req = item.req
+        item.rec["received"] = req.receivedBytes()
+        item.rec["total"] = max(0, req.totalBytes())
+
+    def on_state(self, item):
+        req = item.req
+        if req is None:
+            return
+        st = req.state()
+        self._sync(item)
+        if st == QWebEngineDownloadRequest.DownloadState.DownloadCompleted:
+            item.rec["state"] = "done"
+            LOGGER.info(f"download done: {item.rec['filename']} ({format_bytes(item.rec['received'])})")
+        elif st == QWebEngineDownloadRequest.DownloadState.DownloadCancelled:
+            item.rec["state"] = "cancelled"
+        elif st == QWebEngineDownloadRequest.DownloadState.DownloadInterrupted:
+            item.rec["state"] = "interrupted"
+            LOGGER.warning(f"download interrupted: {item.rec['filename']}: {req.interruptReasonString()}")
+        elif st == QWebEngineDownloadRequest.DownloadState.DownloadInProgress:
+            # лишние по лимиту загрузки держим на паузе до освобождения слота
+            if item.state == "queued" and self.active_count() >= self.max_parallel:
+                req.pause()
+            elif item.state == "queued":
+                item.rec["state"] = "active"
+        if st in (QWebEngineDownloadRequest.DownloadState.DownloadCompleted,
+                  QWebEngineDownloadRequest.DownloadState.DownloadCancelled,
+                  QWebEngineDownloadRequest.DownloadState.DownloadInterrupted):
+            item.req = None
+        self._mark()
+        self.schedule()
+
+    def active_count(self) -> int:
+        return sum(1 for it in self.items if it.state == "active")
+
+    def schedule(self):
+        free = self.max_parallel - self.active_count()
+        for it in self.items:
+            if free <= 0:
+                break
+            if it.state == "queued" and it.req is not None and \
+                    it.req.state() == QWebEngineDownloadRequest.DownloadState.DownloadInProgress:
+                it.rec["state"] = "active"
+                if it.req.isPaused():
+                    it.req.resume()
+                free -= 1
+        self.trim()
+
+    def trim(self):
+        finished = [it for it in self.items if it.state in ("done", "cancelled")]
+        for it in finished[:max(0, len(finished) - self.KEEP_FINISHED)]:
+            self.items.remove(it)
+
+    def _mark(self):
+        self._dirty = True
+        self.changed.emit()
+
+    # --- действия пользователя ---
+
+    def pause(self, item):
+        if item.req is not None and item.state in ("active", "queued"):
+            item.req.pause()
+            item.rec["state"] = "paused"
+            self._mark()
+            self.schedule()
+
+    def resume(self, item):
+        if item.req is not None and item.state == "paused":
+            item.rec["state"] = "queued"
+            self._mark()
+            self.schedule()
+        elif item.state == "interrupted":
+            self.retry(item)
+
+    def cancel(self, item):
+        if item.req is not None:
+            item.req.cancel()
+        elif item.state in ("interrupted", "queued"):
+            item.rec["state"] = "cancelled"
+            self._mark()
+
+    def retry(self, item):
+        url = item.rec.get("url")
+        if not url:
+            return
+        if self._helper_page is None:
+            self._helper_page = QWebEnginePage(self.profile, self)
+        item.rec["state"] = "queued"
+        self._expected[url] = item
+        self._helper_page.download(QUrl(url), item.rec.get("filename", ""))
+        self._mark()
+
+    def clear_finished(self):
+        self.items = [it for it in self.items if it.state not in ("done", "cancelled")]
+        self._mark()
+
+    def tick(self):
+        for it in self.items:
+            if it.req is not None:
+                self._sync(it)
+            if it.state == "active":
+                it.sample()
+        if self._dirty:
+            self.save()
+        self.changed.emit()
+
+
+class DownloadsModel(QAbstractTableModel):
+    HEADERS = ("Файл", "Прогресс", "Скорость", "Осталось", "Состояние")
+
+    def __init__(self, manager: DownloadManager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self._count = 0
+        manager.changed.connect(self.refresh)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid() or index.row() >= len(self.manager.items):
+            return None
+        it = self.manager.items[index.row()]
+        rec = it.rec
+        col = index.column()
+        if col == 0:
+            return rec.get("filename", "")
+        if col == 1:
+            total = rec.get("total", 0)
+            if total > 0:
+                return f"{rec['received'] * 100 // total}%  {format_bytes(rec['received'])} / {format_bytes(total)}"
+            return format_bytes(rec.get("received", 0))
+        if col == 2:
+            return f"{format_bytes(it.speed)}/с" if it.state == "active" else ""
+        if col == 3:
+            return it.eta_text()
+        if col == 4:
+            return DownloadManager.STATES.get(it.state, it.state)
+        return None
+
+    def refresh(self):
+        # одно обновление на тик таймера, а не на каждый receivedBytesChanged
+        n = len(self.manager.items)
+        if n != self._count:
+            self.beginResetModel()
+            self._count = n
+            self.endResetModel()
+        elif n:
+            self.dataChanged.emit(self.index(0, 0), self.index(n - 1, len(self.HEADERS) - 1))
+
+
+class DownloadsPanel(QDockWidget):
+    def __init__(self, manager: DownloadManager, parent=None):
+        super().__init__("Загрузки", parent)
+        self.manager = manager
+        self.setObjectName("downloads")
+
+        w = QWidget()
+        layout = QVBoxLayout(w)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.model = DownloadsModel(manager, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.table, 1)
+
+        row = QHBoxLayout()
+        for text, fn in (
+            ("Пауза", manager.pause),
+            ("Продолжить", manager.resume),
+            ("Отмена", manager.cancel),
+        ):
+            b = QPushButton(text)
+            b.clicked.connect(lambda _=False, fn=fn: self._for_selected(fn))
+            row.addWidget(b)
+        b = QPushButton("Открыть папку")
+        b.clicked.connect(self.open_folder)
+        row.addWidget(b)
+        b = QPushButton("Очистить готовые")
+        b.clicked.connect(manager.clear_finished)
+        row.addWidget(b)
+        row.addStretch(1)
+        layout.addLayout(row)
+
+        self.setWidget(w)
+
+    def _selected(self):
+        rows = {i.row() for i in self.table.selectionModel().selectedRows()}
+        return [self.manager.items[r] for r in sorted(rows) if r < len(self.manager.items)]
+
+    def _for_selected(self, fn):
+        for it in self._selected():
+            fn(it)
+
+    def open_folder(self):
+        sel = self._selected()
+        folder = sel[0].rec.get("dir") if sel else str(downloads_dir())
+        try:
+            os.startfile(folder or str(downloads_dir()))
+        except Exception as e:
+            LOGGER.warning(f"open folder failed: {e}")
+
+
+class HistorySearchModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []  # (url, title, snippet, ts)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        url, title, snippet, ts = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            when = time.strftime("%d.%m.%Y", time.localtime(ts))
+            return f"{title or url}  ·  {when}\n{snippet}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return url
+        return None
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+
+class HistorySearchPanel(QDockWidget):
+    # Ctrl+H: поиск по тексту посещённых страниц
+    def __init__(self, index: PageTextIndex, open_url, parent=None):
+        super().__init__("Поиск по истории", parent)
+        self.index = index
+        self.open_url = open_url
+        self.setObjectName("history_search")
+
+        w = QWidget()
+        layout = QVBoxLayout(w)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.edit = QLineEdit()
+        self.edit.setPlaceholderText("Слова со страниц, которые вы читали…")
+        self.edit.setClearButtonEnabled(True)
+        self.edit.textChanged.connect(lambda _: self.timer.start())
+        self.edit.returnPressed.connect(self.open_first)
+        layout.addWidget(self.edit)
+
+        self.model = HistorySearchModel(self)
+        self.list = QListView()
+        self.list.setModel(self.model)
+        self.list.setWordWrap(True)
+        self.list.setAlternatingRowColors(True)
+        self.list.activated.connect(lambda i: self.open_url(self.model.rows[i.row()][0]))
+        layout.addWidget(self.list, 1)
+
+        self.status = QLabel("")
+        self.status.setStyleSheet("color: rgba(255,255,255,.6);")
+        layout.addWidget(self.status)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(80)
+        self.timer.timeout.connect(self.run)
+
+        self.setWidget(w)
+
+    def search(self, text: str):
+        self.edit.setText(text)
+        self.edit.setFocus()
+        self.edit.selectAll()
+
+    def run(self):
+        text = self.edit.text()
+        t0 = time.perf_counter()
+        rows = self.index.search(text, 50) if text.strip() else []
+        self.model.set_rows(rows)
+        self.status.setText(f"Найдено: {len(rows)} · {(time.perf_counter() - t0) * 1000:.1f} мс" if text.strip() else "")
+
+    def open_first(self):
+        self.timer.stop()
+        self.run()
+        if self.model.rows:
+            self.open_url(self.model.rows[0][0])
+
+
+class BookmarkListModel(QAbstractListModel):
+    # папка подгружается страницами по (position, id) по мере прокрутки — в память не читается целиком
+    PAGE = 200
+
+    def __init__(self, store: BookmarkStore, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.folder = QUICK_FOLDER
+        self.query = ""
+        self.rows = []  # (id, title, url, position)
+        self._more = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        _id, title, url, _pos = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return title or url
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return url
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._more:
+            return
+        after = (self.rows[-1][3], self.rows[-1][0]) if self.rows else None
+        page = self.store.page(self.folder, after, self.PAGE + 1)
+        self._more = len(page) > self.PAGE
+        page = page[:self.PAGE]
+        if page:
+            n = len(self.rows)
+            self.beginInsertRows(QModelIndex(), n, n + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+    def reload(self, folder: Optional[int] = None, query: Optional[str] = None):
+        if folder is not None:
+            self.folder = folder
+        if query is not None:
+            self.query = query.strip()
+        self.beginResetModel()
+        if self.query:
+            # поиск ограничен лимитом и идёт по индексам, поэтому без постраничной подгрузки
+            self.rows = list(self.store.search(self.query))
+            self._more = False
+        else:
+            self.rows = []
+            self._more = True
+        self.endResetModel()
+        if self._more:
+            self.fetchMore()
+
+    def id_at(self, row: int) -> int:
+        return self.rows[row][0] if 0 <= row < len(self.rows) else 0
+
+
+class BookmarksPanel(QDockWidget):
+    # Ctrl+Shift+B: все закладки — папки, поиск (в т.ч. #метка), импорт из HTML/JSON
+    def __init__(self, store: BookmarkStore, open_url, parent=None):
+        super().__init__("Закладки", parent)
+        self.store = store
+        self.open_url = open_url
+        self.setObjectName("bookmarks")
+
+        w = QWidget()
+        layout = QVBoxLayout(w)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.edit = QLineEdit()
+        self.edit.setPlaceholderText("Поиск по закладкам или #метка…")
+        self.edit.setClearButtonEnabled(True)
+        self.edit.textChanged.connect(lambda _: self.timer.start())
+        layout.addWidget(self.edit)
+
+        self.combo = QComboBox()
+        self.combo.currentIndexChanged.connect(lambda _: self.model.reload(folder=self.current_folder()))
+        layout.addWidget(self.combo)
+
+        self.model = BookmarkListModel(store, self)
+        self.list = QListView()
+        self.list.setModel(self.model)
+        self.list.setUniformItemSizes(True)
+        self.list.activated.connect(lambda i: self.open_url(self.model.rows[i.row()][2]))
+        layout.addWidget(self.list, 1)
+
+        row = QHBoxLayout()
+        for text, fn in (("Импорт…", self.import_file), ("Метки…", self.edit_tags),
+                         ("↑", lambda: self.move(-1)), ("↓", lambda: self.move(1)), ("Удалить", self.remove)):
+            btn = QPushButton(text)
+            btn.clicked.connect(fn)
+            row.addWidget(btn)
+        layout.addLayout(row)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(120)
+        self.timer.timeout.connect(lambda: self.model.reload(query=self.edit.text()))
+
+        self.setWidget(w)
+        store.changed.connect(self.refresh)
+        self.refresh()
+
+    def current_folder(self) -> int:
+        fid = self.combo.currentData()
+        return fid if fid is not None else QUICK_FOLDER
+
+    def refresh(self):
+        if not self.isVisible() and self.combo.count():
+            return
+        current = self.current_folder()
+        self.combo.blockSignals(True)
+        self.combo.clear()
+        for fid, depth, title, n in self.store.folder_tree():
+            self.combo.addItem(f"{'    ' * depth}{title} ({n})", fid)
+        i = self.combo.findData(current)
+        self.combo.setCurrentIndex(max(i, 0))
+        self.combo.blockSignals(False)
+        self.model.reload(folder=self.current_folder())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def selected_id(self) -> int:
+        i = self.list.currentIndex()
+        return self.model.id_at(i.row()) if i.isValid() else 0
+
+    def import_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Импорт закладок", str(Path.home()),
+                                              "Закладки (*.html *.htm *.json);;Все файлы (*)")
+        if path:
+            self.store.import_file(path)
+
+    def edit_tags(self):
+        bm_id = self.selected_id()
+        if not bm_id:
+            return
+        text, ok = QInputDialog.getText(self, "Метки", "Метки через запятую:",
+                                        text=", ".join(self.store.tags_of(bm_id)))
+        if ok:
+            self.store.set_tags(bm_id, [t.strip() for t in text.split(",") if t.strip()])
+
+    def move(self, step: int):
+        bm_id = self.selected_id()
+        if bm_id:
+            self.store.move(bm_id, step)
+
+    def remove(self):
+        bm_id = self.selected_id()
+        if bm_id:
+            self.store.remove(bm_id)
+
+
+class TaskManagerModel(QAbstractTableModel):
+    HEADERS = ("Вкладка", "PID", "Память", "CPU", "Запросы", "Состояние")
+    SORT_ROLE = Qt.ItemDataRole.UserRole
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []  # [uid, title, pid, rss, cpu, requests, state]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        row = self.rows[index.row()]
+        col = index.column()
+        value = row[col + 1]
+        if role == self.SORT_ROLE:
+            return value
+        if role != Qt.ItemDataRole.DisplayRole:
+            if role == Qt.ItemDataRole.TextAlignmentRole and 1 <= col <= 4:
+                return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            return None
+        if col == 1:
+            return str(value) if value else "—"
+        if col == 2:
+            return format_bytes(value) if value else "—"
+        if col == 3:
+            return f"{value:.1f}%"
+        return value
+
+    def uid_at(self, row: int) -> int:
+        return self.rows[row][0] if 0 <= row < len(self.rows) else 0
+
+    def update_rows(self, fresh):
+        # без сброса модели: удалённые/новые вкладки — remove/insert, изменившиеся — dataChanged по строке
+        fresh_uids = {r[0] for r in fresh}
+        for i in range(len(self.rows) - 1, -1, -1):
+            if self.rows[i][0] not in fresh_uids:
+                self.beginRemoveRows(QModelIndex(), i, i)
+                del self.rows[i]
+                self.endRemoveRows()
+        pos = {r[0]: i for i, r in enumerate(self.rows)}
+        last_col = len(self.HEADERS) - 1
+        for r in fresh:
+            i = pos.get(r[0])
+            if i is None:
+                n = len(self.rows)
+                self.beginInsertRows(QModelIndex(), n, n)
+                self.rows.append(r)
+                self.endInsertRows()
+            elif self.rows[i] != r:
+                self.rows[i] = r
+                self.dataChanged.emit(self.index(i, 0), self.index(i, last_col))
+
+
+class TaskManagerDialog(QDialog):
+    SAMPLE_SEC = 2.0
+
+    sampled = pyqtSignal(object)
+
+    def __init__(self, browser, parent=None):
+        super().__init__(parent)
+        self.browser = browser
+        self.setWindowTitle("Диспетчер задач")
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        self.resize(820, 420)
+
+        self.model = TaskManagerModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setSortRole(TaskManagerModel.SORT_ROLE)
+        self.proxy.setDynamicSortFilter(True)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(2, Qt.SortOrder.DescendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.doubleClicked.connect(lambda _: self.switch_to())
+
+        btn_kill = QPushButton("Завершить процесс")
+        btn_reload = QPushButton("Перезагрузить")
+        btn_discard = QPushButton("Выгрузить")
+        btn_kill.clicked.connect(self.kill_selected)
+        btn_reload.clicked.connect(self.reload_selected)
+        btn_discard.clicked.connect(self.discard_selected)
+        self.lab_cost = QLabel("")
+        self.lab_cost.setStyleSheet("color: rgba(255,255,255,.6);")
+
+        row = QHBoxLayout()
+        row.addWidget(self.lab_cost, 1)
+        row.addWidget(btn_kill)
+        row.addWidget(btn_reload)
+        row.addWidget(btn_discard)
+
         layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.addWidget(self.view)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(row)
+
+        self._usage = {}
+        self.sampled.connect(self.on_sampled)
+        # опрос процессов идёт, только пока окно открыто
+        self.sampler = ProcessSampler(self.SAMPLE_SEC, self.sampled.emit)
+        self.refresh()
+
+    def _tabs(self):
+        tabs = self.browser.tabs
+        return [w for w in (tabs.widget(i) for i in range(tabs.count())) if w is not None]
+
+    @staticmethod
+    def _state(tab) -> str:
+        if tab.page is None:
+            return "не загружена"
+        state = tab.page.lifecycleState()
+        if state == QWebEnginePage.LifecycleState.Discarded:
+            return "выгружена"
+        if state == QWebEnginePage.LifecycleState.Frozen:
+            return "заморожена"
+        return "загрузка" if tab.loading else "активна"
+
+    def on_sampled(self, usage):
+        self._usage = usage
+        self.refresh()
+        self.lab_cost.setText(f"Опрос {len(usage)} процессов: {self.sampler.cost_sec * 1000:.1f} мс CPU "
+                              f"/ {self.SAMPLE_SEC:.0f} с")
+
+    def refresh(self):
+        rows, pids = [], []
+        for tab in self._tabs():
+            pid = tab.page.renderProcessPid() if tab.page is not None else 0
+            if pid:
+                pids.append(pid)
+            rss, cpu = self._usage.get(pid, (0, 0.0))
+            icpt = tab.page.interceptor if tab.page is not None else None
+            rows.append([tab.uid, tab.title or tab.url, pid, rss, cpu,
+                         icpt.requests if icpt is not None else 0, self._state(tab)])
+        self.sampler.set_pids(pids)
+        self.model.update_rows(rows)
+
+    def selected_tab(self):
+        sel = self.table.selectionModel().selectedRows()
+        if not sel:
+            return None
+        uid = self.model.uid_at(self.proxy.mapToSource(sel[0]).row())
+        return next((t for t in self._tabs() if t.uid == uid), None)
+
+    def switch_to(self):
+        tab = self.selected_tab()
+        if tab is not None:
+            self.browser.tabs.setCurrentWidget(tab)
+
+    def kill_selected(self):
+        # рендерер может быть общим для нескольких вкладок — падают все
+        tab = self.selected_tab()
+        pid = tab.page.renderProcessPid() if tab is not None and tab.page is not None else 0
+        if pid:
+            self.browser.watchdog.note_user_kill(pid)
+        if pid and kill_process(pid):
+            LOGGER.warning(f"task manager: renderer {pid} killed ({tab.url})")
+        self.refresh()
+
+    def reload_selected(self):
+        tab = self.selected_tab()
+        if tab is not None and tab.view is not None:
+            tab.view.reload()
+
+    def discard_selected(self):
+        tab = self.selected_tab()
+        if tab is None or tab.page is None or tab is self.browser.current_tab():
+            return
+        self.browser.lifecycle.discard(tab)
+        self.refresh()
+
+    def done(self, r):
+        self.sampler.close()
+        super().done(r)
+
+
+class CacheWarmer(QObject):
+    # в простое по одному загружает частые сайты в скрытой странице, чтобы их ресурсы лежали в HTTP-кэше;
+    # пока грузится хоть одна вкладка, прогрев стоит (текущая загрузка прерывается и повторится позже)
+    START_DELAY_MS = 120000
+    GAP_MS = 15000
+    CHECK_MS = 1000
+    LOAD_TIMEOUT_SEC = 30
+
+    def __init__(self, browser, urls):
+        super().__init__(browser)
+        self.browser = browser
+        self.urls = deque(urls)
+        self.page: Optional[BrowserPage] = None
+        self.current = ""
+        self.started = 0.0
+        self.warmed = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.step)
+        self.check = QTimer(self)
+        self.check.setInterval(self.CHECK_MS)
+        self.check.timeout.connect(self.on_check)
+
+    def start(self):
+        if self.urls:
+            LOGGER.info(f"cache warm-up: {len(self.urls)} sites scheduled")
+            self.timer.start(self.START_DELAY_MS)
+
+    def _busy(self) -> bool:
+        tabs = self.browser.tabs
+        return any(getattr(tabs.widget(i), "loading", False) for i in range(tabs.count()))
+
+    def step(self):
+        if not self.urls:
+            self.stop()
+            LOGGER.info(f"cache warm-up: done, {self.warmed} sites")
+            return
+        if self._busy():
+            self.timer.start(self.GAP_MS)
+            return
+        if self.page is None:
+            self.page = BrowserPage(self.browser.profile, lambda switch_to_new_tab: None, self.browser.blocker)
+            self.page.setAudioMuted(True)
+            self.page.loadFinished.connect(self.on_loaded)
+        self.current = self.urls.popleft()
+        self.started = time.monotonic()
+        self.page.setUrl(QUrl(self.current))
+        self.check.start()
+
+    def on_check(self):
+        if not self.current:
+            return
+        timed_out = time.monotonic() - self.started > self.LOAD_TIMEOUT_SEC
+        if self._busy() or timed_out:
+            self.page.triggerAction(QWebEnginePage.WebAction.Stop)
+            if not timed_out:
+                self.urls.appendleft(self.current)
+            self.current = ""
+            self.check.stop()
+            self.timer.start(self.GAP_MS)
+
+    def on_loaded(self, ok: bool):
+        if not self.current:
+            return
+        if ok:
+            self.warmed += 1
+        self.current = ""
+        self.check.stop()
+        self.page.setUrl(QUrl("about:blank"))  # рендерер не держит страницу до следующего сайта
+        self.timer.start(self.GAP_MS)
+
+    def stop(self):
+        self.timer.stop()
+        self.check.stop()
+        self.urls.clear()
+        if self.page is not None:
+            self.page.deleteLater()
+            self.page = None
+
+
+def downloads_dir() -> Path:
+    # в эфемерном режиме папку данных не трогаем: скачанное — в системную папку загрузок
+    if EPHEMERAL:
+        loc = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.DownloadLocation)
+        return Path(loc) if loc else Path.home()
+    return DOWNLOADS_DIR
+
+
+def unique_path(folder: Path, filename: str) -> Path:
+    p = folder / filename
+    stem, suffix = p.stem, p.suffix
+    n = 1
+    while p.exists():
+        p = folder / f"{stem} ({n}){suffix}"
+        n += 1
+    return p
+
+
+CACHE_TYPES = {
+    "disk": QWebEngineProfile.HttpCacheType.DiskHttpCache,
+    "memory": QWebEngineProfile.HttpCacheType.MemoryHttpCache,
+    "none": QWebEngineProfile.HttpCacheType.NoCache,
+}
+COOKIE_POLICIES = {
+    "allow": QWebEngineProfile.PersistentCookiesPolicy.AllowPersistentCookies,
+    "session": QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies,
+    "force": QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies,
+}
+
+
+def apply_cache_policy(profile: QWebEngineProfile, cfg: configparser.ConfigParser):
+    kind = cfg.get("cache", "type", fallback="disk").strip().lower()
+    cookies = cfg.get("cache", "cookies", fallback="allow").strip().lower()
+    # 0 — размер из профиля производительности, а если и там 0 — выбирает Chromium
+    max_mb = clamp_int(cfg.get("cache", "max_mb", fallback="0"), 0, 0, 100000) or PERF_PROFILE["cache_mb"]
+    profile.setHttpCacheType(CACHE_TYPES.get(kind, CACHE_TYPES["disk"]))
+    profile.setHttpCacheMaximumSize(max_mb * 1024 * 1024)
+    profile.setPersistentCookiesPolicy(COOKIE_POLICIES.get(cookies, COOKIE_POLICIES["allow"]))
+
 
-        self.view.setUrl(QUrl(url))
+def make_profile(cfg: configparser.ConfigParser, parent=None) -> QWebEngineProfile:
+    if EPHEMERAL:
+        # профиль без имени — off-the-record: кэш, cookies и хранилища сайтов только в памяти
+        profile = QWebEngineProfile(parent)
+        profile.setHttpCacheType(QWebEngineProfile.HttpCacheType.MemoryHttpCache)
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.NoPersistentCookies)
+        profile.setHttpCacheMaximumSize(PERF_PROFILE["cache_mb"] * 1024 * 1024)
+        return profile
+    profile = QWebEngineProfile("GdBrowserProfile", parent)
+    profile.setPersistentStoragePath(str(USER_DATA_DIR))
+    profile.setCachePath(str(CACHE_DIR))
+    apply_cache_policy(profile, cfg)
+    return profile
 
 
 class MiniBrowser(QMainWindow):
@@ -601,10 +5818,25 @@ class MiniBrowser(QMainWindow):
 
         self.tooltips_enabled = (self.cfg.get("ui", "tooltips", fallback="true").strip().lower() == "true")
 
-        self.profile = QWebEngineProfile("GdBrowserProfile", self)
-        self.profile.setPersistentStoragePath(str(USER_DATA_DIR))
-        self.profile.setCachePath(str(CACHE_DIR))
-        self.profile.downloadRequested.connect(self.on_download_requested)
+        with STARTUP.phase("profile"):
+            self.profile = make_profile(self.cfg, self)
+            self.profile.downloadRequested.connect(self.on_download_requested)
+            self.blocker = ContentBlocker(
+                self.cfg.get("blocking", "enabled", fallback="true").strip().lower() == "true", self)
+            self.bookmarks = BookmarkStore(persistent(BOOKMARKS_DB_PATH), QUICK_LINKS_PATH, self)
+            self.bookmarks.imported.connect(self.on_bookmarks_imported)
+            self.bookmarks_panel: Optional[BookmarksPanel] = None
+            self.start_page = StartPage(self.profile, self.bookmarks, self.start_settings(), self)
+            self.favicons = FaviconCache(persistent(FAVICONS_DB_PATH), self)
+            self.thumbnails = ThumbnailStore(persistent(THUMBS_DIR), self)
+            self.start_page.handler.add_route("thumb", self.thumbnails.serve)
+            self.perf = PerfTelemetry(self.profile, self)
+            self.start_page.handler.add_route("perf", self.perf.serve)
+            self.tiles_timer = QTimer(self)
+            self.tiles_timer.setSingleShot(True)
+            self.tiles_timer.setInterval(1000)
+            self.tiles_timer.timeout.connect(self.refresh_tiles)
+            self.thumbnails.saved.connect(lambda _host: self.tiles_timer.start())
 
         self.tabs = QTabWidget()
         self.tabs.setDocumentMode(True)
@@ -615,6 +5847,12 @@ class MiniBrowser(QMainWindow):
         self.setCentralWidget(self.tabs)
 
         self.statusBar().showMessage(f"Данные: {APP_DATA_DIR}")
+        self.blocked_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.blocked_label)
+        self.blocked_timer = QTimer(self)
+        self.blocked_timer.setInterval(1500)
+        self.blocked_timer.timeout.connect(self.update_blocked_label)
+        self.blocked_timer.start()
 
         self.tb = QToolBar("Навигация")
         self.tb.setMovable(False)
@@ -642,6 +5880,20 @@ class MiniBrowser(QMainWindow):
         self.tb.addSeparator()
         self.tb.addAction(self.act_settings)
 
+        self.downloads = DownloadManager(
+            self.profile,
+            clamp_int(self.cfg.get("downloads", "max_parallel", fallback=str(DEFAULT_MAX_PARALLEL_DOWNLOADS)),
+                      DEFAULT_MAX_PARALLEL_DOWNLOADS, 1, 64),
+            self,
+        )
+        self.downloads_panel = DownloadsPanel(self.downloads, self)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.downloads_panel)
+        self.downloads_panel.hide()
+        self.act_downloads = self.downloads_panel.toggleViewAction()
+        self.act_downloads.setText("⇩")
+        self.act_downloads.setShortcut(QKeySequence("Ctrl+J"))
+        self.tb.addAction(self.act_downloads)
+
         self.urlbar = QLineEdit()
         self.urlbar.setPlaceholderText("Введите адрес или запрос и нажмите Enter…")
         self.urlbar.returnPressed.connect(self.navigate_to_url)
@@ -653,10 +5905,106 @@ class MiniBrowser(QMainWindow):
         self.addAction(self._shortcut("Ctrl+L", lambda: (self.urlbar.setFocus(), self.urlbar.selectAll())))
         self.addAction(self._shortcut("Ctrl+T", lambda: self.add_tab(HOME_URL, switch=True)))
         self.addAction(self._shortcut("Ctrl+W", lambda: self.close_tab(self.tabs.currentIndex())))
+        self.addAction(self._shortcut("Ctrl+Shift+T", self.reopen_closed_tab))
+        self.addAction(self._shortcut("Shift+Esc", self.open_task_manager))
+        self.addAction(self._shortcut("Ctrl+H", self.open_history_search))
+        self.addAction(self._shortcut("Ctrl+Shift+B", self.open_bookmarks))
+        self.addAction(self._shortcut("Ctrl+D", self.bookmark_current))
+        if EPHEMERAL:
+            self.addAction(self._shortcut("Ctrl+Shift+L", self.dump_memory_log))
+        self.task_manager: Optional[TaskManagerDialog] = None
+        self.warmer: Optional[CacheWarmer] = None
+
+        self.closed_tabs = deque(maxlen=CLOSED_TABS_LIMIT)
+
+        self.tabs.tabBar().setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tabs.tabBar().customContextMenuRequested.connect(self.on_tab_context_menu)
+
+        self.lifecycle = TabLifecycleManager(
+            self,
+            clamp_int(self.cfg.get("tabs", "freeze_after_sec", fallback=str(DEFAULT_FREEZE_AFTER_SEC)),
+                      DEFAULT_FREEZE_AFTER_SEC, 10, 86400),
+            clamp_int(self.cfg.get("tabs", "memory_budget_mb", fallback=str(DEFAULT_MEMORY_BUDGET_MB)),
+                      DEFAULT_MEMORY_BUDGET_MB, 0, 1024 * 1024),
+        )
+
+        self.watchdog = RendererWatchdog(self, self.cfg)
+        self.start_page.handler.add_route("crash", self.watchdog.serve)
 
         self.apply_tooltips(self.tooltips_enabled)
 
-        self.add_tab(HOME_URL, switch=True)
+        self.history = None
+        if not EPHEMERAL and self.cfg.get("history", "enabled", fallback="true").strip().lower() == "true":
+            self.history = HistoryStore(
+                HISTORY_DB_PATH,
+                clamp_int(self.cfg.get("history", "retention_days", fallback=str(DEFAULT_HISTORY_DAYS)),
+                          DEFAULT_HISTORY_DAYS, 0, 3650),
+            )
+
+        self.fulltext = None
+        if self.history and self.cfg.get("fulltext", "enabled", fallback="true").strip().lower() == "true":
+            if fts5_available():
+                self.fulltext = PageTextIndex(
+                    PAGE_INDEX_PATH,
+                    clamp_int(self.cfg.get("fulltext", "max_kb", fallback=str(DEFAULT_FULLTEXT_KB)),
+                              DEFAULT_FULLTEXT_KB, 1, 1024) * 1024,
+                    clamp_int(self.cfg.get("fulltext", "retention_days", fallback=str(DEFAULT_HISTORY_DAYS)),
+                              DEFAULT_HISTORY_DAYS, 0, 3650),
+                    clamp_int(self.cfg.get("fulltext", "max_pages", fallback=str(DEFAULT_FULLTEXT_PAGES)),
+                              DEFAULT_FULLTEXT_PAGES, 0, 10_000_000),
+                )
+            else:
+                LOGGER.warning("fulltext: SQLite is built without FTS5, page text search disabled")
+        self.history_panel: Optional[HistorySearchPanel] = None
+
+        self.suggester = None
+        if self.cfg.get("suggest", "enabled", fallback="true").strip().lower() == "true":
+            self.suggester = SearchSuggester(
+                lambda: self.cfg.get("search", "engine", fallback=DEFAULT_ENGINE),
+                clamp_int(self.cfg.get("suggest", "delay_ms", fallback=str(DEFAULT_SUGGEST_DELAY_MS)),
+                          DEFAULT_SUGGEST_DELAY_MS, 0, 2000),
+                self.cfg.get("suggest", "url", fallback="").strip(),
+                self,
+            )
+        self.autocomplete = UrlAutocomplete(self.urlbar, HISTORY_DB_PATH if self.history else None,
+                                            self.suggester, self)
+        self.autocomplete.fulltext = self.fulltext
+        self.autocomplete.completer.activated.connect(lambda _: self.navigate_to_url())
+        self.bookmarks.changed.connect(self.on_quick_links)
+        self.on_quick_links()
+        self.speculator = Speculator(
+            self,
+            self.cfg.get("speculation", "mode", fallback="prerender").strip().lower(),
+            clamp_int(self.cfg.get("speculation", "delay_ms", fallback=str(DEFAULT_SPECULATION_DELAY_MS)),
+                      DEFAULT_SPECULATION_DELAY_MS, 50, 5000),
+        )
+
+        self.journal = SessionJournal(persistent(SESSION_JOURNAL_PATH))
+        self._restoring = False
+        self._prev_tab = None
+        self.tabs.tabBar().tabMoved.connect(lambda *_: self.journal.record_order(self._tab_ids()))
+        self.journal_timer = QTimer(self)
+        self.journal_timer.setInterval(2000)
+        self.journal_timer.timeout.connect(self.on_journal_timer)
+        self.journal_timer.start()
+
+        self._first_load_seen = False
+        self._deferred_done = False
+        with STARTUP.phase("first_add_tab"):
+            if not self.restore_session():
+                self.add_tab(HOME_URL, switch=True)
+
+        # некритичное — после первой отрисовки (или через 5 с, если первая загрузка зависла)
+        QTimer.singleShot(5000, self.deferred_init)
+
+    def open_external_urls(self, urls):
+        # адреса из повторного запуска; без адресов — просто новая вкладка
+        for url in urls or [HOME_URL]:
+            self.add_tab(url, switch=True)
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
 
     def _shortcut(self, key: str, fn):
         a = QAction(self)
@@ -673,6 +6021,7 @@ class MiniBrowser(QMainWindow):
             self.act_reload: "Обновить",
             self.act_home: "Домой (стартовая)",
             self.act_settings: "Настройки",
+            self.act_downloads: "Загрузки (Ctrl+J)",
             self.act_new_tab: "Новая вкладка",
         }
 
@@ -682,42 +6031,226 @@ class MiniBrowser(QMainWindow):
         self.urlbar.setToolTip("Введите URL или запрос и нажмите Enter" if enabled else "")
         self.tb.setToolTip("Панель навигации" if enabled else "")
 
-        self.push_ui_tooltips_to_home()
+        self.start_page.bridge.set_settings(self.start_settings())
 
-    def push_ui_tooltips_to_home(self):
-        val = "1" if self.tooltips_enabled else "0"
-        js = (
-            f"localStorage.setItem('ui_tooltips','{val}');"
-            "if (window.renderLinks) window.renderLinks();"
-        )
-        for i in range(self.tabs.count()):
-            t = self.tabs.widget(i)
-            if t and t.view.url().toString().startswith(HOME_URL):
-                t.view.page().runJavaScript(js)
+    def start_settings(self) -> dict:
+        engine = self.cfg.get("search", "engine", fallback=DEFAULT_ENGINE)
+        return {
+            "search_template": SEARCH_ENGINES.get(engine, SEARCH_ENGINES[DEFAULT_ENGINE]),
+            "tooltips": self.tooltips_enabled,
+        }
 
     def new_tab_page(self, switch_to_new_tab: bool) -> QWebEnginePage:
         tab = self.add_tab("about:blank", switch=switch_to_new_tab, return_tab=True)
         return tab.page
 
-    def add_tab(self, url: str, switch: bool = False, return_tab: bool = False):
-        tab = BrowserTab(self.profile, self.new_tab_page, url)
-        idx = self.tabs.addTab(tab, "Загрузка…")
-
-        tab.view.titleChanged.connect(lambda t, tab=tab: self.tabs.setTabText(
-            self.tabs.indexOf(tab), (t[:28] + "…") if len(t) > 28 else t
-        ))
-        tab.view.urlChanged.connect(lambda q, tab=tab: self.on_url_changed(q, tab))
-        tab.view.loadFinished.connect(lambda ok, tab=tab: self.on_load_finished(ok, tab))
+    def add_tab(self, url: str, switch: bool = False, return_tab: bool = False,
+                title: str = "", lazy: bool = False, index: Optional[int] = None,
+                history: Optional[QByteArray] = None):
+        tab = BrowserTab(self.profile, self.new_tab_page, url, title=title, lazy=lazy, history=history,
+                         blocker=self.blocker, channel=self.start_page.channel, perf=self.perf)
+        if index is None:
+            idx = self.tabs.addTab(tab, "Загрузка…")
+        else:
+            idx = self.tabs.insertTab(index, tab, "Загрузка…")
+        if title:
+            self.set_tab_title(tab, title, record=False)
+        elif lazy:
+            self.set_tab_title(tab, url, record=False)
+        icon = self.favicons.icon_for(url)
+        if icon is not None:
+            self.tabs.setTabIcon(idx, icon)
+
+        if tab.view is not None:
+            self._wire_tab(tab)
+
+        if not self._restoring:
+            self.journal.record_open(tab.uid, url, title, idx)
 
         if switch:
             self.tabs.setCurrentIndex(idx)
 
         return tab if return_tab else None
 
+    def _wire_tab(self, tab: BrowserTab):
+        tab.connections += [
+            tab.view.titleChanged.connect(lambda t, tab=tab: self.set_tab_title(tab, t)),
+            tab.view.urlChanged.connect(lambda q, tab=tab: self.on_url_changed(q, tab)),
+            tab.view.loadStarted.connect(lambda tab=tab: setattr(tab, "loading", True)),
+            tab.view.loadFinished.connect(lambda ok, tab=tab: self.on_load_finished(ok, tab)),
+            tab.view.iconChanged.connect(lambda icon, tab=tab: self.on_icon_changed(icon, tab)),
+            self.watchdog.wire(tab),
+        ]
+
+    def set_tab_title(self, tab: BrowserTab, title: str, record: bool = True):
+        if record and title != tab.title:
+            self.journal.record_title(tab.uid, title)
+            if self.history and is_web_url(tab.url):
+                self.history.set_title(tab.url, title)
+            if is_web_url(tab.url):
+                self.autocomplete.note_title(tab.url, title)
+        tab.title = title
+        text = (title[:28] + "…") if len(title) > 28 else title
+        if tab.pinned:
+            text = "📌 " + text
+        if tab.hog:
+            text = "⚠ " + text
+        self.tabs.setTabText(self.tabs.indexOf(tab), text)
+
+    def _tab_ids(self):
+        return [self.tabs.widget(i).uid for i in range(self.tabs.count())]
+
+    def restore_session(self) -> bool:
+        saved, active_index = self.journal.replay()
+        if not saved:
+            # в старом журнале могли остаться записи с теми же id, что получат новые вкладки
+            self.journal.compact([], None)
+            return False
+
+        # все вкладки кроме активной — заглушки без QWebEngineView
+        self._restoring = True
+        try:
+            for item in saved:
+                url = HOME_URL if item["url"].startswith(LEGACY_HOME_URL) else item["url"]
+                self.add_tab(url, title=item.get("title", ""), lazy=True)
+        finally:
+            self._restoring = False
+
+        self.tabs.setCurrentIndex(active_index)
+        # uid вкладок в каждом процессе начинаются с 1: журнал сразу переписываем под новые id,
+        # иначе записи до сжатия легли бы на вкладки прошлого сеанса (это N коротких строк)
+        self.compact_journal()
+        self.on_tab_changed(active_index)
+        LOGGER.info(f"session restored: {len(saved)} tabs, active={active_index}")
+        return True
+
+    def compact_journal(self):
+        tabs = []
+        for i in range(self.tabs.count()):
+            t = self.tabs.widget(i)
+            tabs.append((t.uid, t.url, t.title))
+        cur = self.current_tab()
+        self.journal.compact(tabs, cur.uid if cur else None)
+
+    def deferred_init(self):
+        if self._deferred_done:
+            return
+        self._deferred_done = True
+        with STARTUP.phase("deferred_init"):
+            self.migrate_quick_links()
+            self.refresh_tiles()
+            self.start_cache_warmup()
+            self.downloads.resume_interrupted()
+        self.finish_startup_report()
+
+    def finish_startup_report(self):
+        if STARTUP.finished:
+            return
+        STARTUP.finished = True
+        report = STARTUP.report()
+        for line in report.splitlines():
+            LOGGER.info(line)
+        if cli_flag("--startup-report"):
+            print(report, flush=True)
+            try:
+                (LOG_DIR / "startup.json").write_text(json.dumps(STARTUP.as_dict(), indent=2), encoding="utf-8")
+            except Exception:
+                pass
+
+        check = cli_option("--startup-check")
+        if check is not None:
+            # регрессия холодного старта: сравнение с сохранённой базой, код выхода 1 при замедлении
+            QApplication.exit(self.check_startup_regression(clamp_int(check, 20, 0, 1000)))
+
+    def check_startup_regression(self, max_slowdown_pct: int) -> int:
+        # --startup-baseline FILE — заданная база (CI, тесты): её нет — ошибка, сама она не пишется
+        fixed = cli_option("--startup-baseline")
+        baseline_path = Path(fixed) if fixed else LOG_DIR / "startup_baseline.json"
+        total = STARTUP.total_ms()
+        try:
+            baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["total_ms"]
+        except Exception as e:
+            if fixed:
+                print(f"FAIL: cannot read startup baseline {baseline_path}: {e}", flush=True)
+                return 2
+            baseline_path.write_text(json.dumps(STARTUP.as_dict(), indent=2), encoding="utf-8")
+            print(f"startup baseline saved: {total:.1f} ms", flush=True)
+            return 0
+        limit = baseline * (1 + max_slowdown_pct / 100)
+        if total > limit:
+            LOGGER.error(f"startup regression: {total:.1f} ms > {limit:.1f} ms (baseline {baseline:.1f} ms)")
+            print(f"FAIL: startup {total:.1f} ms, baseline {baseline:.1f} ms, limit +{max_slowdown_pct}%", flush=True)
+            return 1
+        print(f"OK: startup {total:.1f} ms, baseline {baseline:.1f} ms", flush=True)
+        return 0
+
+    def on_journal_timer(self):
+        if self.journal.needs_compaction():
+            self.compact_journal()
+        else:
+            self.journal.flush()
+
+    def closeEvent(self, event):
+        self.compact_journal()
+        self.journal.close()
+        if self.history:
+            self.history.close()
+        if self.fulltext:
+            self.fulltext.close()
+        self.favicons.close()
+        self.thumbnails.close()
+        self.perf.close()
+        self.watchdog.close()
+        self.bookmarks.close()
+        if self.suggester:
+            self.suggester.close()
+        self.downloads.save()
+        super().closeEvent(event)
+
+    def on_tab_context_menu(self, pos):
+        index = self.tabs.tabBar().tabAt(pos)
+        tab = self.tabs.widget(index)
+        if tab is None:
+            return
+        menu = QMenu(self)
+        act_pin = menu.addAction("Открепить вкладку" if tab.pinned else "Закрепить вкладку")
+        act_close = menu.addAction("Закрыть вкладку")
+        act_reopen = menu.addAction("Открыть закрытую вкладку")
+        act_reopen.setEnabled(bool(self.closed_tabs))
+        chosen = menu.exec(self.tabs.tabBar().mapToGlobal(pos))
+        if chosen == act_pin:
+            tab.pinned = not tab.pinned
+            self.set_tab_title(tab, tab.title)
+        elif chosen == act_close:
+            self.close_tab(index)
+        elif chosen == act_reopen:
+            self.reopen_closed_tab()
+
     def close_tab(self, index: int):
         if self.tabs.count() <= 1:
             return
+        t = self.tabs.widget(index)
+        if t is None:
+            return
+        self.journal.record_close(t.uid)
+        if t.url and t.url != "about:blank":
+            self.closed_tabs.append({
+                "url": t.url,
+                "title": t.title,
+                "index": index,
+                "history": t.serialize_history(),
+            })
         self.tabs.removeTab(index)
+        if self._prev_tab is t:
+            self._prev_tab = None
+        t.teardown()
+
+    def reopen_closed_tab(self):
+        if not self.closed_tabs:
+            return
+        rec = self.closed_tabs.pop()
+        self.add_tab(rec["url"], switch=True, title=rec["title"],
+                     index=min(rec["index"], self.tabs.count()), history=rec["history"])
 
     def current_tab(self):
         return self.tabs.currentWidget()
@@ -727,27 +6260,196 @@ class MiniBrowser(QMainWindow):
         return t.view if t else None
 
     def on_tab_changed(self, _):
+        if self._restoring:
+            return
+        t = self.current_tab()
+        # простой считается с момента ухода с вкладки, а не с её выбора
+        prev, self._prev_tab = self._prev_tab, t
+        if prev is not None and prev is not t:
+            self.lifecycle.deactivate(prev)
+        if t:
+            if t.materialize():
+                self._wire_tab(t)
+            self.lifecycle.activate(t)
+            self.watchdog.on_activated(t)
+            self.journal.record_active(t.uid)
         v = self.current_view()
         if v:
             self.urlbar.setText(v.url().toString())
+        self.update_blocked_label()
+        self.speculator.cancel()
+
+    def update_blocked_label(self):
+        t = self.current_tab()
+        icpt = t.page.interceptor if t and t.page is not None else None
+        if not self.blocker.enabled or icpt is None:
+            self.blocked_label.setText("")
+            return
+        self.blocked_label.setText(
+            f"Заблокировано: {icpt.blocked} (≈{format_bytes(icpt.blocked_bytes)}) · "
+            f"всего {self.blocker.blocked_total}"
+        )
+
+    def on_icon_changed(self, icon: QIcon, tab: BrowserTab):
+        # пустая иконка приходит на каждом переходе — оставляем закэшированную для хоста
+        if icon.isNull():
+            return
+        self.favicons.put(tab.url, icon)
+        self.tabs.setTabIcon(self.tabs.indexOf(tab), icon)
 
     def on_url_changed(self, qurl: QUrl, tab: BrowserTab):
+        url = qurl.toString()
+        if url and url_host(url) != url_host(tab.url):
+            self.tabs.setTabIcon(self.tabs.indexOf(tab), self.favicons.icon_for(url) or QIcon())
+        if url and url != tab.url:
+            tab.url = url
+            self.journal.record_url(tab.uid, url)
+        if self.history and is_web_url(url):
+            self.history.record_visit(url)
+        if is_web_url(url):
+            self.autocomplete.note_visit(url)
         if tab == self.current_tab():
             self.urlbar.setText(qurl.toString())
             self.urlbar.setCursorPosition(0)
 
     def on_load_finished(self, ok: bool, tab: BrowserTab):
+        tab.loading = False
+        if not self._first_load_seen:
+            self._first_load_seen = True
+            STARTUP.mark("first_load_finished")
+            QTimer.singleShot(0, self.deferred_init)
         if not ok:
             return
-        if tab.view.url().toString().startswith(HOME_URL):
-            engine = self.cfg.get("search", "engine", fallback=DEFAULT_ENGINE)
-            tpl = SEARCH_ENGINES.get(engine, SEARCH_ENGINES[DEFAULT_ENGINE]).replace("\\", "\\\\").replace("'", "\\'")
-            js = (
-                f"localStorage.setItem('search_template','{tpl}');"
-                f"localStorage.setItem('ui_tooltips','{'1' if self.tooltips_enabled else '0'}');"
-                "if (window.renderLinks) window.renderLinks();"
-            )
-            tab.view.page().runJavaScript(js)
+        if tab.pending_scroll is not None:
+            p = tab.pending_scroll
+            tab.pending_scroll = None
+            tab.page.runJavaScript(f"window.scrollTo({p.x():.0f}, {p.y():.0f});")
+        if self.fulltext and is_web_url(tab.url) and self.fulltext.due(tab.url):
+            url = tab.url
+            QTimer.singleShot(PageTextIndex.EXTRACT_DELAY_MS, lambda: self.extract_page_text(tab, url))
+        if is_web_url(tab.url) and tab is self.current_tab() and self.thumbnails.due(url_host(tab.url)):
+            url = tab.url
+            QTimer.singleShot(ThumbnailStore.CAPTURE_DELAY_MS, lambda: self.capture_thumbnail(tab, url))
+
+    def capture_thumbnail(self, tab: BrowserTab, url: str):
+        # снимок только видимой вкладки, которая за время задержки никуда не ушла
+        if tab is not self.current_tab() or tab.view is None or tab.url != url or self.isMinimized():
+            return
+        self.thumbnails.capture(url_host(url), tab.view)
+
+    def top_sites(self, n: int):
+        # самые посещаемые сайты по frecency, по одному адресу на host
+        sites, seen = [], set()
+        if not self.history or n <= 0:
+            return sites
+        for url, title, *_ in self.history.top_frecency(n * 8):
+            host = url_host(url)
+            if not host or host in seen:
+                continue
+            seen.add(host)
+            sites.append((url, title, host))
+            if len(sites) >= n:
+                break
+        return sites
+
+    def start_cache_warmup(self):
+        if EPHEMERAL or self.cfg.get("cache", "warmup", fallback="false").strip().lower() != "true":
+            return
+        if self.cfg.get("cache", "type", fallback="disk").strip().lower() != "disk":
+            return
+        n = clamp_int(self.cfg.get("cache", "warmup_sites", fallback=str(DEFAULT_WARMUP_SITES)),
+                      DEFAULT_WARMUP_SITES, 0, 100)
+        self.warmer = CacheWarmer(self, [url for url, _title, _host in self.top_sites(n)])
+        self.warmer.start()
+
+    def refresh_tiles(self):
+        if not self.history:
+            return
+        self.start_page.bridge.set_tiles([
+            {"url": url, "title": title, "host": host, "thumb": self.thumbnails.digest(host)}
+            for url, title, host in self.top_sites(8)
+        ])
+
+    def on_quick_links(self):
+        for _id, title, url in self.bookmarks.quick():
+            if is_web_url(url):
+                self.autocomplete.note_quick_link(url, title)
+
+    def migrate_quick_links(self):
+        # до gdbrowse://start ссылки жили в localStorage file://.../start.html — забираем их оттуда один раз
+        if EPHEMERAL or not self.bookmarks.needs_legacy or not START_HTML_PATH.exists():
+            return
+        page = QWebEnginePage(self.profile, self)
+
+        def got(raw):
+            try:
+                links = json.loads(raw) if raw else None
+            except Exception:
+                links = None
+            if isinstance(links, list):
+                self.bookmarks.replace_quick(links)
+                LOGGER.info(f"quick links: {len(links)} migrated from start.html")
+            try:
+                START_HTML_PATH.unlink()
+            except OSError:
+                pass
+            page.deleteLater()
+
+        page.loadFinished.connect(lambda _ok: page.runJavaScript("localStorage.getItem('quick_links')", got))
+        page.setUrl(QUrl(LEGACY_HOME_URL))
+
+    def dump_memory_log(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить журнал", "gdbrowser.log", "Log (*.log *.txt)")
+        if path:
+            LOGGER.dump(path)
+
+    def open_history_search(self, text: str = ""):
+        if self.fulltext is None:
+            self.statusBar().showMessage("Поиск по истории выключен ([history]/[fulltext] в settings.ini)", 5000)
+            return
+        if self.history_panel is None:
+            self.history_panel = HistorySearchPanel(self.fulltext, lambda url: self.current_view().setUrl(QUrl(url)),
+                                                    self)
+            self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.history_panel)
+        self.history_panel.show()
+        self.history_panel.search(text or self.history_panel.edit.text())
+
+    def open_bookmarks(self):
+        if self.bookmarks_panel is None:
+            self.bookmarks_panel = BookmarksPanel(self.bookmarks, lambda url: self.current_view().setUrl(QUrl(url)),
+                                                  self)
+            self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.bookmarks_panel)
+        self.bookmarks_panel.show()
+        self.bookmarks_panel.edit.setFocus()
+
+    def bookmark_current(self):
+        view = self.current_view()
+        url = view.url().toString() if view else ""
+        if not is_web_url(url):
+            return
+        self.bookmarks.add(view.title() or url, url, OTHER_FOLDER)
+        self.statusBar().showMessage("Добавлено в закладки", 3000)
+
+    def on_bookmarks_imported(self, count: int, err: str):
+        if err:
+            self.statusBar().showMessage(f"Импорт закладок не удался: {err}", 8000)
+        else:
+            self.statusBar().showMessage(f"Импортировано закладок: {count}", 5000)
+
+    def extract_page_text(self, tab: BrowserTab, url: str):
+        # toPlainText асинхронный: текст приходит колбэком, нормализация и запись — в нити индекса
+        if tab.page is None or tab.url != url or tab.loading:
+            return
+        title = tab.title
+        tab.page.toPlainText(lambda text: self.fulltext.add(url, title, text))
+
+    def open_task_manager(self):
+        if self.task_manager is None:
+            self.task_manager = TaskManagerDialog(self, self)
+            self.task_manager.finished.connect(lambda _: setattr(self, "task_manager", None))
+        self.task_manager.show()
+        self.task_manager.raise_()
+        self.task_manager.activateWindow()
 
     def open_settings(self):
         dlg = SettingsDialog(self.cfg, self)
@@ -759,32 +6461,33 @@ class MiniBrowser(QMainWindow):
 
         self.cfg["search"]["engine"] = dlg.get_engine()
         self.cfg["ui"]["tooltips"] = "true" if dlg.get_tooltips_enabled() else "false"
+        self.cfg["blocking"]["enabled"] = "true" if dlg.get_blocking_enabled() else "false"
+        for key, value in dlg.get_cache_policy().items():
+            self.cfg["cache"][key] = value
         self.cfg["logs"]["enabled"] = "true" if dlg.get_logs_enabled() else "false"
         self.cfg["logs"]["max_mb"] = str(dlg.get_logs_max_mb())
         save_cfg(self.cfg)
 
 
         self.apply_tooltips(dlg.get_tooltips_enabled())
+        self.blocker.set_enabled(dlg.get_blocking_enabled())
+        if not EPHEMERAL:
+            apply_cache_policy(self.profile, self.cfg)
+        self.update_blocked_label()
 
-        for i in range(self.tabs.count()):
-            t = self.tabs.widget(i)
-            if t and t.view.url().toString().startswith(HOME_URL):
-                engine = self.cfg.get("search", "engine", fallback=DEFAULT_ENGINE)
-                tpl = SEARCH_ENGINES.get(engine, SEARCH_ENGINES[DEFAULT_ENGINE]).replace("\\", "\\\\").replace("'", "\\'")
-                t.view.page().runJavaScript(
-                    f"localStorage.setItem('search_template','{tpl}');"
-                    "if (window.renderLinks) window.renderLinks();"
-                )
+        self.start_page.bridge.set_settings(self.start_settings())
 
         new_logs_enabled = dlg.get_logs_enabled()
         new_logs_mb = dlg.get_logs_max_mb()
-        if (new_logs_enabled != old_logs_enabled) or (new_logs_mb != old_logs_mb):
+        if new_logs_mb != old_logs_mb:
+            LOGGER.set_max_bytes(new_logs_mb * 1024 * 1024)
+            LOGGER.info(f"log max_mb -> {new_logs_mb}")
+        if new_logs_enabled != old_logs_enabled:
             QMessageBox.information(
                 self,
                 "Логи",
                 "Настройки логов сохранены.\n"
-                "Очистка будет при достижении лимита.\n"
-                "Для включения/выключения chromium.log нужен перезапуск."
+                "Для включения/выключения логов нужен перезапуск."
             )
 
     def build_url(self, text: str) -> QUrl:
@@ -804,57 +6507,417 @@ class MiniBrowser(QMainWindow):
         if looks_like_url(text):
             return QUrl("https://" + text)
 
+        top = self.autocomplete.inline_url(text)
+        if top:
+            return QUrl(top)
+
         engine = self.cfg.get("search", "engine", fallback=DEFAULT_ENGINE)
         tpl = SEARCH_ENGINES.get(engine, SEARCH_ENGINES[DEFAULT_ENGINE])
         return QUrl(tpl.replace("{q}", encode_query(text)))
 
     def navigate_to_url(self):
-        self.current_view().setUrl(self.build_url(self.urlbar.text()))
+        if self.urlbar.text().startswith("@h "):
+            self.open_history_search(self.urlbar.text()[3:])
+            return
+        url = self.build_url(self.urlbar.text())
+        tab = self.current_tab()
+        page, finished = self.speculator.take(url.toString())
+        if page is None:
+            self.current_view().setUrl(url)
+            return
+        tab.adopt_page(page)
+        tab.connections.append(self.watchdog.wire(tab))
+        if finished is not None:
+            # loadFinished у предзагрузки уже прошёл — view его не повторит
+            self.on_load_finished(finished, tab)
 
     def on_download_requested(self, download):
+        # повторный запрос прерванной загрузки — без вопросов, в прежнее место
+        item = self.downloads.take_expected(download.url().toString())
+        if item is not None:
+            if item.rec.get("dir"):
+                download.setDownloadDirectory(item.rec["dir"])
+            if item.rec.get("filename"):
+                download.setDownloadFileName(item.rec["filename"])
+            self.downloads.add(download, item)
+            return
+
         try:
             filename = download.downloadFileName() or "download"
         except Exception:
             filename = "download"
 
-        reply = QMessageBox.question(
-            self,
-            "Загрузка файла",
-            f"Сайт хочет скачать:\n\n{filename}\n\nРазрешить?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-        )
-        if reply != QMessageBox.StandardButton.Yes:
-            try:
-                download.cancel()
-            except Exception:
-                pass
+        if self.cfg.get("downloads", "auto_save", fallback="false").strip().lower() == "true":
+            path = unique_path(downloads_dir(), filename)
+        else:
+            reply = QMessageBox.question(
+                self,
+                "Загрузка файла",
+                f"Сайт хочет скачать:\n\n{filename}\n\nРазрешить?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                try:
+                    download.cancel()
+                except Exception:
+                    pass
+                return
+
+            default_path = str((downloads_dir() / filename).resolve())
+            chosen, _ = QFileDialog.getSaveFileName(self, "Сохранить как…", default_path)
+            if not chosen:
+                try:
+                    download.cancel()
+                except Exception:
+                    pass
+                return
+            path = Path(chosen)
+
+        download.setDownloadDirectory(str(path.parent))
+        download.setDownloadFileName(path.name)
+        self.downloads.add(download)
+        self.downloads_panel.show()
+
+
+class BatchRunner(QObject):
+    # --batch: список адресов грузится пулом невидимых страниц (offscreen), по строке JSONL на адрес
+    VIEW_SIZE = QSize(1280, 800)
+
+    def __init__(self, urls, parallel: int, timeout_sec: int, out, artifacts: dict, parent=None):
+        super().__init__(parent)
+        self.profile = make_profile(CFG, self)
+        self.profile.downloadRequested.connect(self.on_download_requested)
+        self.blocker = ContentBlocker(CFG.get("blocking", "enabled", fallback="true").strip().lower() == "true", self)
+        self.perf = PerfTelemetry(self.profile, self)
+        self.queue = deque(enumerate(urls))
+        self.total = len(urls)
+        self.timeout_ms = timeout_sec * 1000
+        self.out = out
+        self.artifacts = artifacts  # вид -> папка: screenshot / pdf / mhtml
+        self.failed = 0
+        self.done_count = 0
+        self.slots = [self._make_slot() for _ in range(max(1, min(parallel, len(urls))))]
+
+    def _make_slot(self):
+        view = QWebEngineView()
+        page = BrowserPage(self.profile, lambda switch_to_new_tab: None, self.blocker, None, self.perf)
+        view.setPage(page)
+        view.resize(self.VIEW_SIZE)
+        view.show()  # offscreen: окна нет, но страница рисуется и grab() работает
+        slot = {"view": view, "page": page, "gen": 0, "res": None, "pending": 0, "timer": QTimer(self)}
+        slot["timer"].setSingleShot(True)
+        slot["timer"].timeout.connect(lambda slot=slot: self.on_timeout(slot))
+        page.loadFinished.connect(lambda ok, slot=slot: self.on_loaded(slot, ok))
+        page.pdfPrintingFinished.connect(lambda path, ok, slot=slot: self.on_pdf_done(slot, path, ok))
+        try:
+            page.loadingChanged.connect(lambda info, slot=slot: self.on_loading_changed(slot, info))
+        except AttributeError:
+            pass  # QWebEngineLoadingInfo — Qt 6.2+
+        return slot
+
+    def start(self):
+        LOGGER.info(f"batch: {self.total} urls, parallel={len(self.slots)}, timeout={self.timeout_ms // 1000}s")
+        for slot in self.slots:
+            self._next(slot)
+
+    def _next(self, slot):
+        if not self.queue:
+            slot["res"] = None
+            if all(s["res"] is None for s in self.slots):
+                QApplication.exit(1 if self.failed else 0)
             return
-
-        default_path = str((DOWNLOADS_DIR / filename).resolve())
-        path, _ = QFileDialog.getSaveFileName(self, "Сохранить как…", default_path)
-        if not path:
-            try:
-                download.cancel()
-            except Exception:
-                pass
+        n, url = self.queue.popleft()
+        slot["gen"] += 1
+        slot["n"] = n
+        slot["t0"] = time.perf_counter()
+        slot["res"] = {"n": n, "url": url}
+        slot["pending"] = 0
+        slot["timer"].start(self.timeout_ms)
+        slot["page"].interceptor.requests = 0
+        slot["page"].setUrl(QUrl(url))
+
+    def on_loading_changed(self, slot, info):
+        res = slot["res"]
+        if res is not None and info.status() == info.LoadStatus.LoadFailedStatus:
+            res["error"] = info.errorString()
+            res["error_code"] = info.errorCode()
+
+    def on_loaded(self, slot, ok: bool):
+        res = slot["res"]
+        if res is None or "status" in res:
+            return  # повторный loadFinished (редирект скриптом) или уже по таймауту
+        slot["timer"].stop()
+        page = slot["page"]
+        res["status"] = "ok" if ok else "failed"
+        res["load_ms"] = round((time.perf_counter() - slot["t0"]) * 1000, 1)
+        res["final_url"] = page.url().toString()
+        res["title"] = page.title()
+        res["requests"] = page.interceptor.requests
+        res["blocked"] = page.interceptor.blocked
+        if ok:
+            self._save_artifacts(slot)
+        if slot["pending"]:
+            slot["timer"].start(self.timeout_ms)  # тот же лимит на PDF/MHTML
+        else:
+            self._finish(slot)
+
+    def on_timeout(self, slot):
+        res = slot["res"]
+        if res is None:
+            return
+        if "status" in res:
+            res["artifact_errors"] = res.get("artifact_errors", []) + ["timeout"]
+            slot["pending"] = 0
+            self._finish(slot)
             return
+        slot["page"].triggerAction(QWebEnginePage.WebAction.Stop)
+        res["status"] = "timeout"
+        res["load_ms"] = self.timeout_ms
+        res["final_url"] = slot["page"].url().toString()
+        self._finish(slot)
+
+    def _artifact_path(self, slot, kind: str, ext: str) -> Path:
+        host = re.sub(r"[^\w.-]+", "_", QUrl(slot["res"]["url"]).host()) or "page"
+        return Path(self.artifacts[kind]) / f"{slot['n'] + 1:04d}_{host}.{ext}"
+
+    def _save_artifacts(self, slot):
+        res = slot["res"]
+        page = slot["page"]
+        if "screenshot" in self.artifacts:
+            path = self._artifact_path(slot, "screenshot", "png")
+            if slot["view"].grab().save(str(path)):
+                res["screenshot"] = str(path)
+        if "pdf" in self.artifacts:
+            path = self._artifact_path(slot, "pdf", "pdf")
+            res["pdf"] = str(path)
+            slot["pending"] += 1
+            page.printToPdf(str(path))
+        if "mhtml" in self.artifacts:
+            path = self._artifact_path(slot, "mhtml", "mhtml")
+            res["mhtml"] = str(path)
+            slot["pending"] += 1
+            page.save(str(path), QWebEngineDownloadRequest.SavePageFormat.MimeHtmlSaveFormat)
 
-        if hasattr(download, "setPath"):
-            download.setPath(path)
+    def on_download_requested(self, download):
+        # page.save() приходит сюда как загрузка; остальные загрузки в пакетном режиме не нужны
+        if not download.isSavePageDownload():
+            download.cancel()
+            return
+        slot = next((s for s in self.slots if s["page"] is download.page()), None)
         download.accept()
+        if slot is None:
+            return
+        gen = slot["gen"]
 
+        def finished():
+            if download.isFinished() and gen == slot["gen"]:
+                ok = download.state() == QWebEngineDownloadRequest.DownloadState.DownloadCompleted
+                self._artifact_done(slot, "mhtml", ok)
 
-def main():
-    app = QApplication(sys.argv)
-    app.setApplicationName("GdBrowser")
-    app.setStyleSheet(DARK_QSS)
+        download.isFinishedChanged.connect(finished)
+
+    def on_pdf_done(self, slot, path: str, ok: bool):
+        res = slot["res"]
+        if res is not None and res.get("pdf") == path:
+            self._artifact_done(slot, "pdf", ok)
 
-    win = MiniBrowser(CFG)
-    win.show()
+    def _artifact_done(self, slot, kind: str, ok: bool):
+        res = slot["res"]
+        if res is None or slot["pending"] <= 0:
+            return
+        if not ok:
+            res.pop(kind, None)
+            res.setdefault("artifact_errors", []).append(kind)
+        slot["pending"] -= 1
+        if not slot["pending"]:
+            slot["timer"].stop()
+            self._finish(slot)
+
+    def memory_rss(self) -> int:
+        # браузерный процесс + рендереры страниц пакета (GPU/utility-процессы не входят)
+        pids = {s["page"].renderProcessPid() for s in self.slots} - {0}
+        return process_rss_bytes(os.getpid()) + sum(process_rss_bytes(p) for p in pids)
+
+    def _finish(self, slot):
+        res = slot["res"]
+        res["rss"] = self.memory_rss()
+        if res["status"] != "ok":
+            self.failed += 1
+        self.done_count += 1
+        self.out.write(json.dumps(res, ensure_ascii=False) + "\n")
+        self.out.flush()
+        LOGGER.info(f"batch {self.done_count}/{self.total}: {res['status']} {res.get('load_ms')} ms {res['url']}")
+        self._next(slot)
+
+    def close(self):
+        self.perf.close()
+        for slot in self.slots:
+            slot["page"].deleteLater()
+            slot["view"].deleteLater()
+
+
+def run_batch(app, path: str) -> int:
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except Exception as e:
+        print(f"batch: cannot read {path}: {e}", file=sys.stderr)
+        return 2
+    urls = [QUrl.fromUserInput(u.strip()).toString() for u in lines if u.strip() and not u.lstrip().startswith("#")]
+    if not urls:
+        return 0
+
+    artifacts = {}
+    for kind, opt in (("screenshot", "--screenshots"), ("pdf", "--pdf"), ("mhtml", "--mhtml")):
+        folder = cli_option(opt)
+        if folder:
+            Path(folder).mkdir(parents=True, exist_ok=True)
+            artifacts[kind] = folder
+
+    out_path = cli_option("--out", "-")
+    out = sys.stdout if out_path == "-" else open(out_path, "w", encoding="utf-8")
+    try:
+        runner = BatchRunner(
+            urls,
+            clamp_int(cli_option("--parallel", "4"), 4, 1, 64),
+            clamp_int(cli_option("--timeout", "30"), 30, 1, 3600),
+            out,
+            artifacts,
+            app,
+        )
+        QTimer.singleShot(0, runner.start)
+        code = app.exec()
+        runner.close()
+        return code
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def run_perf_compare(path: str) -> int:
+    # флаги Chromium меняются только при старте, поэтому каждый профиль — отдельный процесс --batch
+    # (--ephemeral: у всех одинаково холодный кэш в памяти, в папку данных ничего не пишется)
+    rounds = clamp_int(cli_option("--rounds", "1"), 1, 1, 50)
+    base = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, str(Path(__file__).resolve())]
+    env = dict(os.environ, QTWEBENGINE_CHROMIUM_FLAGS=USER_CHROMIUM_FLAGS)
+    stats = {name: {"load": [], "rss": 0, "ok": 0, "n": 0, "wall": 0.0} for name in PERF_PROFILES}
+    code = 0
+    with tempfile.TemporaryDirectory(prefix="gdbrowse-perf-") as tmp:
+        for r in range(rounds):
+            # круги чередуют профили, чтобы дрейф сети/машины не ложился на один из них
+            for name, st in stats.items():
+                out = Path(tmp) / f"{name}.{r}.jsonl"
+                cmd = base + ["--batch", path, "--perf-profile", name, "--ephemeral", "--out", str(out),
+                              "--parallel", cli_option("--parallel", "4"), "--timeout", cli_option("--timeout", "30")]
+                print(f"[{r + 1}/{rounds}] {name}…", file=sys.stderr, flush=True)
+                t0 = time.perf_counter()
+                subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL)
+                st["wall"] += time.perf_counter() - t0
+                try:
+                    lines = out.read_text(encoding="utf-8").splitlines()
+                except OSError:
+                    print(f"{name}: batch run produced no results", file=sys.stderr)
+                    code = 1
+                    continue
+                for line in lines:
+                    rec = json.loads(line)
+                    st["n"] += 1
+                    st["rss"] = max(st["rss"], rec.get("rss", 0))
+                    if rec.get("status") == "ok":
+                        st["ok"] += 1
+                        st["load"].append(rec["load_ms"])
+
+    def pct(vals, q):
+        vals = sorted(vals)
+        return vals[min(len(vals) - 1, int(q * len(vals)))] if vals else 0.0
+
+    print(f"{'profile':<12} {'ok':>9} {'load p50':>10} {'load p95':>10} {'peak RSS':>10} {'wall':>8}")
+    for name, st in stats.items():
+        print(f"{name:<12} {st['ok']:>4}/{st['n']:<4} {pct(st['load'], .5):>8.0f}ms {pct(st['load'], .95):>8.0f}ms "
+              f"{format_bytes(st['rss']):>10} {st['wall'] / rounds:>7.1f}s")
+    return code
+
+
+class InstanceServer(QObject):
+    # принимает адреса от повторных запусков (по строке JSON на соединение)
+    urls_received = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.on_new_connection)
+        self._buffers = {}
+
+    def listen(self) -> bool:
+        name = instance_server_name()
+        if self.server.listen(name):
+            return True
+        # сокет занят: либо параллельно стартовал другой экземпляр, либо остался после падения
+        if forward_to_running_instance(normalize_cli_urls(cli_urls())):
+            return False
+        QLocalServer.removeServer(name)
+        if not self.server.listen(name):
+            LOGGER.warning(f"single instance: listen failed: {self.server.errorString()}")
+        return True
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            self._buffers[sock] = b""
+            sock.readyRead.connect(lambda sock=sock: self.on_ready_read(sock))
+            sock.disconnected.connect(lambda sock=sock: self.on_disconnected(sock))
+
+    def on_disconnected(self, sock: QLocalSocket):
+        self.on_ready_read(sock)
+        self._buffers.pop(sock, None)
+        sock.deleteLater()
+
+    def on_ready_read(self, sock: QLocalSocket):
+        buf = self._buffers.get(sock, b"") + bytes(sock.readAll())
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            try:
+                urls = json.loads(line.decode("utf-8")).get("urls", [])
+            except Exception:
+                LOGGER.warning("single instance: bad message")
+                continue
+            self.urls_received.emit([u for u in urls if isinstance(u, str)])
+        self._buffers[sock] = buf
+
+
+def main():
+    compare = cli_option("--perf-compare")
+    if compare is not None:
+        sys.exit(run_perf_compare(compare))
+
+    batch = cli_option("--batch")
+    if batch is not None:
+        # без окон: те же профиль, настройки и перехватчики, что у интерактивного браузера
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = QApplication(sys.argv)
+        app.setApplicationName("GdBrowser")
+        sys.exit(run_batch(app, batch))
+
+    with STARTUP.phase("qapplication"):
+        app = QApplication(sys.argv)
+        app.setApplicationName("GdBrowser")
+        app.setStyleSheet(DARK_QSS)
+
+    instance = None
+    if not cli_flag("--new-instance") and not EPHEMERAL:
+        instance = InstanceServer(app)
+        if not instance.listen():
+            sys.exit(0)
+
+    with STARTUP.phase("main_window"):
+        win = MiniBrowser(CFG)
+        for url in normalize_cli_urls(cli_urls()):
+            win.add_tab(url, switch=True)
+        win.show()
+    if instance is not None:
+        instance.urls_received.connect(win.open_external_urls)
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
-    ensure_app_files()
-    CFG = load_cfg()
     main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_source():
+    # Source.py при импорте создаёт папку данных от HOME — бенчмарки пишут во временную
+    os.environ["HOME"] = tempfile.mkdtemp(prefix="gdbrowse-bench-")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+    sys.path.insert(0, str(ROOT))
+    import Source
+    return Source
+
+
+def percentile(sorted_values, p: float):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def report(name: str, samples_ns) -> dict:
+    s = sorted(samples_ns)
+    us = lambda ns: ns / 1000
+    row = {
+        "n": len(s),
+        "mean_us": round(us(sum(s) / len(s)), 2) if s else 0.0,
+        "p50_us": round(us(percentile(s, 0.50)), 2),
+        "p99_us": round(us(percentile(s, 0.99)), 2),
+        "max_us": round(us(s[-1]), 2) if s else 0.0,
+    }
+    print(f"  {name:<28} n={row['n']:<8} mean={row['mean_us']:>9} us  p50={row['p50_us']:>9} us  "
+          f"p99={row['p99_us']:>9} us  max={row['max_us']:>9} us")
+    return row
@@ -0,0 +1,136 @@
+"""FilterEngine: компиляция списков и прогон 1M запросов через should_block.
+
+py benchmarks/bench_filter_engine.py [--filters DIR] [--urls FILE] [--requests 1000000] [--budget-us 20]
+--filters — папка с *.txt в формате EasyList (по умолчанию синтетический список ~60k правил);
+--urls    — записанные запросы, по строке: url [тип [хост страницы]] (иначе синтетические).
+Код выхода 1, если p99 одного should_block выше бюджета.
+"""
+import argparse
+import gc
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _env import load_source, report
+
+TYPES = ("script", "image", "stylesheet", "xmlhttprequest", "subdocument", "font", "media", "other")
+AD_WORDS = ("ads", "adserver", "banner", "track", "pixel", "analytics", "promo", "sponsor", "beacon", "metrics")
+
+
+def rand_host(rnd, tld=None):
+    name = "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 11)))
+    return f"{name}.{tld or rnd.choice(('com', 'net', 'org', 'ru', 'io'))}"
+
+
+def synthetic_lists(folder: Path, vocab, rnd: random.Random):
+    # как в EasyList: большинство правил несут редкое слово, общие слова (ads, track…) — лишь часть
+    ad_hosts = [rand_host(rnd) for _ in range(40_000)]
+    lines = ["[Adblock Plus 2.0]", "! synthetic list"]
+    lines += [f"||{h}^" for h in ad_hosts]
+    for _ in range(12_000):
+        w, v = rnd.choice(AD_WORDS), rnd.choice(vocab)
+        lines.append(rnd.choice((
+            f"/{v}/{w}/*",
+            f"-{v}-{w}.",
+            f"||{rand_host(rnd)}/{v}/*$script,third-party",
+            f"/{w}_{v}.js$script",
+            f"&{v}_id=",
+            f"*/{v}?*$image,domain={rand_host(rnd)}|~{rand_host(rnd)}",
+        )))
+    lines += [f"@@||{rand_host(rnd)}/{rnd.choice(vocab)}/$script" for _ in range(3000)]
+    lines += [f"{rand_host(rnd)}##.ad-{i}" for i in range(5000)]  # косметика — пропускается
+    (folder / "synthetic.txt").write_text("\n".join(lines), encoding="utf-8")
+    return ad_hosts
+
+
+def synthetic_requests(n: int, ad_hosts, vocab, rnd: random.Random):
+    pages = [rand_host(rnd) for _ in range(2000)]
+    common = ("static", "js", "img", "api", "v2", "assets", "cdn", "bundle", "main", "vendor")
+    for _ in range(n):
+        page = rnd.choice(pages)
+        r = rnd.random()
+        if r < 0.15:
+            host = "cdn." + rnd.choice(ad_hosts)
+        elif r < 0.6:
+            host = page
+        else:
+            host = rnd.choice(pages)
+        words = [rnd.choice(vocab) if rnd.random() < 0.3 else rnd.choice(common + AD_WORDS)
+                 for _ in range(rnd.randint(1, 4))]
+        query = f"?id={rnd.randint(1, 10 ** 6)}" + (f"&{rnd.choice(vocab)}_id=1" if rnd.random() < 0.05 else "")
+        yield f"https://{host}/{'/'.join(words)}/{rnd.randint(1, 10 ** 5)}.js{query}", host, page, rnd.choice(TYPES)
+
+
+def recorded_requests(path: Path, gd):
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            url = parts[0]
+            rtype = parts[1] if len(parts) > 1 else "other"
+            src = parts[2] if len(parts) > 2 else ""
+            yield url, gd.url_host(url), src, rtype
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--filters")
+    ap.add_argument("--urls")
+    ap.add_argument("--requests", type=int, default=1_000_000)
+    ap.add_argument("--budget-us", type=float, default=20.0)
+    args = ap.parse_args()
+
+    gd = load_source()
+    rnd = random.Random(11)
+    vocab = ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 9))) for _ in range(20_000)]
+    work = Path(tempfile.mkdtemp(prefix="gdbrowse-filters-"))
+    if args.filters:
+        folder = Path(args.filters)
+        ad_hosts = [rand_host(rnd) for _ in range(1000)]
+    else:
+        folder = work
+        ad_hosts = synthetic_lists(folder, vocab, rnd)
+    cache = work / "filters.bin"
+
+    t0 = time.perf_counter()
+    eng, _ = gd.FilterEngine.load(folder, cache)
+    t1 = time.perf_counter()
+    _, from_cache = gd.FilterEngine.load(folder, cache)
+    t2 = time.perf_counter()
+    print(f"rules: {eng.rule_count} (hosts {len(eng.block_hosts)}), compile {(t1 - t0) * 1000:.0f} ms, "
+          f"cached load {(t2 - t1) * 1000:.0f} ms (cache hit: {from_cache})")
+
+    if args.urls:
+        requests = list(recorded_requests(Path(args.urls), gd))
+    else:
+        requests = list(synthetic_requests(args.requests, ad_hosts, vocab, rnd))
+
+    # 1M заранее собранных запросов иначе попадают в каждый проход сборщика мусора и шумят в хвосте
+    gc.collect()
+    gc.freeze()
+    samples = []
+    blocked = 0
+    should_block = eng.should_block
+    wall = time.perf_counter()
+    for url, host, src, rtype in requests:
+        t = time.perf_counter_ns()
+        if should_block(url, host, src, rtype):
+            blocked += 1
+        samples.append(time.perf_counter_ns() - t)
+    wall = time.perf_counter() - wall
+
+    print(f"replayed {len(requests)} requests in {wall:.2f} s, blocked {blocked} "
+          f"({blocked * 100 / max(1, len(requests)):.1f}%)")
+    row = report("should_block", samples)
+    if row["p99_us"] > args.budget_us:
+        print(f"FAIL: p99 {row['p99_us']} us > {args.budget_us} us")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
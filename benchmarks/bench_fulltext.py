@@ -0,0 +1,92 @@
+"""PageTextIndex: поиск по тексту 100k страниц с ранжированием и сниппетами (цель: p99 < 20 мс).
+
+py benchmarks/bench_fulltext.py [--pages 100000] [--words 600] [--queries 2000] [--budget-ms 20]
+Индекс во временной папке наполняется через add (как при посещении страниц), затем идут запросы:
+частые и редкие слова, пары слов, недописанное слово (префикс) и промахи.
+Код выхода 1, если p99 search выше бюджета.
+"""
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+
+from _env import load_source, report
+
+
+def vocabulary(n: int, rnd: random.Random):
+    return ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 10))) for _ in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=100_000)
+    ap.add_argument("--words", type=int, default=600, help="слов в тексте страницы (~4 КБ)")
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--budget-ms", type=float, default=20.0)
+    args = ap.parse_args()
+
+    gd = load_source()
+    rnd = random.Random(24)
+    vocab = vocabulary(50_000, rnd)
+    # распределение слов как в текстах: первые слова словаря встречаются почти на каждой странице
+    weights = [1 / (i + 1) for i in range(len(vocab))]
+    cum = list(accumulate(weights))
+
+    def words(k):
+        return rnd.choices(vocab, cum_weights=cum, k=k)
+
+    path = Path(tempfile.mkdtemp(prefix="gdbrowse-fulltext-")) / "fulltext.sqlite"
+    idx = gd.PageTextIndex(path, gd.DEFAULT_FULLTEXT_KB * 1024, 0, 0)
+    t0 = time.perf_counter()
+    for i in range(args.pages):
+        title = " ".join(words(rnd.randint(2, 6))).title()
+        idx.add(f"https://site{i % 5000}.example/{i}", title, " ".join(words(args.words)))
+    queued = time.perf_counter() - t0
+
+    def indexed():
+        rows = idx.read("SELECT COUNT(*) FROM pages")
+        return rows[0][0] if rows else 0
+
+    while idx._q.qsize() or indexed() < args.pages:
+        time.sleep(0.5)
+    print(f"add: {args.pages} pages queued in {queued:.1f} s, indexed in {time.perf_counter() - t0:.1f} s, "
+          f"db {path.stat().st_size / 2 ** 20:.0f} MB")
+
+    queries = []
+    for _ in range(args.queries):
+        r = rnd.random()
+        if r < 0.3:
+            q = rnd.choice(vocab[:50])  # есть почти везде
+        elif r < 0.6:
+            q = rnd.choice(vocab[1000:])  # редкое
+        elif r < 0.85:
+            q = " ".join(words(2))
+        elif r < 0.95:
+            w = rnd.choice(vocab[:5000])
+            q = w[:max(2, len(w) - 2)]  # набирается: последнее слово — префиксом
+        else:
+            q = "zzqx" + rnd.choice(vocab)  # промах
+        queries.append(q)
+
+    samples, hits = [], 0
+    for q in queries:
+        t = time.perf_counter_ns()
+        res = idx.search(q)
+        samples.append(time.perf_counter_ns() - t)
+        hits += bool(res)
+    idx.close()
+
+    print(f"{len(queries)} queries, {hits} with results")
+    row = report("search (ranked + snippets)", samples)
+    if row["p99_us"] > args.budget_ms * 1000:
+        print(f"FAIL: p99 {row['p99_us'] / 1000:.1f} ms > {args.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""HistoryStore: 100k record_visit с GUI-нити не должны сбивать кадры (цель: p99 опоздания тика < 8 мс).
+
+py benchmarks/bench_history.py [--visits 100000] [--urls 30000] [--per-tick 200] [--frame-ms 16] [--budget-ms 8]
+GUI-нить крутит QTimer с шагом --frame-ms и меряет фактический интервал между тиками; в том же цикле
+событий визиты ставятся в очередь порциями по --per-tick, а фоновая нить пишет их пачками в SQLite.
+Сначала секунда без нагрузки (база), затем нагрузка до тех пор, пока всё не записано.
+Код выхода 1, если p99 опоздания тика под нагрузкой выше бюджета.
+"""
+import argparse
+import random
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _env import load_source, percentile, report
+
+
+def synthetic_urls(n: int, rnd: random.Random):
+    words = ["news", "mail", "docs", "wiki", "video", "shop", "blog", "forum", "maps", "code", "issue", "pull"]
+    hosts = ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 10))) + ".com" for _ in range(n // 20 + 1)]
+    return [(f"https://{rnd.choice(hosts)}/{'/'.join(rnd.choices(words, k=rnd.randint(1, 3)))}/{i}",
+             " ".join(rnd.choices(words, k=3)) + f" {i}") for i in range(n)]
+
+
+def late_stats(gaps_ns, frame_ms: float):
+    late = sorted(max(0.0, g / 1e6 - frame_ms) for g in gaps_ns)
+    return {"n": len(late), "p50": percentile(late, 0.50), "p99": percentile(late, 0.99), "max": late[-1] if late else 0.0}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--visits", type=int, default=100_000)
+    ap.add_argument("--urls", type=int, default=30_000)
+    ap.add_argument("--per-tick", type=int, default=200)
+    ap.add_argument("--frame-ms", type=float, default=16.0)
+    ap.add_argument("--budget-ms", type=float, default=8.0)
+    args = ap.parse_args()
+
+    gd = load_source()
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication([sys.argv[0]])
+    rnd = random.Random(4)
+    urls = synthetic_urls(args.urls, rnd)
+    # частые адреса посещаются чаще: повторные визиты идут через UPDATE, а не INSERT
+    visits = [urls[min(len(urls) - 1, int(rnd.paretovariate(1.2)) - 1)] if rnd.random() < 0.5 else rnd.choice(urls)
+              for _ in range(args.visits)]
+
+    path = Path(tempfile.mkdtemp(prefix="gdbrowse-history-")) / "history.sqlite"
+    store = gd.HistoryStore(path, 90)
+
+    state = {"last": None, "gaps": [], "queued": 0, "submit_ns": []}
+
+    def frame():
+        now = time.perf_counter_ns()
+        if state["last"] is not None:
+            state["gaps"].append(now - state["last"])
+        state["last"] = now
+
+    def produce():
+        end = min(len(visits), state["queued"] + args.per_tick)
+        for url, title in visits[state["queued"]:end]:
+            t = time.perf_counter_ns()
+            store.record_visit(url, title)
+            state["submit_ns"].append(time.perf_counter_ns() - t)
+        state["queued"] = end
+        if end >= len(visits):
+            producer.stop()
+
+    def run_for(pred, timeout_s: float):
+        deadline = time.monotonic() + timeout_s
+        while not pred() and time.monotonic() < deadline:
+            QTimer.singleShot(50, app.quit)
+            app.exec()
+        return pred()
+
+    frames = QTimer()
+    frames.setInterval(round(args.frame_ms))
+    frames.timeout.connect(frame)
+    frames.start()
+
+    run_for(lambda: False, 1.0)
+    idle_gaps, state["gaps"], state["last"] = state["gaps"], [], None
+
+    producer = QTimer()
+    producer.setInterval(0)
+    producer.timeout.connect(produce)
+    t0 = time.perf_counter()
+    producer.start()
+    ok = run_for(lambda: state["queued"] >= len(visits) and store._q.empty(), 300)
+    run_for(lambda: False, gd.SqliteWorker.BATCH_WAIT * 2)  # последняя пачка
+    frames.stop()
+    load_gaps = state["gaps"]
+    store.close()
+    wall = time.perf_counter() - t0
+
+    with sqlite3.connect(str(path)) as conn:
+        written = conn.execute("SELECT COUNT(*) FROM visits").fetchone()[0]
+        distinct = conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+    print(f"{args.visits} visits ({distinct} urls) queued and written in {wall:.2f} s, "
+          f"{written} rows in visits" + ("" if ok else " (timed out)"))
+    report("record_visit (GUI thread)", state["submit_ns"])
+    for name, gaps in (("idle", idle_gaps), ("under load", load_gaps)):
+        s = late_stats(gaps, args.frame_ms)
+        print(f"  tick lateness {name:<11} n={s['n']:<6} p50={s['p50']:.2f} ms  p99={s['p99']:.2f} ms  "
+              f"max={s['max']:.2f} ms")
+
+    p99 = late_stats(load_gaps, args.frame_ms)["p99"]
+    if written != args.visits:
+        print(f"FAIL: {written} of {args.visits} visits written")
+        return 1
+    if p99 > args.budget_ms:
+        print(f"FAIL: p99 tick lateness {p99:.2f} ms > {args.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""PrefixIndex: задержка запроса автодополнения на 200k записей (цель: p99 < 1 мс).
+
+py benchmarks/bench_prefix_index.py [--entries 200000] [--queries 20000] [--budget-us 1000]
+Код выхода 1, если p99 запроса выше бюджета.
+"""
+import argparse
+import random
+import string
+import sys
+import time
+
+from _env import load_source, report
+
+WORDS = ["news", "mail", "video", "docs", "github", "python", "pull", "requests", "issue", "wiki", "music",
+         "maps", "shop", "cloud", "forum", "blog", "photo", "travel", "weather", "sport", "game", "code"]
+
+
+def synthetic_rows(n: int, rnd: random.Random):
+    rows = []
+    for i in range(n):
+        host = "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 10))) + rnd.choice((".com", ".org", ".ru"))
+        path = "/".join(rnd.choices(WORDS, k=rnd.randint(0, 3)))
+        title = " ".join(rnd.choices(WORDS, k=rnd.randint(1, 5))) + f" {i}"
+        rows.append((f"https://{host}/{path}", title, rnd.random() * 40))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=200_000)
+    ap.add_argument("--queries", type=int, default=20_000)
+    ap.add_argument("--budget-us", type=float, default=1000.0)
+    args = ap.parse_args()
+
+    gd = load_source()
+    rnd = random.Random(1)
+    rows = synthetic_rows(args.entries, rnd)
+
+    idx = gd.PrefixIndex()
+    t0 = time.perf_counter()
+    idx.bulk_load(rows)
+    print(f"bulk_load: {args.entries} entries in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    # набор префиксов как при наборе: 1..12 символов от адресов и слов заголовков, плюс промахи
+    prefixes = []
+    for _ in range(args.queries):
+        url, title, _ = rows[rnd.randrange(len(rows))]
+        src = gd.strip_url_for_match(url) if rnd.random() < 0.6 else rnd.choice(title.lower().split())
+        prefixes.append(src[:rnd.randint(1, 12)] if rnd.random() < 0.95 else "zzq" + src[:3])
+
+    cold, warm = [], []
+    for p in prefixes:
+        t = time.perf_counter_ns()
+        idx.query(p)
+        cold.append(time.perf_counter_ns() - t)
+    for p in prefixes:
+        t = time.perf_counter_ns()
+        idx.query(p)
+        warm.append(time.perf_counter_ns() - t)
+
+    updates = []
+    for i in range(5000):
+        url, title, score = rows[rnd.randrange(len(rows))]
+        t = time.perf_counter_ns()
+        if i % 2:
+            idx.add(url, "", score + 1)
+        else:
+            idx.add(url, title + " upd")
+        updates.append(time.perf_counter_ns() - t)
+
+    print("per call:")
+    first = report("query (first time)", cold)
+    report("query (repeated)", warm)
+    report("add / retitle", updates)
+    if first["p99_us"] > args.budget_us:
+        print(f"FAIL: p99 {first['p99_us']} us > {args.budget_us} us")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
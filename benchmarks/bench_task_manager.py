@@ -0,0 +1,68 @@
+"""ProcessSampler: цена опроса 200 процессов для диспетчера задач (цель: < 1% одного ядра).
+
+py benchmarks/bench_task_manager.py [--procs 200] [--cycles 10]
+Запускает --procs спящих процессов вместо рендереров и крутит ProcessSampler с интервалом
+TaskManagerDialog.SAMPLE_SEC; cost_sec каждого цикла — CPU нити опроса.
+Код выхода 1, если хоть один цикл дороже 1% интервала или не все процессы опрошены.
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import threading
+
+from _env import load_source, report
+
+
+def spawn_sleepers(n: int):
+    sleep = shutil.which("sleep")
+    cmd = [sleep, "3600"] if sleep else [sys.executable, "-c", "import time; time.sleep(3600)"]
+    return [subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL) for _ in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--procs", type=int, default=200)
+    ap.add_argument("--cycles", type=int, default=10)
+    args = ap.parse_args()
+
+    gd = load_source()
+    interval = gd.TaskManagerDialog.SAMPLE_SEC
+    procs = spawn_sleepers(args.procs)
+    pids = [p.pid for p in procs]
+    costs, sampled = [], []
+    done = threading.Event()
+
+    def on_sample(out):
+        costs.append(sampler.cost_sec)
+        sampled.append(sum(1 for pid in pids if out.get(pid, (0, 0))[0] > 0))
+        if len(costs) >= args.cycles:
+            done.set()
+
+    try:
+        sampler = gd.ProcessSampler(interval, on_sample)
+        sampler.set_pids(pids)
+        done.wait(interval * (args.cycles + 5))
+        sampler.close()
+    finally:
+        for p in procs:
+            p.kill()
+        for p in procs:
+            p.wait()
+
+    print(f"{args.procs} processes, {len(costs)} cycles every {interval:.1f} s, "
+          f"sampled per cycle: min {min(sampled, default=0)}")
+    report("sampling cycle (thread CPU)", [c * 1e9 for c in costs])
+    worst = max(costs, default=0.0) / interval
+    print(f"  worst cycle: {worst * 100:.3f}% of one core")
+    if len(costs) < args.cycles or min(sampled) < args.procs:
+        print("FAIL: not every process was sampled")
+        return 1
+    if worst >= 0.01:
+        print(f"FAIL: {worst * 100:.2f}% of one core >= 1%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""ThumbnailStore.capture: время GUI-нити на снимок вкладки (цель: p99 < 5 мс).
+
+py benchmarks/bench_thumbnails.py [--url URL] [--size 1280x800] [--shots 200] [--budget-ms 5]
+Страница грузится в offscreen QWebEngineView, затем снимается --shots раз; масштаб, JPEG и запись
+идут в фоновой нити и в бюджет GUI-нити не входят (их время печатается отдельно).
+Код выхода 1, если p99 GUI-нити выше бюджета.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _env import load_source
+
+PAGE = ("data:text/html,<title>bench</title><body style='margin:0;font:16px sans-serif'>"
+        + "".join(f"<div style='padding:8px;background:hsl({i * 37 % 360},60%,85%)'>row {i} "
+                  + "lorem ipsum dolor sit amet " * 6 + "</div>" for i in range(120))
+        + "</body>")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default=PAGE)
+    ap.add_argument("--size", default="1280x800")
+    ap.add_argument("--shots", type=int, default=200)
+    ap.add_argument("--budget-ms", type=float, default=5.0)
+    args = ap.parse_args()
+
+    gd = load_source()
+    from PyQt6.QtCore import QEventLoop, QSize, QTimer, QUrl
+    from PyQt6.QtWebEngineCore import QWebEngineProfile
+    from PyQt6.QtWebEngineWidgets import QWebEngineView
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication([sys.argv[0]])
+
+    def wait(pred, timeout_s):
+        loop = QEventLoop()
+        deadline = time.monotonic() + timeout_s
+        while not pred() and time.monotonic() < deadline:
+            QTimer.singleShot(20, loop.quit)
+            loop.exec()
+        return pred()
+
+    w, h = (int(x) for x in args.size.lower().split("x"))
+    profile = QWebEngineProfile()  # off-the-record: на диск ничего
+    view = QWebEngineView()
+    view.setPage(gd.QWebEnginePage(profile, view))
+    view.resize(QSize(w, h))
+    view.show()
+    loaded = []
+    view.loadFinished.connect(loaded.append)
+    view.setUrl(QUrl(args.url))
+    if not wait(lambda: loaded, 30):
+        print("FAIL: page did not load")
+        return 1
+    wait(lambda: False, 1.0)  # дать странице дорисоваться, как CAPTURE_DELAY_MS в браузере
+
+    store = gd.ThumbnailStore(Path(tempfile.mkdtemp(prefix="gdbrowse-thumbs-")))
+    store.gui_ms = gd.deque(maxlen=args.shots)
+    saved = []
+    store.saved.connect(saved.append)
+    t0 = time.perf_counter()
+    for i in range(args.shots):
+        store.capture(f"host{i}.example", view)
+        app.processEvents()
+    ok = wait(lambda: len(saved) >= args.shots, 120)
+    worker_s = time.perf_counter() - t0
+
+    ms = sorted(store.gui_ms)
+    p = lambda q: ms[min(len(ms) - 1, int(len(ms) * q))]
+    print(f"view {w}x{h}, {len(ms)} captures")
+    print(f"  GUI thread (grab + toImage): p50={p(0.5):.2f} ms  p99={p(0.99):.2f} ms  max={ms[-1]:.2f} ms")
+    print(f"  worker (scale + JPEG + write), all shots: {worker_s:.2f} s, saved {len(saved)}"
+          + ("" if ok else " (timed out)"))
+    store.close()
+    view.close()
+    view.deleteLater()
+    app.processEvents()
+    if p(0.99) > args.budget_ms:
+        print(f"FAIL: p99 {p(0.99):.2f} ms > {args.budget_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import gc
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Source.py считает пути данных от HOME при импорте — до импорта подменяем на временный
+TEST_HOME = Path(tempfile.mkdtemp(prefix="gdbrowse-test-"))
+os.environ["HOME"] = str(TEST_HOME)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("QTWEBENGINE_DISABLE_SANDBOX", "1")
+sys.path.insert(0, str(ROOT))
+
+try:
+    import Source
+except ImportError as e:  # нет PyQt6/QtWebEngine или их системных библиотек
+    Source = None
+    IMPORT_ERROR = e
+
+
+def pytest_collection_modifyitems(config, items):
+    if Source is None:
+        skip = pytest.mark.skip(reason=f"Source.py не импортируется: {IMPORT_ERROR}")
+        for item in items:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def gd():
+    return Source
+
+
+@pytest.fixture(scope="session")
+def qapp(gd):
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    yield app
+
+
+def pump(ms: int = 50):
+    # крутим цикл событий Qt, включая отложенные deleteLater
+    from PyQt6.QtCore import QCoreApplication, QEvent, QEventLoop, QTimer
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec()
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+
+
+def wait_until(pred, timeout: float = 10.0, step_ms: int = 50) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if pred():
+            return True
+        pump(step_ms)
+    return pred()
+
+
+def live_objects(cls):
+    # python-обёртки, у которых C++-объект ещё не удалён
+    from PyQt6 import sip
+    gc.collect()
+    return [o for o in gc.get_objects() if isinstance(o, cls) and not sip.isdeleted(o)]
+
+
+def renderer_pids():
+    # рендереры Chromium этого процесса: --type=renderer среди потомков (через зиготу)
+    me = os.getpid()
+    pids = set()
+    for d in os.listdir("/proc"):
+        if not d.isdigit():
+            continue
+        try:
+            cmd = Path(f"/proc/{d}/cmdline").read_bytes()
+            if b"--type=renderer" not in cmd:
+                continue
+            pid = int(d)
+            for _ in range(4):
+                pid = int(Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()[1])
+                if pid == me:
+                    pids.add(int(d))
+                    break
+                if pid <= 1:
+                    break
+        except (OSError, ValueError, IndexError):
+            continue
+    return pids
+
+
+@pytest.fixture
+def browser(gd, qapp):
+    win = gd.MiniBrowser(gd.CFG)
+    win.show()
+    wait_until(lambda: win.current_tab() is not None and not win.current_tab().loading, 20)
+    win.deferred_init()
+    pump(200)
+    yield win
+    win.close()
+    win.deleteLater()
+    pump(200)
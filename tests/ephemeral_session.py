@@ -0,0 +1,98 @@
+"""Полный сеанс в --ephemeral для test_ephemeral.py: вкладки, история, закладки, загрузка.
+
+Запускается отдельным процессом (EPHEMERAL читается из argv при импорте Source.py);
+итог — одна строка JSON в stdout.
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from PyQt6.QtCore import QEventLoop, QTimer, QUrl
+from PyQt6.QtWidgets import QApplication
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 МБ
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/file.bin":
+            body = PAYLOAD
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Disposition", "attachment; filename=file.bin")
+        else:
+            body = f"<title>Page {self.path.strip('/')}</title><p>ephemeral {self.path}</p>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def wait(pred, timeout: float = 20.0) -> bool:
+    loop = QEventLoop()
+    deadline = time.monotonic() + timeout
+    while not pred() and time.monotonic() < deadline:
+        QTimer.singleShot(30, loop.quit)
+        loop.exec()
+    return bool(pred())
+
+
+def main():
+    # EPHEMERAL и пути данных Source.py считает при импорте
+    sys.argv = [sys.argv[0], "--ephemeral"]
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    import Source as gd
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    app = QApplication([sys.argv[0]])
+    win = gd.MiniBrowser(gd.CFG)
+    win.show()
+    out = {"ephemeral": gd.EPHEMERAL}
+
+    # вкладки
+    tabs = [win.add_tab(f"{base}/p{i}", switch=True, return_tab=True) for i in range(3)]
+    out["loaded"] = wait(lambda: all(t.title == f"Page p{i}" for i, t in enumerate(tabs)))
+    win.deferred_init()
+    win.close_tab(win.tabs.indexOf(tabs[-1]))
+    win.reopen_closed_tab()
+    out["reopened"] = wait(lambda: win.current_tab().title == "Page p2")
+
+    # история только в памяти: адресная строка находит посещённое по словам заголовка
+    found = [u for u, _, _ in win.autocomplete.index.query("page", 10)]
+    out["history"] = all(f"{base}/p{i}" in found for i in range(3))
+    out["history_store"] = win.history is not None
+
+    # закладки: Ctrl+D и панель работают, но в базу ничего не пишется
+    win.bookmark_current()
+    win.open_bookmarks()
+    out["quick_links"] = [u for _, _, u in win.bookmarks.quick()] == [it["url"] for it in gd.DEFAULT_QUICK_LINKS]
+
+    # загрузка: файл — в системные «Загрузки», не в папку данных
+    win.current_view().setUrl(QUrl(f"{base}/file.bin"))
+    out["download"] = wait(lambda: any(it.state == "done" for it in win.downloads.items), 30)
+    done = [it.rec for it in win.downloads.items if it.state == "done"]
+    if done:
+        path = Path(done[0]["dir"]) / done[0]["filename"]
+        out["download_path"] = str(path)
+        out["download_ok"] = path.exists() and path.read_bytes() == PAYLOAD
+
+    app.closeAllWindows()  # closeEvent: журнал, история, загрузки — как при выходе
+    win.deleteLater()
+    wait(lambda: False, 0.5)
+    server.shutdown()
+    print(json.dumps(out), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
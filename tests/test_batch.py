@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from conftest import ROOT
+
+TIMEOUT_SEC = 3
+
+
+class SiteHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/hang":
+            self.server.release.wait(30)  # отвечает, только когда тест уже закончился
+            return
+        if self.path == "/old":
+            self.send_response(302)
+            self.send_header("Location", "/b.html")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_batch_against_local_server(gd, tmp_path):
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "a.html").write_text("<title>Page A</title><h1>A</h1><p>" + "text " * 200, encoding="utf-8")
+    (site / "b.html").write_text("<title>Page B</title><h1>B</h1>", encoding="utf-8")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(SiteHandler, directory=str(site)))
+    server.daemon_threads = True
+    server.release = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    urls = [f"{base}/a.html", f"{base}/old", f"{base}/hang"]
+    (tmp_path / "urls.txt").write_text("# local pages\n" + "\n".join(urls) + "\n", encoding="utf-8")
+    out, shots, pdfs = tmp_path / "out.jsonl", tmp_path / "shots", tmp_path / "pdf"
+    env = dict(os.environ, HOME=str(tmp_path / "home"))
+    try:
+        proc = subprocess.run(
+            [sys.executable, str(ROOT / "Source.py"), "--batch", str(tmp_path / "urls.txt"),
+             "--parallel", "2", "--timeout", str(TIMEOUT_SEC), "--out", str(out),
+             "--screenshots", str(shots), "--pdf", str(pdfs)],
+            env=env, cwd=str(tmp_path), capture_output=True, text=True, timeout=120)
+    finally:
+        server.release.set()
+        server.shutdown()
+        server.server_close()
+
+    assert proc.returncode == 1, proc.stderr[-4000:]  # /hang не уложился в --timeout
+    rows = {r["n"]: r for r in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+    assert sorted(rows) == [0, 1, 2]
+
+    a, moved, hung = rows[0], rows[1], rows[2]
+    assert a["status"] == "ok" and a["final_url"] == urls[0] and a["title"] == "Page A"
+    assert moved["status"] == "ok" and moved["final_url"] == f"{base}/b.html" and moved["title"] == "Page B"
+    for r in (a, moved):
+        assert 0 < r["load_ms"] < TIMEOUT_SEC * 1000
+        assert r["requests"] >= 1
+    assert hung["status"] == "timeout"
+    assert hung["load_ms"] == TIMEOUT_SEC * 1000
+    assert "screenshot" not in hung and "pdf" not in hung
+
+    for r in (a, moved):
+        assert "artifact_errors" not in r
+        with open(r["screenshot"], "rb") as f:
+            assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+        with open(r["pdf"], "rb") as f:
+            assert f.read(5) == b"%PDF-"
+    assert len(list(shots.iterdir())) == 2 and len(list(pdfs.iterdir())) == 2
@@ -0,0 +1,115 @@
+import json
+import time
+import tracemalloc
+from html import escape
+
+import pytest
+
+N_FOLDERS = 50
+PER_FOLDER = 1000  # 50 × 1000 = 50k закладок
+PEAK_LIMIT = 4 * 1024 * 1024  # файл — больше 5 МБ; весь целиком в памяти не помещается
+
+
+def write_netscape(path):
+    # папки «Folder i», у каждой пятой — вложенная «Sub i» с половиной её закладок
+    with path.open("w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE NETSCAPE-Bookmark-file-1>\n<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n")
+        for i in range(N_FOLDERS):
+            f.write(f'<DT><H3 ADD_DATE="1700000000">Folder {i}</H3>\n<DL><p>\n')
+            half = PER_FOLDER // 2 if i % 5 == 0 else PER_FOLDER
+            for j in range(half):
+                tags = ' TAGS="work,read"' if j % 10 == 0 else ""
+                f.write(f'<DT><A HREF="https://h{i}.example/page/{j}?q=a&amp;b=1" ADD_DATE="1700000000"{tags}>'
+                        f'{escape(f"Page {i}/{j} <&>")}</A>\n')
+            if half != PER_FOLDER:
+                f.write(f"<DT><H3>Sub {i}</H3>\n<DL><p>\n")
+                for j in range(half, PER_FOLDER):
+                    f.write(f'<DT><A HREF="https://h{i}.example/sub/{j}">Page {i}/{j}</A>\n')
+                f.write("</DL><p>\n")
+            f.write("</DL><p>\n")
+        f.write("</DL><p>\n")
+
+
+def write_chrome(path):
+    def node(i):
+        half = PER_FOLDER // 2 if i % 5 == 0 else PER_FOLDER
+        children = [{"date_added": "13300000000000000", "id": str(j), "name": f"Page {i}/{j}",
+                     "type": "url", "url": f"https://h{i}.example/page/{j}"} for j in range(half)]
+        if half != PER_FOLDER:
+            children.append({"children": [{"id": str(j), "name": f"Page {i}/{j}", "type": "url",
+                                           "url": f"https://h{i}.example/sub/{j}"} for j in range(half, PER_FOLDER)],
+                             "id": f"s{i}", "name": f"Sub {i}", "type": "folder"})
+        return {"children": children, "id": f"f{i}", "name": f"Folder {i}", "type": "folder"}
+
+    # Chrome пишет "children" раньше "name" — название папки приходит уже после её содержимого
+    with path.open("w", encoding="utf-8") as f:
+        f.write('{"checksum": "0", "roots": {"bookmark_bar": {"children": [')
+        for i in range(N_FOLDERS):
+            if i:
+                f.write(", ")
+            json.dump(node(i), f)
+        f.write('], "id": "1", "name": "Bookmarks bar", "type": "folder"}, '
+                '"other": {"children": [], "id": "2", "name": "Other bookmarks", "type": "folder"}}, "version": 1}')
+
+
+def run_import(gd, tmp_path, src):
+    db = gd.BookmarkDb(tmp_path / "bookmarks.sqlite", lambda: None)
+    result = []
+    try:
+        tracemalloc.start()
+        db.submit(db._import, src, lambda count, err: result.append((count, err)))
+        deadline = time.monotonic() + 120
+        while not result and time.monotonic() < deadline:
+            time.sleep(0.05)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        db.close()
+    assert result == [(N_FOLDERS * PER_FOLDER, "")]
+    return db, peak
+
+
+def tree(db, folder):
+    # {название: (число закладок, поддерево)}
+    return {title: (db.count(fid), tree(db, fid))
+            for fid, title in db.read("SELECT id, title FROM folders WHERE parent=? ORDER BY position", (folder,))}
+
+
+def expected_folders():
+    return {f"Folder {i}": (PER_FOLDER // 2, {f"Sub {i}": (PER_FOLDER // 2, {})}) if i % 5 == 0
+            else (PER_FOLDER, {}) for i in range(N_FOLDERS)}
+
+
+def import_root(db, name):
+    return db.read("SELECT id FROM folders WHERE parent IS NULL AND title=?", (f"Импорт: {name}",))[0][0]
+
+
+def test_netscape_import_50k_streams(gd, tmp_path):
+    src = tmp_path / "bookmarks.html"
+    write_netscape(src)
+    assert src.stat().st_size > PEAK_LIMIT
+    db, peak = run_import(gd, tmp_path, src)
+    assert peak < PEAK_LIMIT, f"peak {peak / 2 ** 20:.1f} MB"
+
+    root = import_root(db, src.name)
+    assert tree(db, root) == expected_folders()
+    assert db.read("SELECT count(*) FROM bookmarks")[0][0] == N_FOLDERS * PER_FOLDER
+    # две метки у каждой десятой закладки первой половины/всей папки
+    assert db.read("SELECT count(*) FROM tags")[0][0] == 2 * (40 * PER_FOLDER // 10 + 10 * PER_FOLDER // 20)
+    first = db.read("SELECT b.title, b.url, b.position FROM bookmarks b JOIN folders f ON f.id=b.folder "
+                    "WHERE f.title='Folder 1' ORDER BY b.position LIMIT 1")
+    assert first == [("Page 1/0 <&>", "https://h1.example/page/0?q=a&b=1", 1)]
+
+
+def test_chrome_json_import_50k_streams(gd, tmp_path):
+    pytest.importorskip("ijson")  # без ijson JSON читается целиком — это и есть запасной путь
+    src = tmp_path / "Bookmarks"
+    write_chrome(src)
+    assert src.stat().st_size > PEAK_LIMIT
+    db, peak = run_import(gd, tmp_path, src)
+    assert peak < PEAK_LIMIT, f"peak {peak / 2 ** 20:.1f} MB"
+
+    root = import_root(db, src.name)
+    assert tree(db, root) == {"Bookmarks bar": (0, expected_folders()), "Other bookmarks": (0, {})}
+    # date_added Chrome — мкс от 1601 года
+    assert db.read("SELECT min(added) FROM bookmarks")[0][0] == pytest.approx(13300000000 - 11644473600)
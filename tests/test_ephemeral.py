@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SETTINGS = """\
+[downloads]
+auto_save = true
+
+[suggest]
+enabled = false
+
+[logs]
+enabled = true
+"""
+
+
+def snapshot(root: Path):
+    # путь -> (размер, mtime) для файлов и каталогов; пустое, если корня нет
+    if not root.exists():
+        return {}
+    out = {}
+    for p in [root, *root.rglob("*")]:
+        st = p.lstat()
+        out[str(p.relative_to(root))] = (p.is_dir(), 0 if p.is_dir() else st.st_size, st.st_mtime_ns)
+    return out
+
+
+def test_full_ephemeral_session_writes_nothing(gd, tmp_path):
+    home = tmp_path / "home"
+    temp = tmp_path / "tmp"
+    data = home / "GdStepan2" / "GdBrowser"
+    data.mkdir(parents=True)
+    temp.mkdir()
+    (data / "settings.ini").write_text(SETTINGS, encoding="utf-8")  # читается, но не переписывается
+
+    before = snapshot(data), snapshot(temp)
+    env = dict(os.environ, HOME=str(home), TMPDIR=str(temp), QT_QPA_PLATFORM="offscreen",
+               QTWEBENGINE_DISABLE_SANDBOX="1", XDG_DOWNLOAD_DIR=str(home / "Downloads"))
+    proc = subprocess.run([sys.executable, str(Path(__file__).with_name("ephemeral_session.py"))],
+                          env=env, capture_output=True, text=True, timeout=180)
+    assert proc.returncode == 0, proc.stderr[-4000:]
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert out["ephemeral"]
+    assert out["loaded"] and out["reopened"]
+    assert out["history"] and not out["history_store"]
+    assert out["quick_links"]
+    assert out["download"] and out["download_ok"]
+    assert not Path(out["download_path"]).is_relative_to(data)
+
+    assert snapshot(data) == before[0], "ephemeral session changed the data dir"
+    assert snapshot(temp) == before[1], "ephemeral session left files in the temp area"
@@ -0,0 +1,51 @@
+def make_index(gd):
+    idx = gd.PrefixIndex()
+    idx.bulk_load([(f"https://site{i}.example/p", f"Page {i}", float(i % 7)) for i in range(2000)]
+                  + [("https://pulp.example/", "Pulp fiction", 9.0)])
+    return idx
+
+
+def urls(idx, text):
+    return [u for u, _, _ in idx.query(text)]
+
+
+def test_title_after_visit_reaches_cached_short_prefixes(gd):
+    idx = make_index(gd)
+    for q in ("p", "pu", "pul"):
+        idx.query(q)  # top-K коротких префиксов уже в кеше
+
+    url = "https://github.example/x/pulls"
+    idx.add(url, "", 1.0)  # визит записывается без заголовка
+    idx.add(url, "Pull requests")
+
+    assert url in urls(idx, "pu")
+    assert url in urls(idx, "pul")
+    assert url in urls(idx, "pull")
+    assert url in urls(idx, "req")
+
+
+def test_retitle_drops_old_title_prefixes(gd):
+    idx = make_index(gd)
+    url = "https://github.example/x/pulls"
+    idx.add(url, "Pull requests", 20.0)
+    assert urls(idx, "pu")[0] == url
+
+    idx.add(url, "Issues overview")
+    assert url not in urls(idx, "pu")
+    assert url not in urls(idx, "req")
+    assert urls(idx, "iss") == [url]
+    assert url in urls(idx, "gith")
+
+
+def test_incremental_cache_matches_fresh_build(gd):
+    idx = make_index(gd)
+    for q in ("p", "pa", "pu", "s", "si", "i"):
+        idx.query(q)
+    for i in range(0, 2000, 97):
+        idx.add(f"https://site{i}.example/p", f"Issue {i} summary", 8.0)
+
+    fresh = gd.PrefixIndex()
+    fresh.bulk_load([(u, e[0], e[1]) for u, e in idx.entries.items()])
+    for q in ("p", "pa", "pu", "s", "si", "i", "is", "su"):
+        scores = lambda ix: [ix.entries[u][1] for u in urls(ix, q)]
+        assert scores(idx) == scores(fresh), q
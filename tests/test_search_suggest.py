@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from conftest import pump, wait_until
+
+
+class SuggestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SuggestHandler)
+        self.lock = threading.Lock()
+        self.queries = []
+        self.clients = set()  # (адрес, порт) клиента — по одному на TCP-соединение
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+class SuggestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        q = parse_qs(urlsplit(self.path).query).get("q", [""])[0]
+        srv = self.server
+        with srv.lock:
+            srv.queries.append(q)
+            srv.clients.add(self.client_address)
+            srv.in_flight += 1
+            srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+        if q.startswith("slow"):
+            time.sleep(0.4)
+        body = json.dumps([q, [f"{q} {i}" for i in range(3)]]).encode()
+        with srv.lock:
+            srv.in_flight -= 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_debounce_cancel_and_cache_against_local_server(gd, qapp):
+    server = SuggestServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    tpl = f"http://127.0.0.1:{server.server_address[1]}/complete?q={{q}}"
+    sg = gd.SearchSuggester(lambda: "google", 80, url_template=tpl)
+    got = []
+    sg.ready.connect(lambda text, items: got.append((text, items)))
+    try:
+        # быстрый набор: один запрос после паузы, только по последнему префиксу
+        for text in ("p", "py", "pyt", "pyth"):
+            sg.request(text)
+            pump(10)
+        assert wait_until(lambda: got, 5)
+        assert server.queries == ["pyth"]
+        assert got == [("pyth", ["pyth 0", "pyth 1", "pyth 2"])]
+        assert sg.requests == 1 and sg.cancelled == 0
+
+        # медленный ответ устаревает: в список не попадает, следующий уходит после него
+        sg.request("slow")
+        assert wait_until(lambda: "slow" in server.queries, 5)
+        sg.request("slow-a")
+        pump(20)
+        sg.request("slow-ab")
+        assert wait_until(lambda: len(got) == 2, 5)
+        assert got[1][0] == "slow-ab"
+        assert server.queries == ["pyth", "slow", "slow-ab"]
+        assert sg.cancelled == 1 and sg.requests == 3
+        assert server.max_in_flight == 1
+        assert len(server.clients) == 1  # одно keep-alive соединение на все запросы
+
+        # стирание и повторный набор — из кеша, включая дочитанный устаревший ответ
+        sg.request("pyth")
+        sg.request("slow")
+        assert got[2] == ("pyth", ["pyth 0", "pyth 1", "pyth 2"])
+        assert got[3][0] == "slow"
+        assert sg.cache_hits == 2 and sg.requests == 3
+        pump(200)
+        assert server.queries == ["pyth", "slow", "slow-ab"]
+        assert sg.errors == 0
+    finally:
+        sg.close()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,30 @@
+import json
+
+from conftest import pump
+
+A, B, C = "data:text/html,a", "data:text/html,b", "data:text/html,c"
+
+
+def test_restore_rewrites_journal_before_new_records(gd, qapp):
+    path = gd.SESSION_JOURNAL_PATH
+    path.write_text("".join(json.dumps(r) + "\n" for r in (
+        {"op": "open", "id": 41, "url": A, "title": "a", "pos": 0},
+        {"op": "open", "id": 1, "url": B, "title": "b", "pos": 1},
+        {"op": "active", "id": 1},
+    )), encoding="utf-8")
+
+    gd.BrowserTab._next_uid = 1  # как в новом процессе
+    win = gd.MiniBrowser(gd.CFG)
+    try:
+        # до deferred_init: новые uid с 1 не должны смешаться с id прошлого сеанса
+        win.add_tab(C)
+        win.close_tab(0)
+        win.journal.flush()
+        saved, active = gd.SessionJournal(path).replay()
+        assert [t["url"] for t in saved] == [B, C]
+        assert saved[active]["url"] == B
+    finally:
+        win.close()
+        win.deleteLater()
+        pump(100)
+        path.unlink(missing_ok=True)
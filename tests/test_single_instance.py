@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from conftest import ROOT, wait_until
+
+N_THREADS = 32
+N_LAUNCHES = 8
+
+
+def test_concurrent_clients_deliver_every_url_once(gd, qapp):
+    from PyQt6.QtNetwork import QLocalSocket
+
+    server = gd.InstanceServer()
+    assert server.listen()
+    received = []
+    server.urls_received.connect(received.extend)
+    expected = []
+    errors = []
+
+    # клиенты в потоках: блокирующий forward_to_running_instance, как у второго запуска
+    def client(i):
+        urls = [f"https://c{i}.example/{j}" for j in range(3)]
+        if i % 4 == 0:
+            # ~1 МБ: больше буфера сокета, приходит многими readyRead
+            urls += [f"https://c{i}.example/long/{j}/" + "x" * 400 for j in range(2500)]
+        expected.extend(urls)
+        if not gd.forward_to_running_instance(urls):
+            errors.append(f"client {i}: not delivered")
+
+    # строка, разрезанная на части с паузами, и два сообщения в одном соединении
+    def split_writer():
+        urls = ["https://split.example/a", "https://split.example/b"]
+        expected.extend(urls + ["https://split.example/c"])
+        sock = QLocalSocket()
+        sock.connectToServer(gd.instance_server_name())
+        if not sock.waitForConnected(1000):
+            errors.append("split writer: no connection")
+            return
+        raw = (gd.json.dumps({"urls": urls}) + "\n" + gd.json.dumps({"urls": ["https://split.example/c"]}) + "\n")
+        raw = raw.encode("utf-8")
+        for k in range(0, len(raw), 7):
+            sock.write(raw[k:k + 7])
+            sock.waitForBytesWritten(1000)
+            time.sleep(0.002)
+        sock.disconnectFromServer()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(N_THREADS)]
+    threads.append(threading.Thread(target=split_writer))
+
+    # настоящие повторные запуски: Source.py отдаёт адреса и выходит, не поднимая окно
+    launches = []
+    for i in range(N_LAUNCHES):
+        url = f"https://launch{i}.example/"
+        expected.append(url)
+        launches.append(subprocess.Popen([sys.executable, str(ROOT / "Source.py"), url],
+                                         env=dict(os.environ), cwd=str(ROOT)))
+    for t in threads:
+        t.start()
+
+    def done():
+        return (not any(t.is_alive() for t in threads)
+                and all(p.poll() is not None for p in launches)
+                and len(received) >= len(expected))
+
+    try:
+        assert wait_until(done, 60)
+        assert not errors
+        assert all(p.returncode == 0 for p in launches)
+        assert sorted(received) == sorted(expected)
+        assert wait_until(lambda: not server._buffers, 5)  # отключившиеся сокеты не копятся
+    finally:
+        for p in launches:
+            if p.poll() is None:
+                p.kill()
+        server.server.close()
@@ -0,0 +1,25 @@
+import sqlite3
+
+
+def test_failing_write_does_not_drop_the_batch(gd, tmp_path):
+    class Worker(gd.SqliteWorker):
+        SCHEMA = "CREATE TABLE IF NOT EXISTS t(x INTEGER UNIQUE);"
+
+    def insert(conn, x):
+        conn.execute("INSERT INTO t VALUES(?)", (x,))
+
+    def half_done(conn):
+        conn.execute("INSERT INTO t VALUES(100)")
+        conn.execute("INSERT INTO t VALUES(1)")  # дубликат: откатывается вся операция, включая 100
+
+    path = tmp_path / "w.db"
+    w = Worker(path, "test-worker")
+    for x in range(10):
+        w.submit(insert, x)
+    w.submit(insert, 3)
+    w.submit(half_done)
+    w.submit(insert, 50)
+    w.close()
+
+    rows = [r[0] for r in sqlite3.connect(path).execute("SELECT x FROM t ORDER BY x")]
+    assert rows == list(range(10)) + [50]
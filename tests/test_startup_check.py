@@ -0,0 +1,54 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from conftest import ROOT
+
+RUNS = 5
+
+
+def startup_check(home, baseline, pct: int):
+    # один холодный запуск: окно открывается offscreen, по первому loadFinished процесс выходит
+    proc = subprocess.run(
+        [sys.executable, str(ROOT / "Source.py"), "--new-instance",
+         f"--startup-check={pct}", "--startup-baseline", str(baseline)],
+        env=dict(os.environ, HOME=str(home)), capture_output=True, text=True, timeout=120)
+    m = re.search(r"startup ([\d.]+) ms", proc.stdout)
+    return proc.returncode, float(m.group(1)) if m else None, proc
+
+
+def write_baseline(path, total_ms: float):
+    path.write_text(json.dumps({"total_ms": round(total_ms, 1)}), encoding="utf-8")
+
+
+def test_startup_check_against_fixed_baseline(gd, tmp_path):
+    home = tmp_path / "home"
+    baseline = tmp_path / "startup_baseline.json"
+
+    # замер: база заведомо большая, каждый запуск проходит и печатает своё время
+    write_baseline(baseline, 1e9)
+    startup_check(home, baseline, 20)  # прогрев: первый запуск создаёт папку данных
+    totals = []
+    for _ in range(RUNS):
+        code, total, proc = startup_check(home, baseline, 20)
+        assert code == 0 and total is not None, proc.stdout + proc.stderr[-2000:]
+        totals.append(total)
+    median = statistics.median(totals)
+
+    # одиночный запуск шумит — решение по медиане кодов выхода нескольких запусков
+    write_baseline(baseline, median)
+    codes = [startup_check(home, baseline, 50)[0] for _ in range(RUNS)]
+    assert statistics.median(codes) == 0, (codes, totals)
+
+    write_baseline(baseline, median / 10)
+    codes = [startup_check(home, baseline, 20)[0] for _ in range(RUNS)]
+    assert statistics.median(codes) == 1, (codes, totals)
+
+    # заданная база не создаётся сама: её отсутствие — ошибка, а не «сохранено, OK»
+    baseline.unlink()
+    code, _, proc = startup_check(home, baseline, 20)
+    assert code == 2, proc.stdout
+    assert not baseline.exists()
@@ -0,0 +1,48 @@
+import os
+
+from conftest import live_objects, pump, renderer_pids, wait_until
+
+ROUNDS = 25
+BATCH = 20  # 25 × 20 = 500 вкладок за тест
+RSS_SLACK = 96 * 1024 * 1024
+
+
+def page_html(i: int) -> str:
+    return f"data:text/html,<title>tab {i}</title><p>{'x' * 4000}</p><script>window.blob=new Array(200000).fill({i})</script>"
+
+
+def test_closed_tabs_release_pages_views_and_renderers(gd, browser):
+    from PyQt6.QtWebEngineCore import QWebEnginePage
+    from PyQt6.QtWebEngineWidgets import QWebEngineView
+
+    base_tabs = len(live_objects(gd.BrowserTab))
+    base_pages = len(live_objects(QWebEnginePage))
+    base_views = len(live_objects(QWebEngineView))
+    base_renderers = renderer_pids()
+    base_rss = gd.process_rss_bytes(os.getpid())
+    rss_after = []
+
+    for r in range(ROUNDS):
+        opened = [browser.add_tab(page_html(r * BATCH + i), switch=True, return_tab=True) for i in range(BATCH)]
+        assert wait_until(lambda: all(t.title.startswith("tab ") for t in opened), 30)
+        opened_pids = {t.page.renderProcessPid() for t in opened} - {0}
+        assert len(live_objects(gd.BrowserTab)) == base_tabs + BATCH
+        opened.clear()  # ссылки теста на вкладки не должны мешать их удалению
+
+        while browser.tabs.count() > 1:
+            browser.close_tab(browser.tabs.count() - 1)
+        pump(300)
+
+        assert wait_until(lambda: len(live_objects(gd.BrowserTab)) == base_tabs, 10), f"round {r}"
+        assert len(live_objects(QWebEnginePage)) == base_pages, f"round {r}"
+        assert len(live_objects(QWebEngineView)) == base_views, f"round {r}"
+        # рендереры закрытых вкладок завершаются; общий с оставшейся вкладкой может остаться
+        assert wait_until(lambda: not (renderer_pids() & opened_pids) - base_renderers, 15), f"round {r}"
+        assert len(renderer_pids()) <= len(base_renderers), f"round {r}"
+        rss_after.append(gd.process_rss_bytes(os.getpid()))
+
+    assert max(rss_after) <= base_rss + RSS_SLACK
+    # после прогрева память не растёт от круга к кругу
+    assert rss_after[-1] <= rss_after[0] + RSS_SLACK // 2
+    # закрытые вкладки доступны для Ctrl+Shift+T без живых объектов страниц; список ограничен
+    assert len(browser.closed_tabs) == gd.CLOSED_TABS_LIMIT
@@ -0,0 +1,46 @@
+import time
+
+from conftest import pump, wait_until
+
+
+def page(name: str) -> str:
+    return f"data:text/html,<title>{name}</title><p>{name}</p>"
+
+
+def test_idle_time_counts_from_leaving_the_tab(gd, browser):
+    from PyQt6.QtWebEngineCore import QWebEnginePage
+
+    lc = browser.lifecycle
+    lc.memory_budget_bytes = 0  # здесь проверяется только заморозка
+    a = browser.add_tab(page("a"), switch=True, return_tab=True)
+    b = browser.add_tab(page("b"), switch=False, return_tab=True)
+    assert wait_until(lambda: a.title == "a" and b.title == "b", 20)
+
+    # на вкладке a работали дольше freeze_after_sec, потом ушли на b
+    browser.tabs.setCurrentWidget(a)
+    a.last_active = time.monotonic() - 2 * lc.freeze_after_sec
+    left_at = time.monotonic()
+    browser.tabs.setCurrentWidget(b)
+    assert a.last_active >= left_at
+
+    lc.tick()
+    pump(500)
+    assert lc._state(a) == QWebEnginePage.LifecycleState.Active
+
+    # после настоящего простоя вкладка замораживается
+    a.last_active = time.monotonic() - lc.freeze_after_sec - 1
+    lc.tick()
+    assert wait_until(lambda: lc._state(a) == QWebEnginePage.LifecycleState.Frozen, 5)
+
+
+def test_budget_order_is_least_recently_used(gd, browser):
+    tabs = [browser.add_tab(page(n), switch=False, return_tab=True) for n in "xyz"]
+    assert wait_until(lambda: all(t.title for t in tabs), 20)
+    x, y, z = tabs
+
+    # выбраны давно в порядке x, y, z, но последней использовалась x
+    for t in (x, y, z, x, y):
+        browser.tabs.setCurrentWidget(t)
+        pump(20)
+    browser.tabs.setCurrentWidget(browser.tabs.widget(0))
+    assert sorted((x, y, z), key=lambda t: t.last_active) == [z, x, y]
@@ -0,0 +1,34 @@
+import time
+
+from conftest import pump, wait_until
+
+FORM = "data:text/html,<title>form</title><textarea id=t></textarea>"
+
+
+def page(name: str) -> str:
+    return f"data:text/html,<title>{name}</title><p>{name}</p>"
+
+
+def test_memory_discard_spares_pinned_and_dirty_tabs(gd, browser):
+    from PyQt6.QtWebEngineCore import QWebEnginePage
+
+    wd, lc = browser.watchdog, browser.lifecycle
+    wd.memory_action = "discard"
+    pinned = browser.add_tab(page("pinned"), return_tab=True)
+    dirty = browser.add_tab(FORM, return_tab=True)
+    plain = browser.add_tab(page("plain"), return_tab=True)
+    assert wait_until(lambda: (pinned.title, dirty.title, plain.title) == ("pinned", "form", "plain"), 20)
+    pinned.pinned = True
+    typed = []
+    dirty.page.runJavaScript("document.getElementById('t').value = 'unsaved'; 1", typed.append)
+    assert wait_until(lambda: typed, 5)
+
+    # разные фиктивные pid: у каждого рендерера своё окно ACTION_COOLDOWN_SEC
+    now = time.monotonic()
+    for pid, tab in enumerate((pinned, dirty, plain), start=900001):
+        wd._over_memory(pid, wd.memory_bytes + 1, [tab], now)
+    assert wait_until(lambda: lc._state(plain) == QWebEnginePage.LifecycleState.Discarded, 5)
+    pump(300)
+    assert lc._state(pinned) == QWebEnginePage.LifecycleState.Active
+    assert lc._state(dirty) == QWebEnginePage.LifecycleState.Active
+    assert dirty.form_dirty